@@ -0,0 +1,92 @@
+-- One-round-trip bootstrap functions for the project and home pages.
+-- They replace the sequential profile -> membership -> expenses -> saving goals
+-- requests with a single RPC call. Both run as the calling user (security invoker),
+-- so the same Row Level Security policies apply as for the individual queries.
+-- Requires add_monthly_rollup.sql and create_view.sql.
+-- Run through migrate.py.
+
+create or replace function get_project_bootstrap(
+  target_project_id uuid,
+  target_month date default date_trunc('month', current_date)::date,
+  page_size integer default 500
+)
+returns json as $$
+  with membership as (
+    select p.id, p.name, pm.role
+    from project_members pm
+    join projects p on p.id = pm.project_id
+    where pm.project_id = target_project_id
+    and pm.user_id = auth.uid()
+  ),
+  -- First page of the requested month, in the same order as the keyset loader
+  month_expenses as (
+    select
+      e.*,
+      case when pr.id is null then null
+        else json_build_object('full_name', pr.full_name, 'username', pr.username)
+      end as profiles
+    from expenses e
+    left join profiles pr on pr.id = e.user_id
+    where e.project_id = target_project_id
+    and e.date >= date_trunc('month', target_month)::date
+    and e.date < (date_trunc('month', target_month) + interval '1 month')::date
+    and exists (select 1 from membership)
+    order by e.date desc, e.created_at desc, e.id desc
+    limit page_size
+  )
+  select json_build_object(
+    'profile', (
+      select json_build_object('full_name', full_name, 'username', username)
+      from profiles where id = auth.uid()
+    ),
+    'project', (
+      select json_build_object('id', id, 'name', name, 'role', role) from membership
+    ),
+    'saving_goals', coalesce((
+      select json_agg(g order by g.name)
+      from saving_goals g
+      where g.project_id = target_project_id
+      and exists (select 1 from membership)
+    ), '[]'::json),
+    'expenses', coalesce((
+      select json_agg(m order by m.date desc, m.created_at desc, m.id desc) from month_expenses m
+    ), '[]'::json),
+    'rollup', coalesce((
+      select json_agg(json_build_object(
+        'month', r.month,
+        'category', r.category,
+        'sub_category', r.sub_category,
+        'source', r.source,
+        'total', r.total,
+        'row_count', r.row_count
+      ) order by r.month)
+      from expense_monthly_rollup r
+      where r.project_id = target_project_id
+      and exists (select 1 from membership)
+    ), '[]'::json)
+  );
+$$ language sql stable;
+
+create or replace function get_home_bootstrap()
+returns json as $$
+  select json_build_object(
+    'profile', (
+      select json_build_object('full_name', full_name, 'username', username)
+      from profiles where id = auth.uid()
+    ),
+    'projects', coalesce((
+      select json_agg(json_build_object(
+        'id', v.id,
+        'name', v.name,
+        'role', pm.role,
+        'created_at', v.created_at,
+        'owner_name', v.owner_name,
+        'owner_username', v.owner_username,
+        'last_expense_date', v.last_expense_date
+      ) order by v.last_expense_date desc) -- Sort by most active
+      from project_members pm
+      join project_details_view v on v.id = pm.project_id
+      where pm.user_id = auth.uid()
+    ), '[]'::json)
+  );
+$$ language sql stable;
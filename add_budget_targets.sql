@@ -0,0 +1,84 @@
+-- Precomputed "AI Target" budget per project (see AI_BUDGETING_LOGIC.md).
+-- Written by budget_targets.py, read by the project page through get_project_bootstrap.
+-- source_checksum fingerprints the closed-month Living/Playing totals the target was
+-- computed from, so the job only recomputes projects whose history changed.
+--
+-- Requires add_columnar_expenses.sql (get_project_bootstrap is redefined below).
+-- Run through migrate.py.
+
+create table if not exists project_budget_targets (
+  project_id uuid references projects(id) on delete cascade primary key,
+  budget_limit numeric not null,
+  month_count integer not null, -- closed months averaged, 0 for the cold-start fallback
+  computed_for_month date not null, -- the month excluded as "current" when computing
+  source_checksum text not null,
+  computed_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+alter table project_budget_targets enable row level security;
+
+drop policy if exists "Members can view budget targets" on project_budget_targets;
+
+-- Read-only for clients, rows are only written by budget_targets.py
+create policy "Members can view budget targets" on project_budget_targets
+  for select using (
+    project_id in (select accessible_project_ids())
+  );
+
+-- Same as in add_columnar_expenses.sql, plus the stored target when it is for this month
+create or replace function get_project_bootstrap(
+  target_project_id uuid,
+  target_month date default date_trunc('month', current_date)::date,
+  page_size integer default 500
+)
+returns json as $$
+  with membership as (
+    select p.id, p.name, pm.role
+    from project_members pm
+    join projects p on p.id = pm.project_id
+    where pm.project_id = target_project_id
+    and pm.user_id = auth.uid()
+  )
+  select json_build_object(
+    'profile', (
+      select json_build_object('full_name', full_name, 'username', username)
+      from profiles where id = auth.uid()
+    ),
+    'project', (
+      select json_build_object('id', id, 'name', name, 'role', role) from membership
+    ),
+    'saving_goals', coalesce((
+      select json_agg(g order by g.name)
+      from saving_goals g
+      where g.project_id = target_project_id
+      and exists (select 1 from membership)
+    ), '[]'::json),
+    'expenses', get_expense_page(
+      target_project_id,
+      date_trunc('month', target_month)::date,
+      (date_trunc('month', target_month) + interval '1 month')::date,
+      null, null, null,
+      page_size
+    ),
+    'rollup', coalesce((
+      select json_agg(json_build_object(
+        'month', r.month,
+        'category', r.category,
+        'sub_category', r.sub_category,
+        'source', r.source,
+        'total', r.total,
+        'row_count', r.row_count
+      ) order by r.month)
+      from expense_monthly_rollup r
+      where r.project_id = target_project_id
+      and exists (select 1 from membership)
+    ), '[]'::json),
+    'budget_target', (
+      select t.budget_limit
+      from project_budget_targets t
+      where t.project_id = target_project_id
+      and t.computed_for_month = date_trunc('month', current_date)::date
+      and exists (select 1 from membership)
+    )
+  );
+$$ language sql stable;
@@ -0,0 +1,34 @@
+-- Timing spans sent by the app when profiling is switched to "remote" (see src/lib/perf.ts).
+-- Clients can only insert their own rows; read them with perf_report.py.
+--
+-- Run through migrate.py.
+
+create table if not exists client_perf_events (
+  id bigint generated always as identity primary key,
+  user_id uuid references auth.users(id) on delete cascade default auth.uid() not null,
+  session_id text not null, -- one page load
+  name text not null, -- e.g. rpc:get_expense_page, summarizeRollup, ExpenseList
+  stage text not null check (stage in ('network', 'call', 'decode', 'compute', 'render')),
+  started_at timestamp with time zone not null,
+  duration_ms double precision not null,
+  rows integer,
+  bytes integer,
+  detail jsonb,
+  user_agent text,
+  created_at timestamp with time zone default now() not null
+);
+
+create index if not exists client_perf_events_started_at_idx
+  on client_perf_events (started_at);
+
+alter table client_perf_events enable row level security;
+
+drop policy if exists "Users can insert own perf events" on client_perf_events;
+
+create policy "Users can insert own perf events" on client_perf_events
+  for insert with check (
+    user_id = auth.uid()
+  );
+
+-- Diagnostics only, so keep them for a while and then let them go, e.g. from pg_cron:
+--   delete from client_perf_events where created_at < now() - interval '30 days';
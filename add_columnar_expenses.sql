@@ -0,0 +1,124 @@
+-- Compact, column-oriented expense pages.
+-- Instead of one JSON object per row with its own embedded profile, get_expense_page
+-- returns one array per column. Category, sub category, source and user are sent as
+-- small integer codes into per-page dictionaries, and each author's profile is sent
+-- once in "members". Decoded on the client by src/lib/columnar.ts.
+-- Requires add_bootstrap_functions.sql (get_project_bootstrap is redefined below).
+-- Run through migrate.py.
+
+create or replace function get_expense_page(
+  target_project_id uuid,
+  from_date date default null, -- inclusive
+  to_date date default null, -- exclusive
+  cursor_date date default null, -- last row of the previous page
+  cursor_created_at timestamp with time zone default null,
+  cursor_id uuid default null,
+  page_size integer default 500
+)
+returns json as $$
+  with page as (
+    select e.id, e.date, e.created_at, e.amount, e.description, e.category, e.sub_category, e.source, e.user_id
+    from expenses e
+    where e.project_id = target_project_id
+    and (from_date is null or e.date >= from_date)
+    and (to_date is null or e.date < to_date)
+    and (cursor_date is null or (e.date, e.created_at, e.id) < (cursor_date, cursor_created_at, cursor_id))
+    order by e.date desc, e.created_at desc, e.id desc
+    limit page_size
+  ),
+  numbered as (
+    select *, row_number() over (order by date desc, created_at desc, id desc) as rn from page
+  ),
+  categories as (
+    select value, (row_number() over (order by value) - 1)::int as code
+    from (select distinct category as value from page) c
+  ),
+  sub_categories as (
+    select value, (row_number() over (order by value) - 1)::int as code
+    from (select distinct sub_category as value from page where sub_category is not null) s
+  ),
+  sources as (
+    select value, (row_number() over (order by value) - 1)::int as code
+    from (select distinct source as value from page where source is not null) s
+  ),
+  users as (
+    select value, (row_number() over (order by value) - 1)::int as code
+    from (select distinct user_id as value from page where user_id is not null) u
+  )
+  select json_build_object(
+    'id', coalesce(array_agg(n.id order by n.rn), '{}'),
+    'date', coalesce(array_agg(n.date order by n.rn), '{}'),
+    'created_at', coalesce(array_agg(n.created_at order by n.rn), '{}'),
+    'amount', coalesce(array_agg(n.amount order by n.rn), '{}'),
+    'description', coalesce(array_agg(n.description order by n.rn), '{}'),
+    'category', coalesce(array_agg(c.code order by n.rn), '{}'),
+    'sub_category', coalesce(array_agg(sc.code order by n.rn), '{}'),
+    'source', coalesce(array_agg(so.code order by n.rn), '{}'),
+    'user', coalesce(array_agg(u.code order by n.rn), '{}'),
+    'categories', coalesce((select array_agg(value order by code) from categories), '{}'),
+    'sub_categories', coalesce((select array_agg(value order by code) from sub_categories), '{}'),
+    'sources', coalesce((select array_agg(value order by code) from sources), '{}'),
+    'members', coalesce((
+      select json_agg(json_build_object('id', us.value, 'full_name', pr.full_name, 'username', pr.username) order by us.code)
+      from users us
+      left join profiles pr on pr.id = us.value
+    ), '[]'::json)
+  )
+  from numbered n
+  join categories c on c.value = n.category
+  left join sub_categories sc on sc.value = n.sub_category
+  left join sources so on so.value = n.source
+  left join users u on u.value = n.user_id;
+$$ language sql stable;
+
+-- Same as in add_bootstrap_functions.sql, but the month's first page now comes
+-- back in the columnar shape above.
+create or replace function get_project_bootstrap(
+  target_project_id uuid,
+  target_month date default date_trunc('month', current_date)::date,
+  page_size integer default 500
+)
+returns json as $$
+  with membership as (
+    select p.id, p.name, pm.role
+    from project_members pm
+    join projects p on p.id = pm.project_id
+    where pm.project_id = target_project_id
+    and pm.user_id = auth.uid()
+  )
+  select json_build_object(
+    'profile', (
+      select json_build_object('full_name', full_name, 'username', username)
+      from profiles where id = auth.uid()
+    ),
+    'project', (
+      select json_build_object('id', id, 'name', name, 'role', role) from membership
+    ),
+    'saving_goals', coalesce((
+      select json_agg(g order by g.name)
+      from saving_goals g
+      where g.project_id = target_project_id
+      and exists (select 1 from membership)
+    ), '[]'::json),
+    'expenses', get_expense_page(
+      target_project_id,
+      date_trunc('month', target_month)::date,
+      (date_trunc('month', target_month) + interval '1 month')::date,
+      null, null, null,
+      page_size
+    ),
+    'rollup', coalesce((
+      select json_agg(json_build_object(
+        'month', r.month,
+        'category', r.category,
+        'sub_category', r.sub_category,
+        'source', r.source,
+        'total', r.total,
+        'row_count', r.row_count
+      ) order by r.month)
+      from expense_monthly_rollup r
+      where r.project_id = target_project_id
+      and exists (select 1 from membership)
+    ), '[]'::json)
+  );
+$$ language sql stable;
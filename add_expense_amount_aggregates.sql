@@ -0,0 +1,96 @@
+-- Whole-rupiah integer amounts, step 2 of 2. Runs after expenses.amount_idr is
+-- backfilled and NOT NULL (see add_expense_amount_idr.sql and migrate.py):
+-- the monthly rollup and range totals are summed as bigint from amount_idr.
+--
+-- Run through migrate.py.
+
+-- 1. ROLLUP IN BIGINT
+-- Every amount is whole by now, so the existing totals convert exactly
+alter table expense_monthly_rollup alter column total type bigint using total::bigint;
+
+drop function if exists apply_expense_rollup_delta(uuid, date, text, text, text, numeric, integer);
+
+-- Same as in add_monthly_rollup.sql, with a bigint delta. Only the trigger may call it.
+create or replace function apply_expense_rollup_delta(
+  target_project_id uuid,
+  expense_date date,
+  expense_category text,
+  expense_sub_category text,
+  expense_source text,
+  delta_amount bigint,
+  delta_count integer
+)
+returns void as $$
+declare
+  remaining integer;
+begin
+  if target_project_id is null then
+    return;
+  end if;
+
+  insert into expense_monthly_rollup as r (project_id, month, category, sub_category, source, total, row_count)
+  values (
+    target_project_id,
+    date_trunc('month', expense_date)::date,
+    expense_category,
+    coalesce(expense_sub_category, ''),
+    coalesce(expense_source, 'Balance'),
+    delta_amount,
+    delta_count
+  )
+  on conflict (project_id, month, category, sub_category, source) do update
+    set total = r.total + excluded.total,
+        row_count = r.row_count + excluded.row_count
+  returning r.row_count into remaining;
+
+  -- Drop empty buckets so the month list only shows months that still have entries
+  if remaining <= 0 then
+    delete from expense_monthly_rollup
+    where project_id = target_project_id
+      and month = date_trunc('month', expense_date)::date
+      and category = expense_category
+      and sub_category = coalesce(expense_sub_category, '')
+      and source = coalesce(expense_source, 'Balance');
+  end if;
+end;
+$$ language plpgsql security definer set search_path = public;
+
+revoke execute on function apply_expense_rollup_delta(uuid, date, text, text, text, bigint, integer) from public, anon, authenticated;
+
+create or replace function public.handle_expense_rollup()
+returns trigger as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    perform apply_expense_rollup_delta(old.project_id, old.date, old.category, old.sub_category, old.source, -old.amount_idr, -1);
+  end if;
+
+  if tg_op in ('INSERT', 'UPDATE') then
+    perform apply_expense_rollup_delta(new.project_id, new.date, new.category, new.sub_category, new.source, new.amount_idr, 1);
+  end if;
+
+  return null;
+end;
+$$ language plpgsql security definer set search_path = public;
+
+revoke execute on function public.handle_expense_rollup() from public, anon, authenticated;
+
+-- 2. TOTALS FOR ANY DATE RANGE
+-- For ranges the monthly rollup cannot answer, e.g. the date filter of the expense list.
+-- to_date is exclusive like get_expense_page. Runs with the caller's RLS.
+create or replace function get_expense_totals(
+  target_project_id uuid,
+  from_date date default null,
+  to_date date default null
+)
+returns table (category text, source text, total bigint, row_count bigint) as $$
+  select
+    e.category,
+    coalesce(e.source, 'Balance'),
+    sum(e.amount_idr)::bigint,
+    count(*)
+  from expenses e
+  where e.project_id = target_project_id
+  and (from_date is null or e.date >= from_date)
+  and (to_date is null or e.date < to_date)
+  group by 1, 2;
+$$ language sql stable;
@@ -0,0 +1,44 @@
+-- Whole-rupiah integer amounts, step 1 of 2 (add_expense_amount_aggregates.sql follows).
+-- Adds expenses.amount_idr (bigint) and keeps it equal to amount on every write, so the
+-- existing rows can be backfilled in batches (migrate.py) while the app keeps writing
+-- amount as before. IDR has no minor unit: amounts are rounded to whole rupiah.
+--
+-- Run through migrate.py, which backfills and sets NOT NULL after this file.
+
+alter table expenses add column if not exists amount_idr bigint;
+
+-- 1. DUAL WRITE
+-- Also fires when amount_idr is written on its own, so it can never drift from amount
+create or replace function public.handle_expense_amount_idr()
+returns trigger as $$
+begin
+  new.amount := round(new.amount);
+  new.amount_idr := new.amount;
+  return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists on_expense_amount_idr on expenses;
+create trigger on_expense_amount_idr
+  before insert or update of amount, amount_idr on expenses
+  for each row execute procedure public.handle_expense_amount_idr();
+
+-- 2. BACKFILL WITHOUT SIDE EFFECTS
+-- Filling in amount_idr is not a change devices need to download again
+create or replace function public.handle_expense_updated_at()
+returns trigger as $$
+begin
+  if (to_jsonb(new) - 'amount_idr' - 'updated_at') = (to_jsonb(old) - 'amount_idr' - 'updated_at') then
+    return new;
+  end if;
+
+  new.updated_at := now();
+  return new;
+end;
+$$ language plpgsql;
+
+-- Only columns that move an expense between buckets or change its total touch the rollup
+drop trigger if exists on_expense_rollup on expenses;
+create trigger on_expense_rollup
+  after insert or update of project_id, date, category, sub_category, source, amount or delete on expenses
+  for each row execute procedure public.handle_expense_rollup();
@@ -0,0 +1,29 @@
+-- What happens to the expenses someone added when their account is deleted.
+-- expenses.user_id is NOT NULL and references profiles(id), which cascades from
+-- auth.users. Expenses in projects owned by someone else are handed to that project's
+-- owner first, so shared projects keep their history and totals. The foreign key
+-- (migrate.py 028) then cascades: what is left sits in the user's own projects, and
+-- projects.owner_id already prevents deleting an account that still owns projects.
+--
+-- Run through migrate.py.
+
+create or replace function public.handle_profile_delete()
+returns trigger as $$
+begin
+  update expenses e
+  set user_id = p.owner_id
+  from projects p
+  where e.user_id = old.id
+    and p.id = e.project_id
+    and p.owner_id <> old.id;
+
+  return old;
+end;
+$$ language plpgsql security definer set search_path = public;
+
+revoke execute on function public.handle_profile_delete() from public, anon, authenticated;
+
+drop trigger if exists on_profile_delete on profiles;
+create trigger on_profile_delete
+  before delete on profiles
+  for each row execute procedure public.handle_profile_delete();
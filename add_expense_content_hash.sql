@@ -0,0 +1,11 @@
+-- Content hash for imported statement rows (see import_statements.py)
+--
+-- Run through migrate.py. The steps that read the whole expenses table follow this file
+-- there, so they do not block writes:
+--   unique index expenses_project_content_hash_idx on expenses (project_id, content_hash)
+--     where content_hash is not null, built concurrently
+--   expenses_category_check redefined to allow 'Income', added not valid and validated after
+
+-- Rows entered in the app keep a null hash; imported rows carry a hash of their statement line,
+-- so importing the same statement twice inserts nothing new.
+alter table expenses add column if not exists content_hash text;
@@ -0,0 +1,7 @@
+-- Composite index backing the keyset-paginated expense loader (src/lib/expenses.ts).
+-- Pages are read per project ordered by (date desc, created_at desc, id desc), so
+-- every page, including the month window loaded first, is a single index range scan.
+-- Run through migrate.py.
+
+create index if not exists expenses_project_date_created_id_idx
+  on expenses (project_id, date desc, created_at desc, id desc);
@@ -0,0 +1,136 @@
+-- Server-side search over expense descriptions, so finding an old entry does not
+-- require downloading the project's whole history first.
+-- A pg_trgm GIN index serves both substring (ilike) and fuzzy word matches; results
+-- are ranked by word similarity and keyset-paginated on (rank, date, created_at, id).
+-- Requires add_columnar_expenses.sql (get_expense_page is redefined below).
+--
+-- Run through migrate.py, which builds the index afterwards with CREATE INDEX CONCURRENTLY:
+--   expenses_description_trgm_idx on expenses using gin (description gin_trgm_ops)
+
+create extension if not exists pg_trgm;
+
+-- Columnar encoding of the given expenses, in the order given (see add_columnar_expenses.sql)
+create or replace function encode_expense_page(expense_ids uuid[])
+returns json as $$
+  with numbered as (
+    select e.id, e.date, e.created_at, e.amount, e.description, e.category, e.sub_category, e.source, e.user_id, ids.rn
+    from unnest(expense_ids) with ordinality as ids(id, rn)
+    join expenses e on e.id = ids.id
+  ),
+  categories as (
+    select value, (row_number() over (order by value) - 1)::int as code
+    from (select distinct category as value from numbered) c
+  ),
+  sub_categories as (
+    select value, (row_number() over (order by value) - 1)::int as code
+    from (select distinct sub_category as value from numbered where sub_category is not null) s
+  ),
+  sources as (
+    select value, (row_number() over (order by value) - 1)::int as code
+    from (select distinct source as value from numbered where source is not null) s
+  ),
+  users as (
+    select value, (row_number() over (order by value) - 1)::int as code
+    from (select distinct user_id as value from numbered where user_id is not null) u
+  )
+  select json_build_object(
+    'id', coalesce(array_agg(n.id order by n.rn), '{}'),
+    'date', coalesce(array_agg(n.date order by n.rn), '{}'),
+    'created_at', coalesce(array_agg(n.created_at order by n.rn), '{}'),
+    'amount', coalesce(array_agg(n.amount order by n.rn), '{}'),
+    'description', coalesce(array_agg(n.description order by n.rn), '{}'),
+    'category', coalesce(array_agg(c.code order by n.rn), '{}'),
+    'sub_category', coalesce(array_agg(sc.code order by n.rn), '{}'),
+    'source', coalesce(array_agg(so.code order by n.rn), '{}'),
+    'user', coalesce(array_agg(u.code order by n.rn), '{}'),
+    'categories', coalesce((select array_agg(value order by code) from categories), '{}'),
+    'sub_categories', coalesce((select array_agg(value order by code) from sub_categories), '{}'),
+    'sources', coalesce((select array_agg(value order by code) from sources), '{}'),
+    'members', coalesce((
+      select json_agg(json_build_object('id', us.value, 'full_name', pr.full_name, 'username', pr.username) order by us.code)
+      from users us
+      left join profiles pr on pr.id = us.value
+    ), '[]'::json)
+  )
+  from numbered n
+  join categories c on c.value = n.category
+  left join sub_categories sc on sc.value = n.sub_category
+  left join sources so on so.value = n.source
+  left join users u on u.value = n.user_id;
+$$ language sql stable;
+
+-- Same signature and output as before, now sharing the encoder with search_expenses
+create or replace function get_expense_page(
+  target_project_id uuid,
+  from_date date default null,
+  to_date date default null,
+  cursor_date date default null,
+  cursor_created_at timestamp with time zone default null,
+  cursor_id uuid default null,
+  page_size integer default 500
+)
+returns json as $$
+  select encode_expense_page(array(
+    select e.id
+    from expenses e
+    where e.project_id = target_project_id
+    and (from_date is null or e.date >= from_date)
+    and (to_date is null or e.date < to_date)
+    and (cursor_date is null or (e.date, e.created_at, e.id) < (cursor_date, cursor_created_at, cursor_id))
+    order by e.date desc, e.created_at desc, e.id desc
+    limit page_size
+  ));
+$$ language sql stable;
+
+-- filters: { "category", "sub_category", "user_id", "start_date", "end_date" }, all optional,
+--          end_date is inclusive like the date range picker in ExpenseList.
+-- search_cursor: { "rank", "date", "created_at", "id" } of the last row of the previous page.
+create or replace function search_expenses(
+  target_project_id uuid,
+  query text,
+  filters jsonb default '{}'::jsonb,
+  search_cursor jsonb default null,
+  page_size integer default 100
+)
+returns json as $$
+  with matches as (
+    select
+      e.id,
+      e.date,
+      e.created_at,
+      word_similarity(query, coalesce(e.description, '')) as rank
+    from expenses e
+    where e.project_id = target_project_id
+    and (
+      -- substring match, with ilike wildcards in the query escaped
+      e.description ilike '%' || replace(replace(replace(query, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+      -- or a fuzzy word match, e.g. "uang kost" finds "Uang Kos"
+      or query <% e.description
+    )
+    and (filters->>'category' is null or e.category = filters->>'category')
+    and (filters->>'sub_category' is null or e.sub_category = filters->>'sub_category')
+    and (filters->>'user_id' is null or e.user_id = (filters->>'user_id')::uuid)
+    and (filters->>'start_date' is null or e.date >= (filters->>'start_date')::date)
+    and (filters->>'end_date' is null or e.date <= (filters->>'end_date')::date)
+  ),
+  page as (
+    select * from matches m
+    where search_cursor is null
+    or (m.rank, m.date, m.created_at, m.id) < (
+      (search_cursor->>'rank')::real,
+      (search_cursor->>'date')::date,
+      (search_cursor->>'created_at')::timestamp with time zone,
+      (search_cursor->>'id')::uuid
+    )
+    order by m.rank desc, m.date desc, m.created_at desc, m.id desc
+    limit page_size
+  )
+  select json_build_object(
+    'page', encode_expense_page(array(
+      select id from page order by rank desc, date desc, created_at desc, id desc
+    )),
+    'ranks', coalesce((
+      select json_agg(rank order by rank desc, date desc, created_at desc, id desc) from page
+    ), '[]'::json)
+  );
+$$ language sql stable;
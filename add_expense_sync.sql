@@ -0,0 +1,150 @@
+-- Delta sync for the offline cache in the app (src/lib/offlineStore.ts).
+-- Every expense carries updated_at, deletes leave a tombstone, and
+-- get_expense_changes() returns what changed in a project since a watermark,
+-- so a device that already holds the project only downloads the difference.
+--
+-- Requires add_expense_search.sql (encode_expense_page) and optimize_project_access.sql.
+--
+-- Run through migrate.py. The steps that touch every expense follow this file there,
+-- in batches and without blocking writes: updated_at is backfilled from created_at,
+-- made NOT NULL through a validated check, and indexed concurrently as
+--   expenses_project_updated_at_idx on expenses (project_id, updated_at)
+
+-- 1. UPDATED_AT
+alter table expenses add column if not exists updated_at timestamp with time zone;
+alter table expenses alter column updated_at set default now();
+
+create or replace function public.handle_expense_updated_at()
+returns trigger as $$
+begin
+  -- The backfill only sets updated_at, keep the value it gives
+  if (to_jsonb(new) - 'updated_at') = (to_jsonb(old) - 'updated_at') then
+    return new;
+  end if;
+
+  new.updated_at := now();
+  return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists on_expense_updated_at on expenses;
+create trigger on_expense_updated_at
+  before update on expenses
+  for each row execute procedure public.handle_expense_updated_at();
+
+-- Only columns that move an expense between buckets or change its total touch the rollup,
+-- so the backfill does not rewrite expense_monthly_rollup once per row
+drop trigger if exists on_expense_rollup on expenses;
+create trigger on_expense_rollup
+  after insert or update of project_id, date, category, sub_category, source, amount or delete on expenses
+  for each row execute procedure public.handle_expense_rollup();
+
+-- 2. TOMBSTONES
+create table if not exists expense_tombstones (
+  id uuid primary key, -- the deleted expense
+  project_id uuid references projects(id) on delete cascade not null,
+  deleted_at timestamp with time zone default now() not null
+);
+
+create index if not exists expense_tombstones_project_deleted_at_idx
+  on expense_tombstones (project_id, deleted_at);
+
+alter table expense_tombstones enable row level security;
+
+drop policy if exists "Members can view project tombstones" on expense_tombstones;
+
+-- Read-only for clients, rows are only written by the trigger below
+create policy "Members can view project tombstones" on expense_tombstones
+  for select using (
+    project_id in (select accessible_project_ids())
+  );
+
+-- A row moved to another project is gone from the old one as well
+create or replace function public.handle_expense_tombstone()
+returns trigger as $$
+begin
+  if old.project_id is null then
+    return null;
+  end if;
+
+  if tg_op = 'DELETE' or old.project_id is distinct from new.project_id then
+    insert into expense_tombstones (id, project_id, deleted_at)
+    values (old.id, old.project_id, now())
+    on conflict (id) do update
+      set project_id = excluded.project_id, deleted_at = excluded.deleted_at;
+  end if;
+
+  return null;
+end;
+$$ language plpgsql security definer set search_path = public;
+
+drop trigger if exists on_expense_tombstone on expenses;
+create trigger on_expense_tombstone
+  after update of project_id or delete on expenses
+  for each row execute procedure public.handle_expense_tombstone();
+
+-- Open project pages learn about deletes from here: unlike DELETE events on expenses,
+-- tombstone inserts can be filtered by project and are checked against the policy above
+do $$
+begin
+  if not exists (
+    select 1 from pg_publication_tables
+    where pubname = 'supabase_realtime'
+    and schemaname = 'public'
+    and tablename = 'expense_tombstones'
+  ) then
+    alter publication supabase_realtime add table expense_tombstones;
+  end if;
+end $$;
+
+-- Tombstones are only needed until every device has synced past them.
+-- Devices that were offline for longer than this start over (see reset below).
+create or replace function purge_expense_tombstones(retention interval default interval '90 days')
+returns integer as $$
+  with purged as (
+    delete from expense_tombstones
+    where deleted_at < now() - retention
+    returning 1
+  )
+  select count(*)::integer from purged;
+$$ language sql;
+
+revoke execute on function purge_expense_tombstones(interval) from public, anon, authenticated;
+
+-- 3. CHANGES SINCE A WATERMARK
+-- Returns { expenses: columnar (see encode_expense_page), deleted: [ids], watermark, reset }.
+-- The watermark trails the current time by a minute: updated_at is stamped when a transaction
+-- starts, so a slow transaction can commit rows older than the newest row already visible.
+-- Re-sending that minute next time is harmless, rows are upserted by id.
+-- since = null, or a watermark older than the tombstone retention, returns no rows and
+-- reset = true: the caller drops its cache and loads the project from scratch.
+create or replace function get_expense_changes(target_project_id uuid, since timestamp with time zone default null)
+returns json as $$
+  with params as (
+    select
+      since is null or since < now() - interval '90 days' as reset,
+      now() - interval '1 minute' as watermark
+  )
+  select json_build_object(
+    'expenses', encode_expense_page(array(
+      select e.id
+      from expenses e, params p
+      where not p.reset
+      and e.project_id = target_project_id
+      and e.updated_at > since
+      order by e.date desc, e.created_at desc, e.id desc
+    )),
+    'deleted', coalesce(array(
+      select t.id
+      from expense_tombstones t, params p
+      where not p.reset
+      and t.project_id = target_project_id
+      and t.deleted_at > since
+      -- A row deleted and re-created (same id) since then is alive
+      and not exists (select 1 from expenses e where e.id = t.id and e.project_id = target_project_id)
+    ), '{}'),
+    -- Never behind what the caller already had
+    'watermark', (select greatest(since, watermark) from params),
+    'reset', (select reset from params)
+  );
+$$ language sql stable;
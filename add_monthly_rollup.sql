@@ -0,0 +1,114 @@
+-- Monthly rollup of expenses per project, month, category, sub category and source.
+-- Kept up to date by a trigger on expenses, so the project page, the monthly history
+-- chart and the AI target can read totals without downloading the whole history.
+-- Run through migrate.py.
+
+create table if not exists expense_monthly_rollup (
+  project_id uuid references projects(id) on delete cascade not null,
+  month date not null, -- first day of the month
+  category text not null,
+  sub_category text not null default '', -- '' when the expense has no sub category
+  source text not null default 'Balance', -- null sources are counted as 'Balance'
+  total numeric not null default 0,
+  row_count integer not null default 0,
+  primary key (project_id, month, category, sub_category, source)
+);
+
+alter table expense_monthly_rollup enable row level security;
+
+drop policy if exists "Members can view project rollups" on expense_monthly_rollup;
+
+-- Read-only for clients, rows are only written by the trigger below
+create policy "Members can view project rollups" on expense_monthly_rollup
+  for select using (
+    check_project_access(project_id)
+  );
+
+-- Add (or subtract) one expense from its rollup bucket
+create or replace function apply_expense_rollup_delta(
+  target_project_id uuid,
+  expense_date date,
+  expense_category text,
+  expense_sub_category text,
+  expense_source text,
+  delta_amount numeric,
+  delta_count integer
+)
+returns void as $$
+declare
+  remaining integer;
+begin
+  if target_project_id is null then
+    return;
+  end if;
+
+  insert into expense_monthly_rollup as r (project_id, month, category, sub_category, source, total, row_count)
+  values (
+    target_project_id,
+    date_trunc('month', expense_date)::date,
+    expense_category,
+    coalesce(expense_sub_category, ''),
+    coalesce(expense_source, 'Balance'),
+    delta_amount,
+    delta_count
+  )
+  on conflict (project_id, month, category, sub_category, source) do update
+    set total = r.total + excluded.total,
+        row_count = r.row_count + excluded.row_count
+  returning r.row_count into remaining;
+
+  -- Drop empty buckets so the month list only shows months that still have entries
+  if remaining <= 0 then
+    delete from expense_monthly_rollup
+    where project_id = target_project_id
+      and month = date_trunc('month', expense_date)::date
+      and category = expense_category
+      and sub_category = coalesce(expense_sub_category, '')
+      and source = coalesce(expense_source, 'Balance');
+  end if;
+end;
+$$ language plpgsql security definer set search_path = public;
+
+-- Only the trigger below may write rollups, never a client through rpc()
+revoke execute on function apply_expense_rollup_delta(uuid, date, text, text, text, numeric, integer) from public, anon, authenticated;
+
+create or replace function public.handle_expense_rollup()
+returns trigger as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    perform apply_expense_rollup_delta(old.project_id, old.date, old.category, old.sub_category, old.source, -old.amount, -1);
+  end if;
+
+  if tg_op in ('INSERT', 'UPDATE') then
+    perform apply_expense_rollup_delta(new.project_id, new.date, new.category, new.sub_category, new.source, new.amount, 1);
+  end if;
+
+  return null;
+end;
+$$ language plpgsql security definer set search_path = public;
+
+revoke execute on function public.handle_expense_rollup() from public, anon, authenticated;
+
+drop trigger if exists on_expense_rollup on expenses;
+create trigger on_expense_rollup
+  after insert or update or delete on expenses
+  for each row execute procedure public.handle_expense_rollup();
+
+-- Backfill from existing data. The lock keeps new expenses from slipping in between
+-- the rebuild and the trigger taking over.
+lock table expenses in share row exclusive mode;
+
+delete from expense_monthly_rollup;
+
+insert into expense_monthly_rollup (project_id, month, category, sub_category, source, total, row_count)
+select
+  project_id,
+  date_trunc('month', date)::date,
+  category,
+  coalesce(sub_category, ''),
+  coalesce(source, 'Balance'),
+  sum(amount),
+  count(*)
+from expenses
+where project_id is not null
+group by 1, 2, 3, 4, 5;
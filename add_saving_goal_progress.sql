@@ -0,0 +1,136 @@
+-- Saving goal progress kept in saving_goals.current_amount by triggers on expenses,
+-- so the dashboard reads one number per goal instead of scanning the Saving history.
+-- A goal's progress is the net of every Saving expense on its sub category, including
+-- negative "Cover for:" withdrawals.
+--
+-- Requires add_monthly_rollup.sql and optimize_project_access.sql.
+-- Run through migrate.py.
+
+-- 1. TABLE (older projects created it by hand)
+create table if not exists saving_goals (
+  id uuid default gen_random_uuid() primary key,
+  project_id uuid references projects(id) on delete cascade not null,
+  name text not null,
+  sub_category text not null,
+  target_amount numeric not null,
+  current_amount numeric not null default 0,
+  created_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+create index if not exists saving_goals_project_sub_category_idx
+  on saving_goals (project_id, sub_category);
+
+alter table saving_goals enable row level security;
+
+drop policy if exists "Members can view saving goals" on saving_goals;
+drop policy if exists "Members can insert saving goals" on saving_goals;
+drop policy if exists "Members can update saving goals" on saving_goals;
+drop policy if exists "Members can delete saving goals" on saving_goals;
+
+create policy "Members can view saving goals" on saving_goals
+  for select using (
+    project_id in (select accessible_project_ids())
+  );
+
+create policy "Members can insert saving goals" on saving_goals
+  for insert with check (
+    project_id in (select accessible_project_ids())
+  );
+
+create policy "Members can update saving goals" on saving_goals
+  for update using (
+    project_id in (select accessible_project_ids())
+  );
+
+create policy "Members can delete saving goals" on saving_goals
+  for delete using (
+    project_id in (select accessible_project_ids())
+  );
+
+-- current_amount is only written by the triggers below
+revoke update on saving_goals from anon, authenticated;
+grant update (name, sub_category, target_amount) on saving_goals to authenticated;
+
+-- 2. NEW OR RE-TARGETED GOALS start from the monthly rollup
+create or replace function public.handle_saving_goal_target()
+returns trigger as $$
+begin
+  select coalesce(sum(total), 0) into new.current_amount
+  from expense_monthly_rollup
+  where project_id = new.project_id
+    and category = 'Saving'
+    and sub_category = new.sub_category;
+
+  return new;
+end;
+$$ language plpgsql security definer set search_path = public;
+
+drop trigger if exists on_saving_goal_target on saving_goals;
+create trigger on_saving_goal_target
+  before insert or update of project_id, sub_category on saving_goals
+  for each row execute procedure public.handle_saving_goal_target();
+
+-- 3. EXPENSE CHANGES move every goal on the affected sub category
+create or replace function public.handle_saving_goal_progress()
+returns trigger as $$
+begin
+  -- Edits that leave the amount, category and sub category alone change nothing
+  if tg_op = 'UPDATE'
+    and old.project_id is not distinct from new.project_id
+    and old.category = new.category
+    and old.sub_category is not distinct from new.sub_category
+    and old.amount = new.amount then
+    return null;
+  end if;
+
+  if tg_op in ('UPDATE', 'DELETE') and old.category = 'Saving' then
+    update saving_goals
+    set current_amount = current_amount - old.amount
+    where project_id = old.project_id and sub_category = old.sub_category;
+  end if;
+
+  if tg_op in ('INSERT', 'UPDATE') and new.category = 'Saving' then
+    update saving_goals
+    set current_amount = current_amount + new.amount
+    where project_id = new.project_id and sub_category = new.sub_category;
+  end if;
+
+  return null;
+end;
+$$ language plpgsql security definer set search_path = public;
+
+drop trigger if exists on_expense_saving_goal on expenses;
+create trigger on_expense_saving_goal
+  after insert or update or delete on expenses
+  for each row execute procedure public.handle_saving_goal_progress();
+
+-- 4. RECONCILE from the expenses themselves (reconcile_saving_goals.py).
+-- Returns how many goals were off.
+create or replace function reconcile_saving_goals(target_project_id uuid default null)
+returns integer as $$
+  with actual as (
+    select g.id, coalesce(sum(e.amount), 0) as amount
+    from saving_goals g
+    left join expenses e
+      on e.project_id = g.project_id
+      and e.category = 'Saving'
+      and e.sub_category = g.sub_category
+    where target_project_id is null or g.project_id = target_project_id
+    group by g.id
+  ),
+  fixed as (
+    update saving_goals g
+    set current_amount = a.amount
+    from actual a
+    where g.id = a.id and g.current_amount is distinct from a.amount
+    returning 1
+  )
+  select count(*)::integer from fixed;
+$$ language sql;
+
+revoke execute on function reconcile_saving_goals(uuid) from public, anon, authenticated;
+
+-- Backfill. The lock keeps new expenses from slipping in between the rebuild and the trigger taking over.
+lock table expenses in share row exclusive mode;
+
+select reconcile_saving_goals();
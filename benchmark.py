@@ -0,0 +1,433 @@
+"""Seed a local Postgres with synthetic projects and benchmark the app's data paths.
+
+Loads the schema the same way a Supabase project gets it (supabase_setup.sql, then
+the rest of migrate.py's MIGRATIONS) on top of a small emulation of what Supabase
+provides (auth.users, auth.uid(), the anon/authenticated roles, the realtime
+publication). It then generates projects with several members, years of history,
+the DEFAULT_SUB_CATEGORIES mix from ExpenseForm.tsx, credit-card rows and
+"Cover for:" Saving rows. Every query runs as a signed-in member, so RLS is
+part of what is measured.
+
+    BENCH_DATABASE_URL=postgresql://postgres@localhost/lsp_bench \\
+        python benchmark.py --reset [--projects 20 --members 3 --years 3 --per-day 6] \\
+        [--iterations 50] [--output benchmark-results.json] [--compare previous.json]
+
+--reset drops and recreates the public and auth schemas, so point it at a throwaway
+database. Results are written as JSON (p50/p95/p99 latency and rows/s per case);
+--compare exits with status 1 when a case got slower than --threshold percent.
+
+Requires psycopg2 (see db.py).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import urlparse
+
+from psycopg2.extras import execute_values
+
+from db import as_user, connect
+from import_statements import CsvStream, load_vocabulary
+from migrate import migrate
+
+# The parts of a Supabase project the schema files take for granted
+SUPABASE_EMULATION = """
+    create schema if not exists auth;
+
+    create table if not exists auth.users (
+      id uuid default gen_random_uuid() primary key,
+      email text,
+      raw_user_meta_data jsonb default '{}'::jsonb,
+      created_at timestamp with time zone default now()
+    );
+
+    create or replace function auth.uid()
+    returns uuid as $$
+      select nullif(current_setting('request.jwt.claims', true)::json->>'sub', '')::uuid;
+    $$ language sql stable;
+
+    do $$
+    begin
+      if not exists (select 1 from pg_roles where rolname = 'anon') then
+        create role anon nologin;
+      end if;
+      if not exists (select 1 from pg_roles where rolname = 'authenticated') then
+        create role authenticated nologin;
+      end if;
+      if not exists (select 1 from pg_publication where pubname = 'supabase_realtime') then
+        create publication supabase_realtime;
+      end if;
+    end $$;
+
+    grant usage on schema public, auth to anon, authenticated;
+    grant execute on function auth.uid() to anon, authenticated;
+    alter default privileges in schema public grant all on tables to anon, authenticated;
+    alter default privileges in schema public grant all on sequences to anon, authenticated;
+    alter default privileges in schema public grant execute on functions to anon, authenticated;
+"""
+
+# Category mix of generated rows; Income is added separately as a monthly salary
+CATEGORY_WEIGHTS = {'Living': 0.6, 'Playing': 0.28, 'Saving': 0.12}
+
+AMOUNT_RANGES = {
+    'Living': (10000, 400000),
+    'Playing': (20000, 1500000),
+    'Saving': (100000, 3000000),
+}
+
+DESCRIPTION_WORDS = [
+    'pagi', 'siang', 'malam', 'kantor', 'rumah', 'teman', 'keluarga', 'mingguan', 'bulanan',
+    'promo', 'diskon', 'online', 'mall', 'dekat kos', 'weekend', 'ulang tahun',
+]
+
+EXPENSE_COLUMNS = [
+    'id', 'project_id', 'user_id', 'date', 'created_at', 'amount', 'category', 'sub_category',
+    'source', 'description',
+]
+
+
+def check_local(dsn, allow_remote):
+    host = urlparse(dsn).hostname if '://' in dsn else None
+    if host not in (None, '', 'localhost', '127.0.0.1', '::1') and not allow_remote:
+        raise SystemExit(f'Refusing to reset a database on {host}; pass --allow-remote if you mean it')
+
+
+def load_schema(conn):
+    with conn, conn.cursor() as cur:
+        cur.execute('drop schema if exists public cascade')
+        cur.execute('drop schema if exists auth cascade')
+        cur.execute('create schema public')
+        cur.execute('grant usage, create on schema public to public')
+        cur.execute(SUPABASE_EMULATION)
+
+    migrate(conn)
+
+
+def expense_rows(rng, vocabulary, project_id, member_ids, start, end, per_day):
+    """Yield one project's history in EXPENSE_COLUMNS order."""
+    categories = list(CATEGORY_WEIGHTS)
+    weights = list(CATEGORY_WEIGHTS.values())
+
+    def row(day, user_id, amount, category, sub_category, source, description):
+        created = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(seconds=rng.randrange(86400))
+        return (str(uuid.UUID(int=rng.getrandbits(128), version=4)), project_id, user_id, day, created,
+                amount, category, sub_category, source, description)
+
+    day = start
+    while day <= end:
+        if day.day == 25:
+            for user_id in member_ids:
+                amount = rng.randrange(6000000, 25000000, 50000)
+                yield row(day, user_id, amount, 'Income', 'Gaji', 'Balance', 'Gaji bulanan')
+
+        for _ in range(rng.randint(0, per_day * 2)):
+            category = rng.choices(categories, weights)[0]
+            sub_category = rng.choice(vocabulary[category])
+            low, high = AMOUNT_RANGES[category]
+            amount = rng.randrange(low, high, 500)
+            user_id = rng.choice(member_ids)
+            description = f'{sub_category} {rng.choice(DESCRIPTION_WORDS)}'
+
+            roll = rng.random()
+            source = 'Credit Card' if roll < 0.1 else 'Saving' if roll < 0.15 and category != 'Saving' else 'Balance'
+            yield row(day, user_id, amount, category, sub_category, source, description)
+
+            if source == 'Saving':
+                # Same offset row the app adds when an expense is paid from Saving (source left to its default)
+                yield row(day, user_id, -amount, 'Saving', 'Lainnya', 'Balance', f'Cover for: {description}')
+
+        day += timedelta(days=1)
+
+
+def seed(conn, args):
+    rng = random.Random(args.seed)
+    vocabulary = load_vocabulary()
+    end = date.today()
+    start = end.replace(year=end.year - args.years)
+
+    users = []
+    projects = []
+    shared_user = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    with conn, conn.cursor() as cur:
+        for p in range(args.projects):
+            project_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            member_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(args.members)]
+            users += [(m, f'user{p}_{i}@bench.local', json.dumps({'full_name': f'User {p}.{i}', 'username': f'user{p}_{i}'}))
+                      for i, m in enumerate(member_ids)]
+            projects.append((project_id, f'Project {p}', member_ids))
+
+        users.append((shared_user, 'shared@bench.local', json.dumps({'full_name': 'Shared Member', 'username': 'shared'})))
+        execute_values(cur, 'insert into auth.users (id, email, raw_user_meta_data) values %s', users)
+
+        execute_values(cur, 'insert into projects (id, name, owner_id) values %s',
+                       [(pid, name, members[0]) for pid, name, members in projects])
+        execute_values(cur, 'insert into project_members (project_id, user_id, role) values %s', [
+            (pid, m, 'owner' if i == 0 else 'member')
+            for pid, _, members in projects
+            for i, m in enumerate(members + [shared_user])
+        ])
+        execute_values(cur, 'insert into saving_goals (project_id, name, sub_category, target_amount) values %s', [
+            (pid, goal, sub, target)
+            for pid, _, _ in projects
+            for goal, sub, target in (('Dana Darurat', 'Darurat', 30000000), ('Investasi', 'Investasi', 100000000))
+        ])
+
+    started = time.perf_counter()
+    total = 0
+    for pid, _, members in projects:
+        # Uneven activity, so the largest project is noticeably larger than the rest
+        per_day = max(1, round(args.per_day * (0.5 + rng.random())))
+        rows = list(expense_rows(rng, vocabulary, pid, members, start, end, per_day))
+        with conn, conn.cursor() as cur:
+            cur.copy_expert(
+                f"copy expenses ({', '.join(EXPENSE_COLUMNS)}) from stdin with (format csv)",
+                CsvStream(iter(rows)),
+            )
+        total += len(rows)
+        print(f'  {pid}: {len(rows)} expenses', file=sys.stderr)
+
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute('vacuum analyze')
+    conn.autocommit = False
+
+    seconds = time.perf_counter() - started
+    print(f'Seeded {total} expenses in {seconds:.1f}s ({total / seconds:.0f} rows/s, triggers included)', file=sys.stderr)
+    return {'projects': len(projects), 'expenses': total, 'seed_seconds': round(seconds, 2)}
+
+
+def pick_subjects(conn):
+    """The largest project, its owner and the member that belongs to every project."""
+    with conn, conn.cursor() as cur:
+        cur.execute("""
+            select e.project_id, p.owner_id, count(*)
+            from expenses e join projects p on p.id = e.project_id
+            group by 1, 2 order by 3 desc limit 1
+        """)
+        project_id, owner_id, rows = cur.fetchone()
+        cur.execute("select id from auth.users where email = 'shared@bench.local'")
+        shared_user = cur.fetchone()[0]
+    return {'project_id': project_id, 'owner_id': owner_id, 'shared_user': shared_user, 'project_rows': rows}
+
+
+def json_rows(key=None):
+    def count(result):
+        value = result[0][0]
+        if key:
+            value = value[key]
+        return len(value['id']) if isinstance(value, dict) and 'id' in value else len(value or [])
+    return count
+
+
+def benchmark_cases(subjects):
+    today = date.today()
+    month_start = today.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    p = {
+        'project_id': subjects['project_id'],
+        'from': month_start,
+        'to': next_month,
+        'month': month_start,
+        'since': datetime.now(timezone.utc) - timedelta(days=1),
+    }
+    owner = subjects['owner_id']
+    shared = subjects['shared_user']
+
+    # (name, user (None = table owner, no RLS), sql, params, row counter)
+    return [
+        ('expense_page_month', owner,
+         'select get_expense_page(%(project_id)s, %(from)s, %(to)s, null, null, null, 500)', p, json_rows()),
+        ('project_bootstrap', owner,
+         'select get_project_bootstrap(%(project_id)s, %(month)s, 500)', p, json_rows('expenses')),
+        ('home_bootstrap', shared, 'select get_home_bootstrap()', p, json_rows('projects')),
+        ('project_details_view', shared, 'select * from project_details_view where is_member > 0', p, len),
+        ('rls_expense_count', owner,
+         'select count(*) from expenses where project_id = %(project_id)s', p, lambda r: r[0][0]),
+        ('no_rls_expense_count', None,
+         'select count(*) from expenses where project_id = %(project_id)s', p, lambda r: r[0][0]),
+        ('check_project_access_per_row', owner,
+         'select count(*) from expenses where check_project_access(project_id)', p, lambda r: r[0][0]),
+        ('rollup_fetch', owner,
+         'select * from expense_monthly_rollup where project_id = %(project_id)s', p, len),
+        ('month_totals_from_expenses', owner, """
+            select date_trunc('month', date), category, sum(amount)
+            from expenses where project_id = %(project_id)s
+            group by 1, 2
+         """, p, len),
+        ('search_expenses', owner,
+         "select search_expenses(%(project_id)s, 'makan', '{}'::jsonb, null, 100)", p, json_rows('page')),
+        ('expense_changes_1d', owner,
+         'select get_expense_changes(%(project_id)s, %(since)s)', p, json_rows('expenses')),
+    ]
+
+
+def run_query(conn, user, sql, params):
+    with conn, conn.cursor() as cur:
+        if user:
+            with as_user(conn, user):
+                started = time.perf_counter()
+                cur.execute(sql, params)
+                result = cur.fetchall()
+        else:
+            started = time.perf_counter()
+            cur.execute(sql, params)
+            result = cur.fetchall()
+        return time.perf_counter() - started, result
+
+
+def summarize(timings, rows):
+    if len(timings) >= 2:
+        q = statistics.quantiles(timings, n=100, method='inclusive')
+        p50, p95, p99 = q[49], q[94], q[98]
+    else:
+        p50 = p95 = p99 = timings[0]
+    mean = statistics.fmean(timings)
+    return {
+        'iterations': len(timings),
+        'rows': rows,
+        'p50_ms': round(p50 * 1000, 3),
+        'p95_ms': round(p95 * 1000, 3),
+        'p99_ms': round(p99 * 1000, 3),
+        'mean_ms': round(mean * 1000, 3),
+        'rows_per_s': round(rows / mean, 1) if mean > 0 else None,
+    }
+
+
+def run_history_scan(conn, subjects, iterations):
+    """Page through the whole project history the way All Time does; latency is per page."""
+    timings = []
+    rows = 0
+    for _ in range(iterations):
+        cursor = (None, None, None)
+        while True:
+            seconds, result = run_query(conn, subjects['owner_id'], """
+                select get_expense_page(%s, null, null, %s, %s, %s, 500)
+            """, (subjects['project_id'], *cursor))
+            timings.append(seconds)
+            page = result[0][0]
+            rows += len(page['id'])
+            if len(page['id']) < 500:
+                break
+            cursor = (page['date'][-1], page['created_at'][-1], page['id'][-1])
+    summary = summarize(timings, rows // iterations)
+    summary['rows_per_s'] = round(rows / sum(timings), 1)
+    return summary
+
+
+def run_benchmarks(conn, subjects, iterations, warmup):
+    results = {}
+    for name, user, sql, params, count in benchmark_cases(subjects):
+        for _ in range(warmup):
+            run_query(conn, user, sql, params)
+        timings = []
+        rows = 0
+        for _ in range(iterations):
+            seconds, result = run_query(conn, user, sql, params)
+            timings.append(seconds)
+            rows = count(result)
+        results[name] = summarize(timings, rows)
+        print(f"  {name:30} p50 {results[name]['p50_ms']:9.2f} ms  p99 {results[name]['p99_ms']:9.2f} ms  {rows} rows",
+              file=sys.stderr)
+
+    results['expense_history_scan'] = run_history_scan(conn, subjects, max(1, iterations // 10))
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or not before.get('p50_ms'):
+            continue
+        change = (current['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+        marker = 'REGRESSION' if change > threshold else ''
+        print(f'  {name:30} {before["p50_ms"]:9.2f} -> {current["p50_ms"]:9.2f} ms  {change:+6.1f}% {marker}')
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a local database and benchmark the expense queries.')
+    parser.add_argument('--dsn', default=os.environ.get('BENCH_DATABASE_URL') or os.environ.get('DATABASE_URL'))
+    parser.add_argument('--reset', action='store_true', help='drop and reload the schema, then seed')
+    parser.add_argument('--allow-remote', action='store_true')
+    parser.add_argument('--projects', type=int, default=20)
+    parser.add_argument('--members', type=int, default=3)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--per-day', type=int, default=6, help='average transactions per project per day')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=20.0, help='allowed p50 slowdown in percent')
+    args = parser.parse_args()
+
+    if not args.dsn:
+        raise SystemExit('Set BENCH_DATABASE_URL (or pass --dsn)')
+
+    conn = connect(args.dsn)
+    try:
+        dataset = None
+        if args.reset:
+            check_local(args.dsn, args.allow_remote)
+            print('Loading schema', file=sys.stderr)
+            load_schema(conn)
+            print('Seeding', file=sys.stderr)
+            dataset = seed(conn, args)
+
+        subjects = pick_subjects(conn)
+        print('Running benchmarks', file=sys.stderr)
+        results = run_benchmarks(conn, subjects, args.iterations, args.warmup)
+
+        with conn, conn.cursor() as cur:
+            cur.execute('show server_version')
+            server_version = cur.fetchone()[0]
+    finally:
+        conn.close()
+
+    report = {
+        'meta': {
+            'run_at': datetime.now(timezone.utc).isoformat(),
+            'commit': git_commit(),
+            'postgres': server_version,
+            'python': platform.python_version(),
+            'iterations': args.iterations,
+            'dataset': dataset,  # None when benchmarking an already seeded database
+            'params': {k: getattr(args, k) for k in ('projects', 'members', 'years', 'per_day', 'seed')},
+            'largest_project_rows': subjects['project_rows'],
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f'Results written to {args.output}', file=sys.stderr)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
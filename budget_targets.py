@@ -0,0 +1,156 @@
+"""Compute the "AI Target" budget for every project in one batch.
+
+Same Historical Average Smoothing as budgetLimitFromRollup in src/lib/rollup.ts
+(see AI_BUDGETING_LOGIC.md): Living + Playing totals per month, the current month
+left out, the remaining months averaged, Rp 5.000.000 when there is nothing to
+average. Results go to project_budget_targets (add_budget_targets.sql). Projects
+without any expenses get no row, so the page falls back to the client's 0 for them
+as well.
+
+Monthly totals come from expense_monthly_rollup, which already holds one row per
+project, month and category, so the job never reads individual expenses. By default
+only projects whose closed-month totals changed since the last run (or whose row
+was computed in an earlier month) are recomputed.
+
+    python budget_targets.py [--full] [--project <uuid> ...] [--dry-run]
+
+Requires psycopg2, pandas and numpy.
+"""
+
+import argparse
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from db import connect
+
+COLD_START_BUDGET = 5000000
+
+# Per project: md5 over its closed-month Living/Playing totals, plus what the last run saw
+CHANGED_QUERY = """
+    with closed as (
+      select
+        p.id as project_id,
+        coalesce(md5(string_agg(m.month || ':' || m.total, ',' order by m.month)), '') as checksum
+      from projects p
+      left join lateral (
+        select r.month, sum(r.total) as total
+        from expense_monthly_rollup r
+        where r.project_id = p.id
+          and r.category in ('Living', 'Playing')
+          and r.month <> %(current_month)s
+        group by r.month
+      ) m on true
+      where (%(project_ids)s::uuid[] is null or p.id = any(%(project_ids)s::uuid[]))
+        -- budgetLimitFromRollup returns 0 for an empty rollup, not the cold-start budget
+        and exists (select 1 from expense_monthly_rollup r where r.project_id = p.id)
+      group by p.id
+    )
+    select c.project_id, c.checksum
+    from closed c
+    left join project_budget_targets t on t.project_id = c.project_id
+    where %(full)s
+      or t.project_id is null
+      or t.computed_for_month <> %(current_month)s
+      or t.source_checksum <> c.checksum
+"""
+
+TOTALS_QUERY = """
+    select r.project_id, r.month, r.total
+    from expense_monthly_rollup r
+    where r.project_id = any(%(project_ids)s::uuid[])
+      and r.category in ('Living', 'Playing')
+      and r.month <> %(current_month)s
+"""
+
+# Targets of projects whose expenses have all been deleted since
+DELETE_EMPTY_QUERY = """
+    delete from project_budget_targets t
+    where (%(project_ids)s::uuid[] is null or t.project_id = any(%(project_ids)s::uuid[]))
+      and not exists (select 1 from expense_monthly_rollup r where r.project_id = t.project_id)
+"""
+
+UPSERT_QUERY = """
+    insert into project_budget_targets
+      (project_id, budget_limit, month_count, computed_for_month, source_checksum, computed_at)
+    values %s
+    on conflict (project_id) do update
+      set budget_limit = excluded.budget_limit,
+          month_count = excluded.month_count,
+          computed_for_month = excluded.computed_for_month,
+          source_checksum = excluded.source_checksum,
+          computed_at = excluded.computed_at
+"""
+
+
+def compute_targets(totals, project_ids):
+    """Budget target and closed-month count per project, indexed by project_id.
+
+    `totals` has one row per rollup bucket (project_id, month, total); projects in
+    `project_ids` without any closed month get the cold-start budget.
+    """
+    monthly = totals.groupby(['project_id', 'month'], sort=False)['total'].sum()
+    per_project = monthly.groupby(level='project_id').agg(['mean', 'size'])
+
+    result = per_project.reindex(pd.Index(project_ids, name='project_id'))
+    month_count = result['size'].fillna(0).astype(np.int64)
+    # Math.round in the client rounds halves up, np.round would round them to even
+    budget = np.floor(result['mean'].to_numpy(dtype=np.float64) + 0.5)
+    budget = np.where(month_count.to_numpy() > 0, budget, COLD_START_BUDGET)
+
+    return pd.DataFrame({'budget_limit': budget.astype(np.int64), 'month_count': month_count}, index=result.index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute project budget targets.')
+    parser.add_argument('--full', action='store_true', help='recompute every project, changed or not')
+    parser.add_argument('--project', action='append', help='only these projects')
+    parser.add_argument('--dry-run', action='store_true', help='print the targets instead of saving them')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    current_month = date.today().replace(day=1)
+    conn = connect()
+    try:
+        with conn, conn.cursor() as cur:
+            if not args.dry_run:
+                cur.execute(DELETE_EMPTY_QUERY, {'project_ids': args.project})
+                if cur.rowcount:
+                    print(f'{cur.rowcount} budget targets of empty projects removed')
+
+            cur.execute(CHANGED_QUERY, {
+                'current_month': current_month,
+                'project_ids': args.project,
+                'full': args.full,
+            })
+            checksums = dict(cur.fetchall())
+            if not checksums:
+                print('All budget targets are up to date')
+                return
+
+            project_ids = list(checksums)
+            cur.execute(TOTALS_QUERY, {'project_ids': project_ids, 'current_month': current_month})
+            totals = pd.DataFrame(cur.fetchall(), columns=['project_id', 'month', 'total'])
+            totals['total'] = totals['total'].astype(np.float64)
+
+            targets = compute_targets(totals, project_ids)
+
+            if args.dry_run:
+                print(targets.to_string())
+                return
+
+            execute_values(cur, UPSERT_QUERY, [
+                (project_id, int(row.budget_limit), int(row.month_count), current_month, checksums[project_id])
+                for project_id, row in zip(targets.index, targets.itertuples(index=False))
+            ], template='(%s, %s, %s, %s, %s, now())', page_size=1000)
+    finally:
+        conn.close()
+
+    print(f'{len(targets)} budget targets updated in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""Apply declarative source patch sets to the app, all files at once or not at all.
+
+A patch set is a Python module in codemods/ with a PATCHES list of Patch entries:
+the file (relative to this folder, whatever the working directory), the exact text
+to find (anchor), what to put there, and how many times the anchor must occur.
+Every file is patched in a single scan that matches all of its anchors together;
+files are processed in parallel. When any anchor is missing or occurs a different
+number of times than expected, nothing is written. Otherwise the new contents are
+written to temporary files first and moved into place, and a failure while moving
+puts back the files already replaced.
+
+A patch whose replacement is already there (and whose anchor is gone) counts as
+applied, so running a patch set twice is harmless. --revert applies each patch's
+inverse: the replacement becomes the anchor and the anchor (or `inverse`) the
+replacement.
+
+    python codemod.py codemods/modify_login.py [--dry-run] [--revert] [--jobs N]
+
+Only needs the standard library.
+"""
+
+import argparse
+import difflib
+import importlib.util
+import os
+import re
+import sys
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class Patch:
+    def __init__(self, file, anchor, replacement, count=1, inverse=None):
+        self.file = file
+        self.anchor = anchor
+        self.replacement = replacement
+        self.count = count  # exact number of occurrences expected
+        self.inverse = inverse  # text to restore on --revert, when it is not simply the anchor
+
+    def inverted(self):
+        return Patch(self.file, self.replacement, self.anchor if self.inverse is None else self.inverse, self.count)
+
+    def label(self):
+        first_line = self.anchor.strip().splitlines()[0] if self.anchor.strip() else repr(self.anchor)
+        return first_line[:60]
+
+
+class PatchError(Exception):
+    pass
+
+
+def load_patch_set(path):
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.PATCHES
+
+
+def patch_text(path, text, patches):
+    """Apply `patches` to `text` in one scan; returns (new text, applied, skipped) or raises PatchError."""
+    by_anchor = {}
+    for patch in patches:
+        if not patch.anchor:
+            raise PatchError(f'{path}: empty anchor')
+        if patch.anchor in by_anchor:
+            raise PatchError(f'{path}: two patches share the anchor "{patch.label()}"')
+        by_anchor[patch.anchor] = patch
+
+    # Longest first, so of two anchors starting at the same place the more specific one wins
+    matcher = re.compile('|'.join(re.escape(a) for a in sorted(by_anchor, key=len, reverse=True)))
+    matches = list(matcher.finditer(text))
+    found = defaultdict(int)
+    for m in matches:
+        found[m.group()] += 1
+
+    pending = set()
+    skipped = 0
+    problems = []
+    for anchor, patch in by_anchor.items():
+        already = text.count(patch.replacement) == patch.count
+        if found[anchor] == patch.count and not (already and patch.anchor in patch.replacement):
+            pending.add(anchor)
+        elif already and (found[anchor] == 0 or patch.anchor in patch.replacement):
+            skipped += 1
+        elif found[anchor] == 0:
+            problems.append(f'{path}: anchor not found: "{patch.label()}"')
+        else:
+            problems.append(f'{path}: anchor found {found[anchor]} times, expected {patch.count}: "{patch.label()}"')
+    if problems:
+        raise PatchError('\n'.join(problems))
+
+    pieces = []
+    position = 0
+    for m in matches:
+        if m.group() not in pending:
+            continue
+        pieces.append(text[position:m.start()])
+        pieces.append(by_anchor[m.group()].replacement)
+        position = m.end()
+    pieces.append(text[position:])
+
+    return ''.join(pieces), len(pending), skipped
+
+
+def patch_file(path, patches):
+    """Worker: read and patch one file. Returns (path, old, new, applied, skipped, error)."""
+    try:
+        with open(os.path.join(ROOT, path), 'r', encoding='utf-8', newline='') as f:
+            old = f.read()
+    except OSError as e:
+        return path, None, None, 0, 0, f'{path}: {e.strerror}'
+
+    try:
+        new, applied, skipped = patch_text(path, old, patches)
+    except PatchError as e:
+        return path, old, None, 0, 0, str(e)
+    return path, old, new, applied, skipped, None
+
+
+def write_all(results):
+    """Replace every changed file, or none of them."""
+    results = [(os.path.join(ROOT, path), old, new) for path, old, new in results]
+    staged = []
+    try:
+        for path, _, new in results:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.codemod-')
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                f.write(new)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp, os.stat(path).st_mode & 0o777)
+            staged.append((path, tmp))
+    except OSError:
+        for _, tmp in staged:
+            os.unlink(tmp)
+        raise
+
+    replaced = []
+    originals = {path: old for path, old, _ in results}
+    try:
+        for path, tmp in staged:
+            os.replace(tmp, path)
+            replaced.append(path)
+    except OSError:
+        for path in replaced:
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(originals[path])
+        for path, tmp in staged[len(replaced):]:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        raise
+
+
+def run(patch_set_paths, dry_run=False, revert=False, jobs=None):
+    by_file = defaultdict(list)
+    for path in patch_set_paths:
+        for patch in load_patch_set(path):
+            by_file[patch.file].append(patch.inverted() if revert else patch)
+
+    if jobs == 1 or len(by_file) == 1:
+        results = [patch_file(path, patches) for path, patches in by_file.items()]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(patch_file, by_file.keys(), by_file.values()))
+
+    errors = [error for *_, error in results if error]
+    if errors:
+        print('\n'.join(errors), file=sys.stderr)
+        print('Nothing was written.', file=sys.stderr)
+        return False
+
+    changed = [(path, old, new) for path, old, new, *_ in results if new != old]
+    for path, _, _, applied, skipped, _ in results:
+        note = f', {skipped} already applied' if skipped else ''
+        print(f'{path}: {applied} patches{note}', file=sys.stderr)
+
+    if dry_run:
+        for path, old, new in changed:
+            sys.stdout.writelines(difflib.unified_diff(
+                old.splitlines(keepends=True), new.splitlines(keepends=True), f'a/{path}', f'b/{path}'
+            ))
+        return True
+
+    write_all(changed)
+    print(f'{len(changed)} files updated', file=sys.stderr)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply source patch sets atomically.')
+    parser.add_argument('patch_sets', nargs='+', help='modules in codemods/ defining PATCHES')
+    parser.add_argument('--dry-run', action='store_true', help='print a unified diff instead of writing')
+    parser.add_argument('--revert', action='store_true', help='apply the inverse patches')
+    parser.add_argument('--jobs', type=int, help='worker processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    if not run(args.patch_sets, args.dry_run, args.revert, args.jobs):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
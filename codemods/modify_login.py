@@ -0,0 +1,303 @@
+"""Login page: a Forgot Password mode that only asks for the email and sends a reset link.
+
+    python codemod.py codemods/modify_login.py [--dry-run]
+"""
+
+from codemod import Patch
+
+FILE = 'src/app/login/page.tsx'
+
+# 1. isForgotPassword state
+state_old = 'const [isSignUp, setIsSignUp] = useState(false)'
+state_new = """const [isSignUp, setIsSignUp] = useState(false)
+    const [isForgotPassword, setIsForgotPassword] = useState(false)"""
+
+# 2. handleAuth sends the reset email
+handle_auth_old = """        try {
+            if (isSignUp) {"""
+handle_auth_new = """        try {
+            if (isForgotPassword) {
+                const { error } = await supabase.auth.resetPasswordForEmail(email, {
+                    redirectTo: `${window.location.origin}/update-password`,
+                })
+                if (error) {
+                    toast.error(error.message)
+                } else {
+                    toast.success('Password reset link sent to your email')
+                    setIsForgotPassword(false)
+                    setEmail('')
+                }
+                setLoading(false)
+                return
+            }
+
+            if (isSignUp) {"""
+
+# 3. Headers
+header_old = """                        {isSignUp ? (
+                            <UserPlus className="h-6 w-6 text-indigo-600 dark:text-indigo-400" />
+                        ) : (
+                            <LogIn className="h-6 w-6 text-indigo-600 dark:text-indigo-400" />
+                        )}
+                    </div>
+                    <h2 className="text-3xl font-extrabold text-gray-900 dark:text-gray-100">
+                        {isSignUp ? 'Create Account' : 'Welcome Back'}
+                    </h2>
+                    <p className="mt-2 text-sm text-gray-600 dark:text-gray-400">
+                        {isSignUp ? 'Start tracking your financial goals' : 'Sign in to track your finances'}
+                    </p>"""
+header_new = """                        {isForgotPassword ? (
+                            <Mail className="h-6 w-6 text-indigo-600 dark:text-indigo-400" />
+                        ) : isSignUp ? (
+                            <UserPlus className="h-6 w-6 text-indigo-600 dark:text-indigo-400" />
+                        ) : (
+                            <LogIn className="h-6 w-6 text-indigo-600 dark:text-indigo-400" />
+                        )}
+                    </div>
+                    <h2 className="text-3xl font-extrabold text-gray-900 dark:text-gray-100">
+                        {isForgotPassword ? 'Reset Password' : isSignUp ? 'Create Account' : 'Welcome Back'}
+                    </h2>
+                    <p className="mt-2 text-sm text-gray-600 dark:text-gray-400">
+                        {isForgotPassword ? 'Enter your email to receive a reset link' : isSignUp ? 'Start tracking your financial goals' : 'Sign in to track your finances'}
+                    </p>"""
+
+# 4. Full name only on sign up
+full_name_old = '''{isSignUp && (
+                            <div>
+                                <label htmlFor="fullName"'''
+full_name_new = '''{!isForgotPassword && isSignUp && (
+                            <div>
+                                <label htmlFor="fullName"'''
+
+# 5. Username hidden when resetting
+username_old = """                        <div>
+                            <label htmlFor="username" className="block text-sm font-medium text-gray-700 dark:text-gray-300 mb-1">
+                                Username
+                            </label>
+                            <div className="relative">
+                                <div className="absolute inset-y-0 left-0 pl-3 flex items-center pointer-events-none">
+                                    <User className="h-5 w-5 text-gray-400" />
+                                </div>
+                                <input
+                                    id="username"
+                                    name="username"
+                                    type="text"
+                                    autoComplete="username"
+                                    required
+                                    value={username}
+                                    onChange={(e) => setUsername(e.target.value)}
+                                    className="block w-full pl-10 pr-3 py-2 border border-gray-300 dark:border-gray-600 rounded-lg focus:ring-indigo-500 focus:border-indigo-500 bg-white dark:bg-gray-700 text-gray-900 dark:text-gray-100 placeholder-gray-400 focus:outline-none transition-colors sm:text-sm"
+                                    placeholder="johndoe"
+                                />
+                            </div>
+                        </div>
+                    )}"""
+username_new = """                        {!isForgotPassword && (
+                            <div>
+                                <label htmlFor="username" className="block text-sm font-medium text-gray-700 dark:text-gray-300 mb-1">
+                                    Username
+                                </label>
+                                <div className="relative">
+                                    <div className="absolute inset-y-0 left-0 pl-3 flex items-center pointer-events-none">
+                                        <User className="h-5 w-5 text-gray-400" />
+                                    </div>
+                                    <input
+                                        id="username"
+                                        name="username"
+                                        type="text"
+                                        autoComplete="username"
+                                        required={!isForgotPassword}
+                                        value={username}
+                                        onChange={(e) => setUsername(e.target.value)}
+                                        className="block w-full pl-10 pr-3 py-2 border border-gray-300 dark:border-gray-600 rounded-lg focus:ring-indigo-500 focus:border-indigo-500 bg-white dark:bg-gray-700 text-gray-900 dark:text-gray-100 placeholder-gray-400 focus:outline-none transition-colors sm:text-sm"
+                                        placeholder="johndoe"
+                                    />
+                                </div>
+                            </div>
+                        )}
+"""
+
+# 6. Email also asked when resetting
+email_old = """{/* Email only needed for Sign Up */}
+                        {isSignUp && ("""
+email_new = """{/* Email needed for Sign Up and Forgot Password */}
+                        {(isSignUp || isForgotPassword) && ("""
+
+email_required_old = """required={isSignUp}
+                                        value={email}"""
+email_required_new = """required={isSignUp || isForgotPassword}
+                                        value={email}"""
+
+# 7. Password hidden when resetting
+password_old = """                        <div>
+                            <label htmlFor="password" className="block text-sm font-medium text-gray-700 dark:text-gray-300 mb-1">
+                                Password
+                            </label>
+                            <div className="relative">
+                                <div className="absolute inset-y-0 left-0 pl-3 flex items-center pointer-events-none">
+                                    <Lock className="h-5 w-5 text-gray-400" />
+                                </div>
+                                <input
+                                    id="password"
+                                    name="password"
+                                    type={showPassword ? 'text' : 'password'}
+                                    autoComplete={isSignUp ? 'new-password' : 'current-password'}
+                                    required
+                                    value={password}
+                                    onChange={(e) => setPassword(e.target.value)}
+                                    className="block w-full pl-10 pr-10 py-2 border border-gray-300 dark:border-gray-600 rounded-lg focus:ring-indigo-500 focus:border-indigo-500 bg-white dark:bg-gray-700 text-gray-900 dark:text-gray-100 placeholder-gray-400 focus:outline-none transition-colors sm:text-sm"
+                                    placeholder="••••••••"
+                                />
+                                <button
+                                    type="button"
+                                    onClick={() => setShowPassword(!showPassword)}
+                                    className="absolute inset-y-0 right-0 pr-3 flex items-center text-gray-400 hover:text-gray-500 focus:outline-none"
+                                >
+                                    {showPassword ? (
+                                        <EyeOff className="h-5 w-5" aria-hidden="true" />
+                                    ) : (
+                                        <Eye className="h-5 w-5" aria-hidden="true" />
+                                    )}
+                                </button>
+                            </div>
+                        </div>"""
+password_new = """                        {!isForgotPassword && (
+                            <div>
+                                <label htmlFor="password" className="block text-sm font-medium text-gray-700 dark:text-gray-300 mb-1">
+                                    Password
+                                </label>
+                                <div className="relative">
+                                    <div className="absolute inset-y-0 left-0 pl-3 flex items-center pointer-events-none">
+                                        <Lock className="h-5 w-5 text-gray-400" />
+                                    </div>
+                                    <input
+                                        id="password"
+                                        name="password"
+                                        type={showPassword ? 'text' : 'password'}
+                                        autoComplete={isSignUp ? 'new-password' : 'current-password'}
+                                        required={!isForgotPassword}
+                                        value={password}
+                                        onChange={(e) => setPassword(e.target.value)}
+                                        className="block w-full pl-10 pr-10 py-2 border border-gray-300 dark:border-gray-600 rounded-lg focus:ring-indigo-500 focus:border-indigo-500 bg-white dark:bg-gray-700 text-gray-900 dark:text-gray-100 placeholder-gray-400 focus:outline-none transition-colors sm:text-sm"
+                                        placeholder="••••••••"
+                                    />
+                                    <button
+                                        type="button"
+                                        onClick={() => setShowPassword(!showPassword)}
+                                        className="absolute inset-y-0 right-0 pr-3 flex items-center text-gray-400 hover:text-gray-500 focus:outline-none"
+                                    >
+                                        {showPassword ? (
+                                            <EyeOff className="h-5 w-5" aria-hidden="true" />
+                                        ) : (
+                                            <Eye className="h-5 w-5" aria-hidden="true" />
+                                        )}
+                                    </button>
+                                </div>
+                            </div>
+                        )}"""
+
+# 8. Confirm password only on sign up
+confirm_password_old = '''{isSignUp && (
+                            <div>
+                                <label htmlFor="confirmPassword"'''
+confirm_password_new = '''{!isForgotPassword && isSignUp && (
+                            <div>
+                                <label htmlFor="confirmPassword"'''
+
+# 9. Forgot password link and reset buttons
+bottom_old = """                    </div>
+
+                    <div>
+                        <button
+                            type="submit"
+                            disabled={loading}
+                            className="group relative w-full flex justify-center py-2.5 px-4 border border-transparent text-sm font-medium rounded-lg text-white bg-indigo-600 hover:bg-indigo-700 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500 disabled:opacity-70 disabled:cursor-not-allowed transition-all shadow-md hover:shadow-lg"
+                        >
+                            {loading ? (
+                                <Loader2 className="animate-spin h-5 w-5" />
+                            ) : (
+                                isSignUp ? 'Sign Up' : 'Sign In'
+                            )}
+                        </button>
+                    </div>
+                </form>
+
+                <div className="text-center mt-4">
+                    <p className="text-sm text-gray-600 dark:text-gray-400">
+                        {isSignUp ? 'Already have an account? ' : "Don't have an account? "}
+                        <button
+                            onClick={() => setIsSignUp(!isSignUp)}
+                            className="font-medium text-indigo-600 hover:text-indigo-500 dark:text-indigo-400 dark:hover:text-indigo-300 transition-colors"
+                        >
+                            {isSignUp ? 'Sign in' : 'Sign up'}
+                        </button>
+                    </p>
+                </div>"""
+bottom_new = """                    </div>
+
+                    {!isForgotPassword && !isSignUp && (
+                        <div className="flex items-center justify-end mt-2 mb-4">
+                            <button
+                                type="button"
+                                onClick={() => setIsForgotPassword(true)}
+                                className="text-sm font-medium text-indigo-600 hover:text-indigo-500 dark:text-indigo-400 dark:hover:text-indigo-300"
+                            >
+                                Forgot your password?
+                            </button>
+                        </div>
+                    )}
+
+                    <div className={!isForgotPassword && !isSignUp ? "" : "mt-6"}>
+                        <button
+                            type="submit"
+                            disabled={loading}
+                            className="group relative w-full flex justify-center py-2.5 px-4 border border-transparent text-sm font-medium rounded-lg text-white bg-indigo-600 hover:bg-indigo-700 focus:outline-none focus:ring-2 focus:ring-offset-2 focus:ring-indigo-500 disabled:opacity-70 disabled:cursor-not-allowed transition-all shadow-md hover:shadow-lg"
+                        >
+                            {loading ? (
+                                <Loader2 className="animate-spin h-5 w-5" />
+                            ) : (
+                                isForgotPassword ? 'Send Reset Link' : isSignUp ? 'Sign Up' : 'Sign In'
+                            )}
+                        </button>
+                    </div>
+                </form>
+
+                <div className="text-center mt-4">
+                    {isForgotPassword ? (
+                        <p className="text-sm text-gray-600 dark:text-gray-400">
+                            Remember your password?{' '}
+                            <button
+                                onClick={() => setIsForgotPassword(false)}
+                                className="font-medium text-indigo-600 hover:text-indigo-500 dark:text-indigo-400 dark:hover:text-indigo-300 transition-colors"
+                            >
+                                Sign in
+                            </button>
+                        </p>
+                    ) : (
+                        <p className="text-sm text-gray-600 dark:text-gray-400">
+                            {isSignUp ? 'Already have an account? ' : "Don't have an account? "}
+                            <button
+                                onClick={() => {
+                                    setIsSignUp(!isSignUp)
+                                    setIsForgotPassword(false)
+                                }}
+                                className="font-medium text-indigo-600 hover:text-indigo-500 dark:text-indigo-400 dark:hover:text-indigo-300 transition-colors"
+                            >
+                                {isSignUp ? 'Sign in' : 'Sign up'}
+                            </button>
+                        </p>
+                    )}
+                </div>"""
+
+PATCHES = [
+    Patch(FILE, state_old, state_new),
+    Patch(FILE, handle_auth_old, handle_auth_new),
+    Patch(FILE, header_old, header_new),
+    Patch(FILE, full_name_old, full_name_new),
+    Patch(FILE, username_old, username_new),
+    Patch(FILE, email_old, email_new),
+    Patch(FILE, email_required_old, email_required_new),
+    Patch(FILE, password_old, password_new),
+    Patch(FILE, confirm_password_old, confirm_password_new),
+    Patch(FILE, bottom_old, bottom_new),
+]
@@ -0,0 +1,39 @@
+"""Shared Postgres helpers for the maintenance scripts in this folder.
+
+The scripts connect straight to the Supabase Postgres database (not through the
+REST API), using the connection string from the DATABASE_URL environment variable,
+e.g. the "Connection string" shown under Project Settings -> Database.
+
+Requires psycopg2 (pip install psycopg2-binary).
+"""
+
+import json
+import os
+from contextlib import contextmanager
+
+import psycopg2
+
+
+def connect(dsn=None):
+    """Open a connection to DATABASE_URL (or the given DSN)."""
+    dsn = dsn or os.environ.get('DATABASE_URL')
+    if not dsn:
+        raise SystemExit('DATABASE_URL is not set')
+    return psycopg2.connect(dsn)
+
+
+@contextmanager
+def as_user(conn, user_id):
+    """Run the enclosed statements the way PostgREST runs them for a signed-in user.
+
+    Switches to the `authenticated` role and sets the JWT claims read by auth.uid(),
+    so Row Level Security applies exactly as it does for the app. Both settings are
+    transaction-local and are gone once the transaction ends.
+    """
+    with conn.cursor() as cur:
+        cur.execute('set local role authenticated')
+        cur.execute(
+            "select set_config('request.jwt.claims', %s, true)",
+            (json.dumps({'sub': user_id, 'role': 'authenticated'}),),
+        )
+    yield conn
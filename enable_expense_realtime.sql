@@ -0,0 +1,15 @@
+-- Broadcast expense changes so open project pages can apply them as deltas
+-- instead of refetching the whole project after every change.
+-- Run through migrate.py.
+
+do $$
+begin
+  if not exists (
+    select 1 from pg_publication_tables
+    where pubname = 'supabase_realtime'
+    and schemaname = 'public'
+    and tablename = 'expenses'
+  ) then
+    alter publication supabase_realtime add table expenses;
+  end if;
+end $$;
@@ -0,0 +1,350 @@
+"""Stream expenses out of Postgres as CSV or Parquet.
+
+Replaces the in-memory CSV builder for large exports (year-end reports, several
+projects at once). Rows are never all held in memory: CSV goes through
+`COPY ... TO STDOUT` straight into the output, Parquet is written in row groups
+read from a server-side cursor.
+
+Command line:
+    python export_expenses.py --project <uuid> [--project <uuid> ...] \\
+        [--from 2024-01-01] [--to 2024-12-31] [--format csv|parquet] [--output expenses.csv]
+
+Download endpoint for the app (set NEXT_PUBLIC_EXPORT_URL to its address):
+    SUPABASE_JWT_SECRET=... python export_expenses.py --serve --port 8787
+
+    POST /export-link?project_id=<uuid>&project_id=<uuid>&from=YYYY-MM-DD&to=YYYY-MM-DD&format=csv
+    Authorization: Bearer <Supabase access token>
+    -> {"url": "/export?...&user=<uuid>&expires=<unix time>&signature=<hmac>"}
+
+    GET /export?<the same parameters>   (Authorization: Bearer ... also works)
+
+The signed link is valid for a minute and needs no header, so the app can hand it to
+the browser, which streams the file to disk instead of holding it in the page.
+The export answers with a chunked response and runs the query as the signed-in
+user, so Row Level Security decides which projects can be exported.
+
+Requires psycopg2; Parquet output also needs pyarrow.
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from db import as_user, connect
+
+COLUMNS = [
+    'id', 'project_id', 'project_name', 'date', 'created_at', 'category', 'sub_category',
+    'source', 'description', 'amount', 'user_id', 'added_by',
+]
+
+# Newest first, the same order the app lists expenses in
+EXPORT_QUERY = """
+    select
+      e.id, e.project_id, p.name as project_name, e.date, e.created_at, e.category,
+      e.sub_category, coalesce(e.source, 'Balance') as source, e.description, e.amount_idr as amount,
+      e.user_id, coalesce(pr.full_name, pr.username, 'Unknown') as added_by
+    from expenses e
+    join projects p on p.id = e.project_id
+    left join profiles pr on pr.id = e.user_id
+    where e.project_id = any(%(project_ids)s::uuid[])
+    and (%(date_from)s::date is null or e.date >= %(date_from)s::date)
+    and (%(date_to)s::date is null or e.date <= %(date_to)s::date)
+    order by e.project_id, e.date desc, e.created_at desc, e.id desc
+"""
+
+CHUNK_ROWS = 50000
+
+# Seconds a signed download link stays valid
+LINK_TTL = 60
+
+
+def export_params(project_ids, date_from=None, date_to=None):
+    return {'project_ids': list(project_ids), 'date_from': date_from, 'date_to': date_to}
+
+
+def write_csv(conn, out, params):
+    """COPY the export query straight into `out` (anything with a write method)."""
+    with conn.cursor() as cur:
+        query = cur.mogrify(EXPORT_QUERY, params).decode()
+        cur.copy_expert(f'copy ({query}) to stdout with (format csv, header true)', out)
+
+
+def write_parquet(conn, out, params, chunk_rows=CHUNK_ROWS):
+    """Write the export as Parquet, one row group per `chunk_rows` rows."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('id', pa.string()),
+        ('project_id', pa.string()),
+        ('project_name', pa.string()),
+        ('date', pa.date32()),
+        ('created_at', pa.timestamp('us', tz='UTC')),
+        ('category', pa.string()),
+        ('sub_category', pa.string()),
+        ('source', pa.string()),
+        ('description', pa.string()),
+        ('amount', pa.int64()),  # whole rupiah (add_expense_amount_idr.sql)
+        ('user_id', pa.string()),
+        ('added_by', pa.string()),
+    ])
+
+    # A named cursor keeps the result set on the server; only one chunk is in memory at a time
+    with conn.cursor(name='expense_export') as cur, pq.ParquetWriter(out, schema) as writer:
+        cur.itersize = chunk_rows
+        cur.execute(EXPORT_QUERY, params)
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            arrays = [
+                pa.array(
+                    [None if v is None else str(v) for v in values]
+                    if field.type == pa.string() else list(values),
+                    type=field.type,
+                )
+                for field, values in zip(schema, columns)
+            ]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+
+
+def run_export(conn, out, fmt, params):
+    if fmt == 'csv':
+        write_csv(conn, out, params)
+    elif fmt == 'parquet':
+        write_parquet(conn, out, params)
+    else:
+        raise ValueError(f'Unknown format: {fmt}')
+
+
+# -- download endpoint ---------------------------------------------------------
+
+class ChunkedWriter:
+    """File-like object that sends everything written to it as HTTP chunks."""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.position = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        if data:
+            self.wfile.write(f'{len(data):x}\r\n'.encode() + bytes(data) + b'\r\n')
+            self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        self.wfile.flush()
+
+    def close(self):
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+    @property
+    def closed(self):
+        return False
+
+
+def _b64decode(segment):
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+def verify_token(token, secret):
+    """Return the user id from a Supabase (HS256) access token, or None if it is not valid."""
+    try:
+        header, payload, signature = token.split('.')
+        expected = hmac.new(secret.encode(), f'{header}.{payload}'.encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            return None
+        if json.loads(_b64decode(header)).get('alg') != 'HS256':
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, json.JSONDecodeError):
+        return None
+    if claims.get('exp', 0) < time.time():
+        return None
+    return claims.get('sub')
+
+
+def link_signature(query, secret):
+    """HMAC over every query parameter except the signature itself."""
+    message = urlencode(sorted((k, v) for k, values in query.items() if k != 'signature' for v in values))
+    return hmac.new(secret.encode(), f'export-link:{message}'.encode(), hashlib.sha256).hexdigest()
+
+
+def verify_link(query, secret):
+    """Return the user id a signed export link was issued to, or None if it is not valid."""
+    signature = query.get('signature', [''])[0]
+    if not hmac.compare_digest(signature, link_signature(query, secret)):
+        return None
+    try:
+        if int(query.get('expires', ['0'])[0]) < time.time():
+            return None
+    except ValueError:
+        return None
+    return query.get('user', [None])[0]
+
+
+class ExportHandler(BaseHTTPRequestHandler):
+    jwt_secret = None
+    dsn = None
+    allowed_origin = '*'
+
+    def _cors_headers(self):
+        self.send_header('Access-Control-Allow-Origin', self.allowed_origin)
+        self.send_header('Access-Control-Allow-Headers', 'Authorization')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+
+    def _error(self, status, message):
+        body = json.dumps({'error': message}).encode()
+        self.send_response(status)
+        self._cors_headers()
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self._cors_headers()
+        self.end_headers()
+
+    def _bearer_user(self):
+        auth = self.headers.get('Authorization', '')
+        return verify_token(auth[len('Bearer '):], self.jwt_secret) if auth.startswith('Bearer ') else None
+
+    def _query_error(self, query):
+        if not query.get('project_id'):
+            return 'project_id is required'
+        if query.get('format', ['csv'])[0] not in ('csv', 'parquet'):
+            return 'format must be csv or parquet'
+        return None
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/export-link':
+            return self._error(404, 'Not found')
+
+        user_id = self._bearer_user()
+        if not user_id:
+            return self._error(401, 'Invalid or expired token')
+
+        query = {k: v for k, v in parse_qs(url.query).items() if k in ('project_id', 'from', 'to', 'format')}
+        problem = self._query_error(query)
+        if problem:
+            return self._error(400, problem)
+
+        query['user'] = [user_id]
+        query['expires'] = [str(int(time.time()) + LINK_TTL)]
+        query['signature'] = [link_signature(query, self.jwt_secret)]
+
+        body = json.dumps({'url': f'/export?{urlencode(query, doseq=True)}'}).encode()
+        self.send_response(200)
+        self._cors_headers()
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/export':
+            return self._error(404, 'Not found')
+
+        query = parse_qs(url.query)
+        user_id = verify_link(query, self.jwt_secret) if 'signature' in query else self._bearer_user()
+        if not user_id:
+            return self._error(401, 'Invalid or expired token')
+
+        problem = self._query_error(query)
+        if problem:
+            return self._error(400, problem)
+
+        project_ids = query['project_id']
+        fmt = query.get('format', ['csv'])[0]
+
+        params = export_params(project_ids, query.get('from', [None])[0], query.get('to', [None])[0])
+        extension = 'csv' if fmt == 'csv' else 'parquet'
+        content_type = 'text/csv; charset=utf-8' if fmt == 'csv' else 'application/vnd.apache.parquet'
+
+        conn = connect(self.dsn)
+        try:
+            with conn, as_user(conn, user_id):
+                self.send_response(200)
+                self._cors_headers()
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Disposition', f'attachment; filename="expenses.{extension}"')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+
+                out = ChunkedWriter(self.wfile)
+                run_export(conn, out, fmt, params)
+                out.close()
+        except Exception as e:  # headers are already sent, all we can do is log and drop the connection
+            self.log_error('Export failed: %s', e)
+            self.close_connection = True
+        finally:
+            conn.close()
+
+
+def serve(port, dsn=None):
+    secret = os.environ.get('SUPABASE_JWT_SECRET')
+    if not secret:
+        raise SystemExit('SUPABASE_JWT_SECRET is required to verify access tokens')
+
+    ExportHandler.jwt_secret = secret
+    ExportHandler.dsn = dsn
+    ExportHandler.allowed_origin = os.environ.get('EXPORT_ALLOWED_ORIGIN', '*')
+    ExportHandler.protocol_version = 'HTTP/1.1'
+
+    server = ThreadingHTTPServer(('', port), ExportHandler)
+    print(f'Export endpoint listening on http://localhost:{port}/export')
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stream expenses to CSV or Parquet.')
+    parser.add_argument('--project', action='append', default=[], help='project id, repeat for several projects')
+    parser.add_argument('--from', dest='date_from', help='first date to include (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='date_to', help='last date to include (YYYY-MM-DD)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--output', default='-', help="output file, '-' for stdout (default)")
+    parser.add_argument('--serve', action='store_true', help='run the chunked download endpoint instead')
+    parser.add_argument('--port', type=int, default=8787)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.port)
+
+    if not args.project:
+        parser.error('at least one --project is required')
+
+    params = export_params(args.project, args.date_from, args.date_to)
+    conn = connect()
+    try:
+        with conn:
+            if args.output == '-':
+                out = sys.stdout.buffer if args.format == 'parquet' else sys.stdout
+                run_export(conn, out, args.format, params)
+            else:
+                mode = 'w' if args.format == 'csv' else 'wb'
+                with open(args.output, mode, newline='' if mode == 'w' else None) as out:
+                    run_export(conn, out, args.format, params)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""Import bank and credit-card statement CSVs into a project.
+
+Each statement line becomes one expense, categorised with the same category and
+sub-category vocabulary the app offers (DEFAULT_SUB_CATEGORIES in ExpenseForm.tsx),
+using the keyword rules below. Lines paid from Saving get the same "Cover for:"
+offset row the app adds.
+
+Rows are streamed into a temporary staging table with COPY and merged into
+expenses in one transaction. Every row carries a content hash (see
+add_expense_content_hash.sql), so importing the same statement again is a no-op.
+
+    python import_statements.py --project <uuid> --user <uuid> statement.csv [more.csv ...] \\
+        [--source Balance|Saving|"Credit Card"] [--date-col Tanggal] [--desc-col Keterangan] \\
+        [--amount-col Jumlah | --debit-col Debit --credit-col Kredit] [--date-format %d/%m/%Y] \\
+        [--rules rules.json] [--dry-run]
+
+`--rules` takes extra rules as a JSON list of
+{"keywords": [...], "category": "...", "sub_category": "..."}, checked before the built-in ones.
+
+Requires psycopg2 (see db.py).
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import re
+import sys
+from collections import Counter, defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from db import connect
+
+FORM_PATH = Path(__file__).resolve().parent / 'src' / 'components' / 'ExpenseForm.tsx'
+
+SOURCES = ('Balance', 'Saving', 'Credit Card')
+
+# (keywords, category, sub_category) for money going out, first match wins.
+# Keywords match whole words: 'kos' does not match 'kosmetik', nor 'tol' 'portolan'.
+DEBIT_RULES = [
+    (['gofood', 'grabfood', 'shopeefood', 'resto', 'rumah makan', 'warung', 'kopi', 'coffee', 'bakery'], 'Living', 'Makan'),
+    (['indomaret', 'alfamart', 'superindo', 'hypermart', 'transmart', 'lottemart', 'sayur', 'pasar'], 'Living', 'Groceries'),
+    (['laundry', 'binatu'], 'Living', 'Laundry'),
+    (['indihome', 'biznet', 'firstmedia', 'myrepublic', 'wifi', 'internet'], 'Living', 'Wifi'),
+    (['pln', 'listrik', 'token'], 'Living', 'Listrik'),
+    (['kos', 'kost', 'sewa', 'rent'], 'Living', 'Uang Kos'),
+    (['gojek', 'grab', 'gocar', 'goride', 'maxim', 'krl', 'mrt', 'transjakarta', 'pertamina', 'shell', 'bensin', 'parkir', 'tol'], 'Living', 'Transport'),
+    (['uniqlo', 'zara', 'h&m', 'matahari', 'zalora', 'fashion'], 'Playing', 'Fashion'),
+    (['sociolla', 'guardian', 'watsons', 'skincare', 'makeup', 'kosmetik'], 'Playing', 'Skincare/Makeup'),
+    (['traveloka', 'tiket.com', 'airasia', 'garuda', 'lion air', 'citilink', 'hotel', 'airbnb'], 'Playing', 'Jalan-jalan'),
+    (['netflix', 'spotify', 'youtube', 'disney', 'icloud', 'google one', 'vidio', 'langganan'], 'Playing', 'Langganan'),
+    (['gym', 'fitness', 'celebrity fitness', 'anytime'], 'Playing', 'Gym'),
+    (['tokopedia', 'shopee', 'lazada', 'blibli', 'jajan', 'snack'], 'Playing', 'Jajan'),
+    (['reksadana', 'bibit', 'ajaib', 'stockbit', 'saham', 'investasi', 'emas'], 'Saving', 'Investasi'),
+    (['tabungan', 'deposito'], 'Saving', 'Tabungan'),
+]
+
+# (keywords, category, sub_category) for money coming in
+CREDIT_RULES = [
+    (['gaji', 'salary', 'payroll'], 'Income', 'Gaji'),
+    (['bonus', 'thr', 'insentif'], 'Income', 'Bonus'),
+    (['hadiah', 'gift', 'cashback'], 'Income', 'Hadiah'),
+]
+
+DEFAULT_DEBIT = ('Living', 'Lainnya')
+DEFAULT_CREDIT = ('Income', 'Lainnya')
+
+STAGING_COLUMNS = ['content_hash', 'date', 'amount', 'category', 'sub_category', 'source', 'description']
+
+MERGE_QUERY = """
+    -- Overlapping statements repeat lines; keep one staged row per hash
+    with staged as (
+      select distinct on (content_hash) * from import_staging
+    )
+    insert into expenses (project_id, user_id, date, amount, category, sub_category, source, description, content_hash)
+    select %(project_id)s, %(user_id)s, date, amount, category, sub_category, source, description, content_hash
+    from staged
+    union all
+    -- Same offset row the app adds when an expense is paid from Saving
+    select %(project_id)s, %(user_id)s, date, -amount, 'Saving', 'Lainnya', 'Balance',
+      'Cover for: ' || description, content_hash || ':cover'
+    from staged
+    where source = 'Saving'
+    on conflict (project_id, content_hash) where content_hash is not null do nothing
+"""
+
+
+def load_vocabulary(path=FORM_PATH):
+    """Read DEFAULT_SUB_CATEGORIES out of ExpenseForm.tsx so imports use the app's own labels."""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    block = re.search(r'DEFAULT_SUB_CATEGORIES[^=]*=\s*\{(.*?)\n\}', content, re.S)
+    if not block:
+        raise SystemExit(f'DEFAULT_SUB_CATEGORIES not found in {path}')
+
+    return {
+        category: re.findall(r"'([^']*)'", items)
+        for category, items in re.findall(r'(\w+):\s*\[([^\]]*)\]', block.group(1))
+    }
+
+
+def check_rules(rules, vocabulary):
+    for _, category, sub_category in rules:
+        if sub_category not in vocabulary.get(category, []):
+            raise SystemExit(f'Rule target {category}/{sub_category} is not in {FORM_PATH}')
+
+
+def keyword_pattern(keywords):
+    """One regex for a rule's keywords, each only matching where no letter touches it."""
+    alternatives = '|'.join(re.escape(k.lower()) for k in sorted(keywords, key=len, reverse=True))
+    return re.compile(rf'(?<![a-z])(?:{alternatives})(?![a-z])')
+
+
+def categorize(description, is_credit, rules):
+    text = description.lower()
+    for pattern, category, sub_category in rules['credit' if is_credit else 'debit']:
+        if pattern.search(text):
+            return category, sub_category
+    return DEFAULT_CREDIT if is_credit else DEFAULT_DEBIT
+
+
+def parse_amount(raw):
+    """Parse '1.250.000,00', '1,250,000.00', '-50000' or '(50.000)' into a Decimal (None if blank)."""
+    raw = (raw or '').strip().replace('Rp', '').replace(' ', '')
+    if not raw:
+        return None
+    negative = raw.startswith('-') or (raw.startswith('(') and raw.endswith(')'))
+    raw = raw.strip('-()')
+    if raw.upper().endswith(('CR', 'DB')):
+        negative = raw.upper().endswith('DB')
+        raw = raw[:-2]
+
+    # The last separator followed by one or two digits is the decimal point
+    # ('12.5', '1.000.000,50'); followed by three it separates thousands
+    match = re.match(r'^(.*)[.,](\d{1,2})$', raw)
+    whole, cents = (match.group(1), match.group(2)) if match else (raw, '0')
+    try:
+        value = Decimal(re.sub(r'[.,]', '', whole) + '.' + cents)
+    except InvalidOperation:
+        raise ValueError(f'Unreadable amount: {raw!r}')
+    return -value if negative else value
+
+
+def statement_rows(path, args, rules):
+    """Yield (content_hash, date, amount, category, sub_category, source, description) per statement line."""
+    seen = Counter()
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for line_no, record in enumerate(csv.DictReader(f), start=2):
+            description = ' '.join((record.get(args.desc_col) or '').split())
+            try:
+                date = datetime.strptime(record[args.date_col].strip(), args.date_format).date()
+                if args.amount_col:
+                    value = parse_amount(record[args.amount_col])
+                else:
+                    debit = parse_amount(record.get(args.debit_col)) or Decimal(0)
+                    credit = parse_amount(record.get(args.credit_col)) or Decimal(0)
+                    value = credit - abs(debit)
+            except (KeyError, ValueError) as e:
+                raise SystemExit(f'{path}:{line_no}: {e}')
+
+            if not value:
+                continue
+
+            is_credit = value > 0
+            if is_credit and args.source == 'Credit Card':
+                continue  # card payments and refunds are transfers, not income
+            category, sub_category = categorize(description, is_credit, rules)
+            source = args.source
+            if category == 'Income':
+                source = 'Balance'
+
+            # Identical lines on the same day (two coffees) stay distinct through their ordinal
+            key = f'{date}|{value}|{description.lower()}|{args.source}'
+            seen[key] += 1
+            content_hash = hashlib.sha256(f'{key}|{seen[key]}'.encode()).hexdigest()
+
+            yield content_hash, date, abs(value), category, sub_category, source, description
+
+
+class CsvStream(io.RawIOBase):
+    """Readable file over a row generator, so COPY pulls rows as they are parsed."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.buffer = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        if not self.buffer:
+            out = io.StringIO()
+            writer = csv.writer(out)
+            for row in self.rows:
+                writer.writerow(row)
+                if out.tell() >= len(target):
+                    break
+            self.buffer = out.getvalue().encode()
+        n = min(len(target), len(self.buffer))
+        target[:n] = self.buffer[:n]
+        self.buffer = self.buffer[n:]
+        return n
+
+
+def import_statements(conn, project_id, user_id, rows):
+    """Stage `rows` with COPY and merge them into expenses in one transaction.
+
+    Returns (statement rows, rows skipped because they were already imported).
+    """
+    with conn, conn.cursor() as cur:
+        cur.execute(
+            'select 1 from project_members where project_id = %s and user_id = %s',
+            (project_id, user_id),
+        )
+        if not cur.fetchone():
+            raise SystemExit('That user is not a member of the project')
+
+        cur.execute("""
+            create temp table import_staging (
+              content_hash text not null,
+              date date not null,
+              amount numeric not null,
+              category text not null,
+              sub_category text,
+              source text not null,
+              description text not null
+            ) on commit drop
+        """)
+        cur.copy_expert(
+            f"copy import_staging ({', '.join(STAGING_COLUMNS)}) from stdin with (format csv)",
+            io.BufferedReader(CsvStream(iter(rows)), buffer_size=1 << 20),
+        )
+        cur.execute("""
+            select count(distinct content_hash),
+              count(distinct content_hash) filter (where source = 'Saving')
+            from import_staging
+        """)
+        staged, covers = cur.fetchone()
+        cur.execute('analyze import_staging')
+
+        cur.execute(MERGE_QUERY, {'project_id': project_id, 'user_id': user_id})
+        return staged, staged + covers - cur.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import statement CSVs as expenses.')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--project', required=True, help='project id')
+    parser.add_argument('--user', required=True, help='member the rows are recorded for')
+    parser.add_argument('--source', choices=SOURCES, default='Balance', help='what the statement account is')
+    parser.add_argument('--date-col', default='Date')
+    parser.add_argument('--desc-col', default='Description')
+    parser.add_argument('--amount-col', help='signed amount column (negative = money out)')
+    parser.add_argument('--debit-col', default='Debit')
+    parser.add_argument('--credit-col', default='Credit')
+    parser.add_argument('--date-format', default='%Y-%m-%d')
+    parser.add_argument('--rules', help='JSON file with extra keyword rules')
+    parser.add_argument('--dry-run', action='store_true', help='print the categorisation summary only')
+    args = parser.parse_args()
+
+    vocabulary = load_vocabulary()
+    debit_rules = list(DEBIT_RULES)
+    credit_rules = list(CREDIT_RULES)
+    if args.rules:
+        with open(args.rules, 'r', encoding='utf-8') as f:
+            extra = [(r['keywords'], r['category'], r['sub_category']) for r in json.load(f)]
+        debit_rules = [r for r in extra if r[1] != 'Income'] + debit_rules
+        credit_rules = [r for r in extra if r[1] == 'Income'] + credit_rules
+    check_rules(debit_rules + credit_rules + [([], *DEFAULT_DEBIT), ([], *DEFAULT_CREDIT)], vocabulary)
+    rules = {'debit': [(keyword_pattern(k), c, s) for k, c, s in debit_rules],
+             'credit': [(keyword_pattern(k), c, s) for k, c, s in credit_rules]}
+
+    def all_rows():
+        for path in args.files:
+            yield from statement_rows(path, args, rules)
+
+    if args.dry_run:
+        counts = defaultdict(lambda: [0, Decimal(0)])
+        for _, _, amount, category, sub_category, _, _ in all_rows():
+            counts[(category, sub_category)][0] += 1
+            counts[(category, sub_category)][1] += amount
+        for (category, sub_category), (n, total) in sorted(counts.items()):
+            print(f'{category:8} {sub_category:18} {n:8} {total:>18,.0f}')
+        return
+
+    started = datetime.now()
+    conn = connect()
+    try:
+        staged, skipped = import_statements(conn, args.project, args.user, all_rows())
+    finally:
+        conn.close()
+
+    seconds = (datetime.now() - started).total_seconds()
+    print(f'{staged} statement rows imported in {seconds:.1f}s ({skipped} rows already there)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,512 @@
+"""Apply the schema migrations in order and record them in schema_migrations.
+
+The .sql files in this folder used to be pasted into the Supabase SQL editor one by
+one. MIGRATIONS lists them in the order they were added, followed by steps that are
+written so they do not block the app while they run on a large expenses table:
+
+- ConcurrentIndex builds with CREATE INDEX CONCURRENTLY (outside a transaction) and
+  rebuilds an index left invalid by an interrupted run.
+- Backfill updates rows in primary-key batches, one short transaction per batch, and
+  stores its position so an interrupted run continues where it stopped.
+- AddConstraint adds CHECK and FOREIGN KEY constraints as NOT VALID, which only needs a
+  brief lock; ValidateConstraint scans the table later without blocking writes.
+- SetNotNull relies on a validated "is not null" check, so Postgres skips the scan.
+
+DDL runs with a lock_timeout: a step that would queue behind a long transaction (and
+make every write queue behind it) gives up, waits and tries again instead.
+
+    python migrate.py status
+    python migrate.py up [--to <version>] [--batch-size 5000] [--pause 0.1]
+    python migrate.py baseline --to <version>   # database already has these, from the SQL editor
+
+A project set up through the SQL editor runs "baseline --to 007" once (or up to the
+last file it actually pasted), then "up" from there on. baseline only records .sql
+files; the steps split out of them are left for "up" to run.
+
+Requires psycopg2 (see db.py).
+"""
+
+import argparse
+import hashlib
+import sys
+import time
+
+import psycopg2
+from psycopg2 import errors
+
+from db import connect
+
+LEDGER_SQL = """
+    create table if not exists schema_migrations (
+      version text primary key,
+      description text not null,
+      checksum text not null,
+      applied_at timestamp with time zone default now() not null,
+      duration_ms integer
+    );
+
+    -- Position of Backfill steps that have not finished yet
+    create table if not exists schema_migration_progress (
+      version text primary key,
+      last_key text,
+      rows_scanned bigint default 0 not null,
+      rows_updated bigint default 0 not null,
+      updated_at timestamp with time zone default now() not null
+    );
+
+    -- No policies: not readable through the API
+    alter table schema_migrations enable row level security;
+    alter table schema_migration_progress enable row level security;
+"""
+
+# Only one runner at a time
+ADVISORY_LOCK_KEY = 7_304_117
+
+
+def checksum(text):
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class Options:
+    def __init__(self, batch_size=5000, pause=0.0, lock_timeout='5s', retries=5, dry_run=False):
+        self.batch_size = batch_size
+        self.pause = pause
+        self.lock_timeout = lock_timeout
+        self.retries = retries
+        self.dry_run = dry_run
+
+
+def with_lock_retries(options, fn):
+    """Run fn(), retrying when it gave up waiting for a lock."""
+    for attempt in range(options.retries + 1):
+        try:
+            return fn()
+        except errors.LockNotAvailable:
+            if attempt == options.retries:
+                raise
+            wait = 2 ** attempt
+            print(f'    lock not available, retrying in {wait}s', file=sys.stderr)
+            time.sleep(wait)
+
+
+class SqlFile:
+    """One of the .sql files, run in a single transaction."""
+
+    def __init__(self, version, path):
+        self.version = version
+        self.path = path
+        self.description = path
+
+    def source(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def checksum(self):
+        return checksum(self.source())
+
+    def run(self, conn, options):
+        sql = self.source()
+
+        def apply():
+            with conn, conn.cursor() as cur:
+                cur.execute('set local lock_timeout = %s', (options.lock_timeout,))
+                # Some functions mention tables a later file creates, as they did on the live project
+                cur.execute('set local check_function_bodies = off')
+                cur.execute(sql)
+
+        with_lock_retries(options, apply)
+
+
+class ConcurrentIndex:
+    def __init__(self, version, name, definition, unique=False):
+        self.version = version
+        self.name = name
+        self.definition = definition  # e.g. "expenses (project_id, date desc)"
+        self.unique = unique
+        self.description = f'index {name}'
+
+    def checksum(self):
+        return checksum(f'{self.unique}:{self.name}:{self.definition}')
+
+    def run(self, conn, options):
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                cur.execute('set lock_timeout = %s', (options.lock_timeout,))
+
+                def build():
+                    # An interrupted CONCURRENTLY build leaves an invalid index behind that
+                    # "if not exists" would happily keep
+                    cur.execute("""
+                        select not i.indisvalid
+                        from pg_index i join pg_class c on c.oid = i.indexrelid
+                        where c.relname = %s and c.relnamespace = 'public'::regnamespace
+                    """, (self.name,))
+                    row = cur.fetchone()
+                    if row and row[0]:
+                        print(f'    dropping invalid index {self.name}', file=sys.stderr)
+                        cur.execute(f'drop index concurrently if exists {self.name}')
+
+                    unique = 'unique ' if self.unique else ''
+                    cur.execute(f'create {unique}index concurrently if not exists {self.name} on {self.definition}')
+
+                with_lock_retries(options, build)
+                cur.execute('reset lock_timeout')
+        finally:
+            conn.autocommit = False
+
+
+class Backfill:
+    """Update `table` in primary-key order, `batch_size` rows per transaction.
+
+    `assignments` and `condition` are SQL over the alias t; only rows matching
+    `condition` are updated, but every row is visited once so progress is exact.
+    """
+
+    def __init__(self, version, description, table, assignments, condition, key='id', key_type='uuid'):
+        self.version = version
+        self.description = description
+        self.table = table
+        self.assignments = assignments
+        self.condition = condition
+        self.key = key
+        self.key_type = key_type
+
+    def checksum(self):
+        return checksum(f'{self.table}:{self.assignments}:{self.condition}')
+
+    def run(self, conn, options):
+        batch_sql = f"""
+            with batch as (
+              select {self.key} from {self.table}
+              where %(last)s::{self.key_type} is null or {self.key} > %(last)s::{self.key_type}
+              order by {self.key}
+              limit %(size)s
+            ), updated as (
+              update {self.table} t set {self.assignments}
+              from batch
+              where t.{self.key} = batch.{self.key} and ({self.condition})
+              returning 1
+            )
+            select
+              (select {self.key}::text from batch order by {self.key} desc limit 1),
+              (select count(*) from batch),
+              (select count(*) from updated)
+        """
+
+        with conn, conn.cursor() as cur:
+            cur.execute("select reltuples::bigint from pg_class where oid = %s::regclass", (self.table,))
+            estimate = max(cur.fetchone()[0], 0)
+            cur.execute("""
+                insert into schema_migration_progress (version) values (%s)
+                on conflict (version) do nothing
+            """, (self.version,))
+            cur.execute("""
+                select last_key, rows_scanned, rows_updated from schema_migration_progress where version = %s
+            """, (self.version,))
+            last, scanned, updated = cur.fetchone()
+
+        if last:
+            print(f'    resuming after {last} ({scanned} rows scanned)', file=sys.stderr)
+
+        started = time.perf_counter()
+        while True:
+            def apply_batch():
+                with conn, conn.cursor() as cur:
+                    cur.execute('set local lock_timeout = %s', (options.lock_timeout,))
+                    cur.execute(batch_sql, {'last': last, 'size': options.batch_size})
+                    batch_last, batch_scanned, batch_updated = cur.fetchone()
+                    if batch_scanned:
+                        cur.execute("""
+                            update schema_migration_progress
+                            set last_key = %s, rows_scanned = rows_scanned + %s,
+                                rows_updated = rows_updated + %s, updated_at = now()
+                            where version = %s
+                        """, (batch_last, batch_scanned, batch_updated, self.version))
+                    return batch_last, batch_scanned, batch_updated
+
+            batch_last, batch_scanned, batch_updated = with_lock_retries(options, apply_batch)
+            if not batch_scanned:
+                break
+
+            last = batch_last
+            scanned += batch_scanned
+            updated += batch_updated
+            rate = scanned / max(time.perf_counter() - started, 1e-6)
+            total = f'~{estimate}' if estimate else '?'
+            print(f'    {scanned}/{total} rows scanned, {updated} updated ({rate:.0f} rows/s)', file=sys.stderr)
+            if options.pause:
+                time.sleep(options.pause)
+
+        with conn, conn.cursor() as cur:
+            cur.execute('delete from schema_migration_progress where version = %s', (self.version,))
+
+
+class AddConstraint:
+    """ADD CONSTRAINT ... NOT VALID: checks new writes right away, existing rows later."""
+
+    def __init__(self, version, table, name, definition):
+        self.version = version
+        self.table = table
+        self.name = name
+        self.definition = definition
+        self.description = f'constraint {name} (not valid)'
+
+    def checksum(self):
+        return checksum(f'{self.table}:{self.name}:{self.definition}')
+
+    def run(self, conn, options):
+        def apply():
+            with conn, conn.cursor() as cur:
+                cur.execute('set local lock_timeout = %s', (options.lock_timeout,))
+                # Redefining an existing constraint swaps it within this transaction
+                cur.execute(f'alter table {self.table} drop constraint if exists {self.name}')
+                cur.execute(f'alter table {self.table} add constraint {self.name} {self.definition} not valid')
+
+        with_lock_retries(options, apply)
+
+
+class ValidateConstraint:
+    """Scan existing rows under SHARE UPDATE EXCLUSIVE, which lets reads and writes continue."""
+
+    def __init__(self, version, table, name, hint=None):
+        self.version = version
+        self.table = table
+        self.name = name
+        self.hint = hint
+        self.description = f'validate {name}'
+
+    def checksum(self):
+        return checksum(f'{self.table}:{self.name}')
+
+    def run(self, conn, options):
+        def apply():
+            with conn, conn.cursor() as cur:
+                cur.execute('set local lock_timeout = %s', (options.lock_timeout,))
+                cur.execute(f'alter table {self.table} validate constraint {self.name}')
+
+        try:
+            with_lock_retries(options, apply)
+        except (errors.CheckViolation, errors.ForeignKeyViolation) as e:
+            raise SystemExit(f'{self.name}: existing rows violate it ({e.pgerror.strip()}). {self.hint or ""}')
+
+
+class SetNotNull:
+    """SET NOT NULL backed by a validated check constraint, which is then dropped."""
+
+    def __init__(self, version, table, column, check):
+        self.version = version
+        self.table = table
+        self.column = column
+        self.check = check
+        self.description = f'{table}.{column} not null'
+
+    def checksum(self):
+        return checksum(f'{self.table}:{self.column}:{self.check}')
+
+    def run(self, conn, options):
+        def apply():
+            with conn, conn.cursor() as cur:
+                cur.execute('set local lock_timeout = %s', (options.lock_timeout,))
+                cur.execute(f'alter table {self.table} alter column {self.column} set not null')
+                cur.execute(f'alter table {self.table} drop constraint if exists {self.check}')
+
+        with_lock_retries(options, apply)
+
+
+ORPHAN_HINT = (
+    'Find them with "select * from expenses where user_id is null or project_id is null", '
+    'assign or delete them, then run migrate.py up again.'
+)
+
+# In the order they were added. Never edit or reorder an applied step; add a new one.
+# Steps split out of a .sql file keep its number with a suffix (014.1 runs after 014 and
+# before 015), so --to and baseline cover them together with their file.
+MIGRATIONS = [
+    SqlFile('001', 'supabase_setup.sql'),
+    SqlFile('002', 'add_sub_category.sql'),
+    SqlFile('003', 'add_source_column.sql'),
+    SqlFile('004', 'fix_relationship.sql'),
+    SqlFile('005', 'create_view.sql'),
+    SqlFile('006', 'update_rls.sql'),
+    SqlFile('007', 'add_delete_policy.sql'),
+    SqlFile('008', 'add_monthly_rollup.sql'),
+    # Same index as add_expense_pagination_index.sql
+    ConcurrentIndex('009', 'expenses_project_date_created_id_idx',
+                    'expenses (project_id, date desc, created_at desc, id desc)'),
+    SqlFile('010', 'enable_expense_realtime.sql'),
+    SqlFile('011', 'add_bootstrap_functions.sql'),
+    SqlFile('012', 'optimize_project_access.sql'),
+    SqlFile('013', 'add_columnar_expenses.sql'),
+    SqlFile('014', 'add_expense_search.sql'),
+    ConcurrentIndex('014.1', 'expenses_description_trgm_idx', 'expenses using gin (description gin_trgm_ops)'),
+    SqlFile('015', 'add_expense_content_hash.sql'),
+    ConcurrentIndex('015.1', 'expenses_project_content_hash_idx',
+                    'expenses (project_id, content_hash) where content_hash is not null', unique=True),
+    # Statements contain incoming transfers too; the app already records them as 'Income'
+    AddConstraint('015.2', 'expenses', 'expenses_category_check',
+                  "check (category in ('Living', 'Playing', 'Saving', 'Income'))"),
+    ValidateConstraint('015.3', 'expenses', 'expenses_category_check'),
+    SqlFile('016', 'add_saving_goal_progress.sql'),
+    SqlFile('017', 'add_budget_targets.sql'),
+    SqlFile('018', 'add_expense_sync.sql'),
+    # Every backfilled row is also broadcast to subscribed clients as an UPDATE; --pause spreads them out
+    Backfill('018.1', 'expenses.updated_at from created_at', 'expenses',
+             'updated_at = coalesce(t.created_at, now())', 't.updated_at is null'),
+    AddConstraint('018.2', 'expenses', 'expenses_updated_at_not_null', 'check (updated_at is not null)'),
+    ValidateConstraint('018.3', 'expenses', 'expenses_updated_at_not_null'),
+    SetNotNull('018.4', 'expenses', 'updated_at', 'expenses_updated_at_not_null'),
+    ConcurrentIndex('018.5', 'expenses_project_updated_at_idx', 'expenses (project_id, updated_at)'),
+    SqlFile('019', 'add_client_perf_events.sql'),
+
+    # expenses.user_id / project_id were left nullable by supabase_setup.sql.
+    # Rows from before projects existed get the author's first own project; rows
+    # without an author are attributed to the project owner.
+    Backfill('020', 'expenses.user_id from the project owner', 'expenses',
+             'user_id = (select p.owner_id from projects p where p.id = t.project_id)',
+             't.user_id is null and t.project_id is not null'),
+    Backfill('021', 'expenses.project_id from the author\'s first project', 'expenses',
+             'project_id = (select p.id from projects p where p.owner_id = t.user_id order by p.created_at limit 1)',
+             't.project_id is null and exists (select 1 from projects p where p.owner_id = t.user_id)'),
+    AddConstraint('022', 'expenses', 'expenses_user_id_not_null', 'check (user_id is not null)'),
+    AddConstraint('023', 'expenses', 'expenses_project_id_not_null', 'check (project_id is not null)'),
+    ValidateConstraint('024', 'expenses', 'expenses_user_id_not_null', ORPHAN_HINT),
+    ValidateConstraint('025', 'expenses', 'expenses_project_id_not_null', ORPHAN_HINT),
+    SetNotNull('026', 'expenses', 'user_id', 'expenses_user_id_not_null'),
+    SetNotNull('027', 'expenses', 'project_id', 'expenses_project_id_not_null'),
+    # ON DELETE SET NULL (fix_relationship.sql) cannot work on a NOT NULL column. Deleting an
+    # account now hands its expenses in other people's projects to the project owner (027.1)
+    # and cascades to the rest. Dropped and re-added in one transaction so PostgREST never
+    # sees two expenses -> profiles relationships.
+    SqlFile('027.1', 'add_expense_author_reassign.sql'),
+    AddConstraint('028', 'expenses', 'expenses_user_id_fkey',
+                  'foreign key (user_id) references profiles(id) on delete cascade'),
+    ValidateConstraint('029', 'expenses', 'expenses_user_id_fkey'),
+
+    # Whole-rupiah bigint amounts. New writes fill amount_idr from the trigger in 030.
+    # 031 rounds the few legacy fractional amounts: a real change, so each rounded row goes
+    # through the rollup trigger, gets a new updated_at and is broadcast to open pages.
+    # 032 copies the rest without touching the rollup or updated_at.
+    SqlFile('030', 'add_expense_amount_idr.sql'),
+    Backfill('031', 'expenses.amount to whole rupiah', 'expenses',
+             'amount = round(t.amount)', 't.amount <> round(t.amount)'),
+    Backfill('032', 'expenses.amount_idr from amount', 'expenses',
+             'amount_idr = t.amount::bigint', 't.amount_idr is null'),
+    AddConstraint('033', 'expenses', 'expenses_amount_idr_not_null', 'check (amount_idr is not null)'),
+    ValidateConstraint('034', 'expenses', 'expenses_amount_idr_not_null'),
+    SetNotNull('035', 'expenses', 'amount_idr', 'expenses_amount_idr_not_null'),
+    SqlFile('036', 'add_expense_amount_aggregates.sql'),
+]
+
+
+def ensure_ledger(conn):
+    with conn, conn.cursor() as cur:
+        cur.execute(LEDGER_SQL)
+        cur.execute('select version, checksum from schema_migrations')
+        return dict(cur.fetchall())
+
+
+def record(conn, step, duration_ms):
+    with conn, conn.cursor() as cur:
+        cur.execute("""
+            insert into schema_migrations (version, description, checksum, duration_ms)
+            values (%s, %s, %s, %s)
+            on conflict (version) do nothing
+        """, (step.version, step.description, step.checksum(), duration_ms))
+
+
+def pending_steps(applied, target):
+    steps = [s for s in MIGRATIONS if target is None or s.version <= target]
+    for step in steps:
+        if step.version in applied and applied[step.version] != step.checksum():
+            print(f'warning: {step.version} {step.description} changed after it was applied', file=sys.stderr)
+    return [s for s in steps if s.version not in applied]
+
+
+def migrate(conn, target=None, options=None):
+    """Apply every pending step up to `target` (inclusive); returns the steps applied."""
+    options = options or Options()
+    applied = ensure_ledger(conn)
+    steps = pending_steps(applied, target)
+
+    done = []
+    for step in steps:
+        print(f'{step.version} {step.description}', file=sys.stderr)
+        if options.dry_run:
+            continue
+        started = time.perf_counter()
+        step.run(conn, options)
+        record(conn, step, round((time.perf_counter() - started) * 1000))
+        done.append(step)
+    return done
+
+
+def status(conn):
+    applied = ensure_ledger(conn)
+    with conn, conn.cursor() as cur:
+        cur.execute('select version, rows_scanned from schema_migration_progress')
+        in_progress = dict(cur.fetchall())
+
+    for step in MIGRATIONS:
+        if step.version in applied:
+            state = 'applied' if applied[step.version] == step.checksum() else 'applied (changed since)'
+        elif step.version in in_progress:
+            state = f'in progress ({in_progress[step.version]} rows scanned)'
+        else:
+            state = 'pending'
+        print(f'{step.version}  {state:28} {step.description}')
+
+
+def baseline(conn, target):
+    """Mark .sql files up to `target` as applied without running them.
+
+    Other steps (indexes, backfills, constraints) were never part of the files pasted
+    into the SQL editor, so they stay pending for "up".
+    """
+    applied = ensure_ledger(conn)
+    for step in pending_steps(applied, target):
+        if not isinstance(step, SqlFile):
+            print(f'{step.version} {step.description} left pending')
+            continue
+        record(conn, step, None)
+        print(f'{step.version} {step.description} marked as applied')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply schema migrations.')
+    parser.add_argument('command', nargs='?', default='up', choices=['up', 'status', 'baseline'])
+    parser.add_argument('--to', help='stop after this version')
+    parser.add_argument('--batch-size', type=int, default=5000, help='rows per backfill transaction')
+    parser.add_argument('--pause', type=float, default=0.0, help='seconds to sleep between backfill batches')
+    parser.add_argument('--lock-timeout', default='5s', help='give up waiting for a lock after this long')
+    parser.add_argument('--retries', type=int, default=5, help='attempts after a lock timeout')
+    parser.add_argument('--dry-run', action='store_true', help='list pending steps without running them')
+    args = parser.parse_args()
+
+    if args.command == 'baseline' and not args.to:
+        raise SystemExit('baseline needs --to <version>')
+
+    conn = connect()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute('select pg_try_advisory_lock(%s)', (ADVISORY_LOCK_KEY,))
+            if not cur.fetchone()[0]:
+                raise SystemExit('Another migrate.py is running')
+
+        if args.command == 'status':
+            status(conn)
+        elif args.command == 'baseline':
+            baseline(conn, args.to)
+        else:
+            options = Options(args.batch_size, args.pause, args.lock_timeout, args.retries, args.dry_run)
+            done = migrate(conn, args.to, options)
+            if not args.dry_run:
+                print(f'{len(done)} migrations applied' if done else 'Nothing to apply')
+    except psycopg2.Error as e:
+        raise SystemExit(f'Migration failed: {e}')
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
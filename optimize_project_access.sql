@@ -0,0 +1,107 @@
+-- Faster access checks and project list for projects with many members and expenses.
+--
+-- 1. check_project_access() was plpgsql, so every RLS policy called it once per row.
+--    Policies now compare against accessible_project_ids(), an uncorrelated subquery
+--    that Postgres runs once per statement and hashes, and check_project_access()
+--    itself becomes a plain SQL function for the callers that still use it.
+-- 2. project_members gets an index led by user_id; the unique (project_id, user_id)
+--    constraint cannot serve "all projects of this user" lookups.
+--    expenses(project_id, date ...) is already covered by
+--    expenses_project_date_created_id_idx from add_expense_pagination_index.sql.
+-- 3. project_details_view reads the last expense date with a lateral top-1 index scan
+--    and the membership flag from the same per-statement project list.
+--
+-- Requires add_monthly_rollup.sql and add_expense_pagination_index.sql.
+-- Run through migrate.py.
+
+-- 1. HELPER FUNCTIONS
+-- security definer so reading project_members here does not recurse into its own policies
+create or replace function accessible_project_ids()
+returns setof uuid as $$
+  select project_id from project_members
+  where user_id = (select auth.uid());
+$$ language sql stable security definer set search_path = public;
+
+create or replace function check_project_access(target_project_id uuid)
+returns boolean as $$
+  select exists (
+    select 1 from project_members
+    where project_id = target_project_id
+    and user_id = (select auth.uid())
+  );
+$$ language sql stable security definer set search_path = public;
+
+-- 2. INDEXES
+create index if not exists project_members_user_project_idx
+  on project_members (user_id, project_id);
+
+-- 3. POLICIES
+drop policy if exists "Users can view projects they are members of" on projects;
+create policy "Users can view projects they are members of" on projects
+  for select using (
+    id in (select accessible_project_ids())
+  );
+
+drop policy if exists "Users can view members of their projects" on project_members;
+create policy "Users can view members of their projects" on project_members
+  for select using (
+    project_id in (select accessible_project_ids())
+  );
+
+drop policy if exists "Members can view project expenses" on expenses;
+drop policy if exists "Members can insert project expenses" on expenses;
+drop policy if exists "Members can update project expenses" on expenses;
+drop policy if exists "Members can delete project expenses" on expenses;
+
+create policy "Members can view project expenses" on expenses
+  for select using (
+    project_id in (select accessible_project_ids())
+  );
+
+create policy "Members can insert project expenses" on expenses
+  for insert with check (
+    project_id in (select accessible_project_ids())
+  );
+
+create policy "Members can update project expenses" on expenses
+  for update using (
+    project_id in (select accessible_project_ids())
+  );
+
+create policy "Members can delete project expenses" on expenses
+  for delete using (
+    project_id in (select accessible_project_ids())
+  );
+
+drop policy if exists "Members can view project rollups" on expense_monthly_rollup;
+create policy "Members can view project rollups" on expense_monthly_rollup
+  for select using (
+    project_id in (select accessible_project_ids())
+  );
+
+-- 4. VIEW (same columns and types as create_view.sql)
+create or replace view project_details_view with (security_invoker = true) as
+select
+  p.id,
+  p.name,
+  p.created_at,
+  p.owner_id,
+  pr.full_name as owner_name,
+  pr.username as owner_username,
+  last_expense.date as last_expense_date,
+  (p.id in (select accessible_project_ids()))::int::bigint as is_member -- Helper to filter only projects user is part of if needed
+from projects p
+join profiles pr on p.owner_id = pr.id
+left join lateral (
+  select e.date
+  from expenses e
+  where e.project_id = p.id
+  order by e.date desc
+  limit 1
+) last_expense on true;
+
+-- To compare plans before/after on a seeded database, run as a member, e.g.:
+--   set local role authenticated;
+--   select set_config('request.jwt.claims', json_build_object('sub', '<user uuid>')::text, true);
+--   explain (analyze, buffers) select * from expenses where project_id = '<project uuid>' order by date desc limit 500;
+--   explain (analyze, buffers) select * from project_details_view;
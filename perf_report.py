@@ -0,0 +1,122 @@
+"""Per-stage timing breakdown of the spans recorded by src/lib/perf.ts.
+
+Reads client_perf_events (add_client_perf_events.sql), or a JSON file exported
+from the app's /debug screen, and prints count, p50/p95/p99, max and the average
+rows and bytes per stage and span name, slowest p95 first.
+
+    python perf_report.py [--days 7] [--stage network --stage call ...] [--name rpc:get_expense_page]
+    python perf_report.py --file perf-spans.json
+
+Reading from the database requires psycopg2 (see db.py).
+"""
+
+import argparse
+import json
+import statistics
+from collections import defaultdict
+
+STAGES = ['network', 'call', 'decode', 'compute', 'render']
+
+EVENTS_QUERY = """
+    select stage, name, duration_ms, rows, bytes
+    from client_perf_events
+    where started_at > now() - make_interval(days => %(days)s)
+      and (%(stages)s::text[] is null or stage = any(%(stages)s::text[]))
+      and (%(names)s::text[] is null or name = any(%(names)s::text[]))
+"""
+
+
+def load_file(path, stages, names):
+    with open(path, 'r', encoding='utf-8') as f:
+        spans = json.load(f)
+    return [
+        (s['stage'], s['name'], s['duration_ms'], s.get('rows'), s.get('bytes'))
+        for s in spans
+        if (not stages or s['stage'] in stages) and (not names or s['name'] in names)
+    ]
+
+
+def load_database(days, stages, names):
+    from db import connect
+
+    conn = connect()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(EVENTS_QUERY, {'days': days, 'stages': stages, 'names': names})
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def percentiles(durations):
+    if len(durations) == 1:
+        return durations * 3
+    q = statistics.quantiles(durations, n=100, method='inclusive')
+    return [q[49], q[94], q[98]]
+
+
+def summarize(events):
+    groups = defaultdict(list)
+    for stage, name, duration, rows, size in events:
+        groups[(stage, name)].append((float(duration), rows, size))
+
+    summary = []
+    for (stage, name), spans in groups.items():
+        durations = [d for d, _, _ in spans]
+        rows = [r for _, r, _ in spans if r is not None]
+        sizes = [b for _, _, b in spans if b is not None]
+        p50, p95, p99 = percentiles(durations)
+        summary.append({
+            'stage': stage,
+            'name': name,
+            'count': len(spans),
+            'p50': p50,
+            'p95': p95,
+            'p99': p99,
+            'max': max(durations),
+            'total': sum(durations),
+            'rows': statistics.fmean(rows) if rows else None,
+            'bytes': statistics.fmean(sizes) if sizes else None,
+        })
+    return summary
+
+
+def print_report(summary):
+    by_stage = defaultdict(list)
+    for line in summary:
+        by_stage[line['stage']].append(line)
+
+    for stage in sorted(by_stage, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+        lines = sorted(by_stage[stage], key=lambda line: line['p95'], reverse=True)
+        total = sum(line['total'] for line in lines)
+        print(f'\n{stage} ({sum(line["count"] for line in lines)} spans, {total / 1000:.1f}s total)')
+        print(f'  {"name":34} {"count":>6} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"max ms":>9} {"rows":>8} {"kB":>8}')
+        for line in lines:
+            rows = f'{line["rows"]:.0f}' if line['rows'] is not None else '-'
+            size = f'{line["bytes"] / 1024:.1f}' if line['bytes'] is not None else '-'
+            print(f'  {line["name"][:34]:34} {line["count"]:6} {line["p50"]:9.2f} {line["p95"]:9.2f} '
+                  f'{line["p99"]:9.2f} {line["max"]:9.2f} {rows:>8} {size:>8}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize client timing spans per stage.')
+    parser.add_argument('--file', help='spans exported from /debug instead of the database')
+    parser.add_argument('--days', type=int, default=7, help='look back this many days (database only)')
+    parser.add_argument('--stage', action='append', choices=STAGES, help='only these stages')
+    parser.add_argument('--name', action='append', help='only these span names')
+    args = parser.parse_args()
+
+    if args.file:
+        events = load_file(args.file, args.stage, args.name)
+    else:
+        events = load_database(args.days, args.stage, args.name)
+
+    if not events:
+        print('No spans recorded')
+        return
+
+    print_report(summarize(events))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Recompute saving_goals.current_amount from the expenses table.
+
+The triggers from add_saving_goal_progress.sql keep the value current; run this
+after bulk fixes made with the triggers disabled, or to check nothing has drifted.
+
+    python reconcile_saving_goals.py [--project <uuid>]
+
+Requires psycopg2 (see db.py).
+"""
+
+import argparse
+
+from db import connect
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recompute saving goal progress.')
+    parser.add_argument('--project', help='only this project (default: all projects)')
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute('lock table expenses in share row exclusive mode')
+            cur.execute('select reconcile_saving_goals(%s)', (args.project,))
+            fixed = cur.fetchone()[0]
+    finally:
+        conn.close()
+
+    print(f'{fixed} saving goals corrected' if fixed else 'All saving goals were already correct')
+
+
+if __name__ == '__main__':
+    main()
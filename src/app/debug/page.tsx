@@ -0,0 +1,147 @@
+'use client'
+
+import { useEffect, useState } from 'react'
+import Link from 'next/link'
+import { ArrowLeft, Activity, Download, RefreshCw, Trash2 } from 'lucide-react'
+import { PerfMode, PerfSpan, clearSpans, flushSpans, getPerfMode, readSpans, setPerfMode, summarizeSpans } from '../../lib/perf'
+import { download } from '../../lib/export'
+import { ThemeToggle } from '../../components/ThemeToggle'
+import { cn } from '../../lib/utils'
+
+const MODES: { value: PerfMode, label: string }[] = [
+    { value: 'off', label: 'Off' },
+    { value: 'local', label: 'This device' },
+    { value: 'remote', label: 'Send to server' }
+]
+
+const formatMs = (ms: number) => ms < 10 ? ms.toFixed(2) : ms.toFixed(0)
+
+// Spans recorded by lib/perf.ts on this device, for "why is the project page slow?" reports
+export default function DebugPage() {
+    const [mode, setMode] = useState<PerfMode>('off')
+    const [spans, setSpans] = useState<PerfSpan[]>([])
+
+    const refresh = () => setSpans(readSpans())
+
+    useEffect(() => {
+        setMode(getPerfMode())
+        refresh()
+    }, [])
+
+    const changeMode = (next: PerfMode) => {
+        setPerfMode(next)
+        setMode(next)
+    }
+
+    const handleExport = () => {
+        flushSpans()
+        download(new Blob([JSON.stringify(readSpans())], { type: 'application/json' }), 'perf-spans.json')
+    }
+
+    const summary = summarizeSpans(spans)
+    const recent = spans.slice(-50).reverse()
+
+    return (
+        <main className="min-h-screen bg-gray-50 dark:bg-gray-900 font-sans transition-colors duration-200">
+            <div className="max-w-5xl mx-auto px-4 py-8">
+                <header className="flex items-center justify-between mb-8">
+                    <div className="flex items-center gap-3">
+                        <Link href="/home" className="p-2 text-gray-600 hover:text-gray-900 dark:text-gray-400 dark:hover:text-gray-100">
+                            <ArrowLeft className="w-5 h-5" />
+                        </Link>
+                        <div className="bg-indigo-600 p-2 rounded-lg shadow-md">
+                            <Activity className="w-6 h-6 text-white" />
+                        </div>
+                        <h1 className="text-2xl font-bold text-gray-900 dark:text-gray-100 tracking-tight">Performance</h1>
+                    </div>
+                    <ThemeToggle />
+                </header>
+
+                <section className="bg-white dark:bg-gray-800 border border-gray-200 dark:border-gray-700 rounded-xl p-6 mb-6">
+                    <div className="flex flex-wrap items-center justify-between gap-4">
+                        <div className="flex gap-2">
+                            {MODES.map(({ value, label }) => (
+                                <button
+                                    key={value}
+                                    onClick={() => changeMode(value)}
+                                    className={cn(
+                                        'px-3 py-1.5 rounded-lg text-sm font-medium border transition-colors',
+                                        mode === value
+                                            ? 'bg-indigo-600 border-indigo-600 text-white'
+                                            : 'bg-white border-gray-300 text-gray-700 hover:bg-gray-50 dark:bg-gray-800 dark:border-gray-600 dark:text-gray-300 dark:hover:bg-gray-700'
+                                    )}
+                                >
+                                    {label}
+                                </button>
+                            ))}
+                        </div>
+                        <div className="flex gap-2">
+                            <button onClick={refresh} className="p-2 text-gray-600 bg-white border border-gray-300 rounded-lg hover:bg-gray-50 dark:bg-gray-800 dark:border-gray-600 dark:text-gray-300 dark:hover:bg-gray-700" title="Refresh">
+                                <RefreshCw className="w-4 h-4" />
+                            </button>
+                            <button onClick={handleExport} disabled={spans.length === 0} className="p-2 text-gray-600 bg-white border border-gray-300 rounded-lg hover:bg-gray-50 disabled:opacity-50 dark:bg-gray-800 dark:border-gray-600 dark:text-gray-300 dark:hover:bg-gray-700" title="Export JSON (for perf_report.py --file)">
+                                <Download className="w-4 h-4" />
+                            </button>
+                            <button onClick={() => { clearSpans(); refresh() }} className="p-2 text-gray-600 bg-white border border-gray-300 rounded-lg hover:bg-red-50 hover:text-red-600 dark:bg-gray-800 dark:border-gray-600 dark:text-gray-300 dark:hover:bg-red-900/20" title="Clear">
+                                <Trash2 className="w-4 h-4" />
+                            </button>
+                        </div>
+                    </div>
+                    <p className="mt-3 text-sm text-gray-500 dark:text-gray-400">
+                        {mode === 'off'
+                            ? 'Recording is off. Turn it on, use the app, then come back here.'
+                            : `${spans.length} spans on this device. Render timings only appear in development builds.`}
+                    </p>
+                </section>
+
+                <section className="bg-white dark:bg-gray-800 border border-gray-200 dark:border-gray-700 rounded-xl p-6 mb-6 overflow-x-auto">
+                    <h2 className="text-lg font-semibold text-gray-900 dark:text-gray-100 mb-4">By stage</h2>
+                    <table className="w-full text-sm">
+                        <thead>
+                            <tr className="text-left text-gray-500 dark:text-gray-400 border-b border-gray-200 dark:border-gray-700">
+                                <th className="py-2 pr-4">Stage</th>
+                                <th className="py-2 pr-4">Name</th>
+                                <th className="py-2 pr-4 text-right">Count</th>
+                                <th className="py-2 pr-4 text-right">p50 ms</th>
+                                <th className="py-2 pr-4 text-right">p95 ms</th>
+                                <th className="py-2 pr-4 text-right">Max ms</th>
+                                <th className="py-2 pr-4 text-right">Rows</th>
+                                <th className="py-2 text-right">kB</th>
+                            </tr>
+                        </thead>
+                        <tbody className="text-gray-900 dark:text-gray-100">
+                            {summary.map(line => (
+                                <tr key={`${line.stage}:${line.name}`} className="border-b border-gray-100 dark:border-gray-700/50">
+                                    <td className="py-2 pr-4 text-gray-500 dark:text-gray-400">{line.stage}</td>
+                                    <td className="py-2 pr-4 font-mono">{line.name}</td>
+                                    <td className="py-2 pr-4 text-right">{line.count}</td>
+                                    <td className="py-2 pr-4 text-right">{formatMs(line.p50)}</td>
+                                    <td className="py-2 pr-4 text-right">{formatMs(line.p95)}</td>
+                                    <td className="py-2 pr-4 text-right">{formatMs(line.max)}</td>
+                                    <td className="py-2 pr-4 text-right">{line.rows == null ? '-' : Math.round(line.rows)}</td>
+                                    <td className="py-2 text-right">{line.bytes == null ? '-' : (line.bytes / 1024).toFixed(1)}</td>
+                                </tr>
+                            ))}
+                        </tbody>
+                    </table>
+                </section>
+
+                <section className="bg-white dark:bg-gray-800 border border-gray-200 dark:border-gray-700 rounded-xl p-6">
+                    <h2 className="text-lg font-semibold text-gray-900 dark:text-gray-100 mb-4">Latest spans</h2>
+                    <ul className="space-y-1 text-sm font-mono">
+                        {recent.map((span, i) => (
+                            <li key={i} className="flex justify-between gap-4 text-gray-700 dark:text-gray-300">
+                                <span className="truncate">{span.started_at.substring(11, 23)} {span.stage}:{span.name}</span>
+                                <span className="shrink-0">
+                                    {formatMs(span.duration_ms)} ms
+                                    {span.rows != null && ` · ${span.rows} rows`}
+                                    {span.bytes != null && ` · ${(span.bytes / 1024).toFixed(1)} kB`}
+                                </span>
+                            </li>
+                        ))}
+                    </ul>
+                </section>
+            </div>
+        </main>
+    )
+}
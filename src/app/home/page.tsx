@@ -3,29 +3,16 @@
 import { useEffect, useState } from 'react'
 import { useRouter } from 'next/navigation'
 import { supabase } from '../../lib/supabase'
+import { fetchHomeBootstrap, HomeProject, UserProfile } from '../../lib/bootstrap'
+import { clearOfflineStore, loadHomeCache, saveHomeCache, setOfflineUser } from '../../lib/offlineStore'
 import { ThemeToggle } from '../../components/ThemeToggle'
 import { Modal } from '../../components/Modal'
 import { LogOut, Plus, Folder, User, ArrowRight, Trash2 } from 'lucide-react'
 import { toast } from 'sonner'
 import Link from 'next/link'
 
-type Project = {
-    id: string
-    name: string
-    role: 'owner' | 'member'
-    created_at: string
-    owner_name: string | null
-    owner_username: string | null
-    last_expense_date: string | null
-}
-
-type UserProfile = {
-    full_name: string | null
-    username: string | null
-}
-
 export default function Home() {
-    const [projects, setProjects] = useState<Project[]>([])
+    const [projects, setProjects] = useState<HomeProject[]>([])
     const [loading, setLoading] = useState(true)
     const [showCreateModal, setShowCreateModal] = useState(false)
     const [newProjectName, setNewProjectName] = useState('')
@@ -40,73 +27,37 @@ export default function Home() {
                 router.push('/login')
                 return
             }
+            setOfflineUser(session.user.id)
 
-            // Fetch User Profile
-            const { data: profile } = await supabase
-                .from('profiles')
-                .select('full_name, username')
-                .eq('id', session.user.id)
-                .single()
-
-            setUserProfile(profile)
-
-            // Fetch all projects for the user
-            fetchProjects(session.user.id)
+            // Fetch profile and all projects for the user in one call
+            fetchProjects()
         }
         init()
     }, [])
 
-    const fetchProjects = async (userId: string) => {
-        setLoading(true)
-
-        // 1. Fetch memberships to get roles and project IDs
-        const { data: members, error: membersError } = await supabase
-            .from('project_members')
-            .select('project_id, role')
-            .eq('user_id', userId)
-
-        if (membersError) {
-            console.error('Error fetching members:', membersError)
-            toast.error('Failed to load projects')
+    const fetchProjects = async () => {
+        // Show the list saved on this device first, the server copy replaces it when it arrives
+        const cached = await loadHomeCache().catch(() => null)
+        if (cached) {
+            setUserProfile(cached.profile)
+            setProjects(cached.projects)
             setLoading(false)
-            return
-        }
-
-        if (!members || members.length === 0) {
-            setProjects([])
-            setLoading(false)
-            return
+        } else {
+            setLoading(true)
         }
 
-        const projectIds = members.map(m => m.project_id)
-
-        // 2. Fetch project details from the view
-        const { data: details, error: detailsError } = await supabase
-            .from('project_details_view')
-            .select('*')
-            .in('id', projectIds)
-            .order('last_expense_date', { ascending: false }) // Sort by most active
-
-        if (detailsError) {
-            console.error('Error fetching details:', detailsError)
-            toast.error('Failed to load project details')
+        try {
+            // Memberships, roles and project details merged server-side (see add_bootstrap_functions.sql)
+            const home = await fetchHomeBootstrap()
+            setUserProfile(home.profile)
+            setProjects(home.projects)
+            saveHomeCache(home).catch(error => console.error('Error saving offline cache:', error))
+        } catch (error) {
+            console.error('Error fetching projects:', error)
+            if (cached) toast('You are offline, showing saved projects')
+            else toast.error('Failed to load projects')
         }
 
-        // 3. Merge data
-        const mergedProjects: Project[] = (details || []).map(detail => {
-            const member = members.find(m => m.project_id === detail.id)
-            return {
-                id: detail.id,
-                name: detail.name,
-                role: member?.role || 'member',
-                created_at: detail.created_at,
-                owner_name: detail.owner_name,
-                owner_username: detail.owner_username,
-                last_expense_date: detail.last_expense_date
-            }
-        })
-
-        setProjects(mergedProjects)
         setLoading(false)
     }
 
@@ -167,7 +118,7 @@ export default function Home() {
             const { error } = await supabase.from('projects').delete().eq('id', projectId)
             if (error) throw error
             toast.success('Project deleted successfully')
-            fetchProjects((await supabase.auth.getUser()).data.user?.id || '')
+            fetchProjects()
         } catch (error) {
             console.error('Error deleting project:', error)
             toast.error('Failed to delete project')
@@ -179,6 +130,7 @@ export default function Home() {
         if (error) {
             toast.error('Error logging out')
         } else {
+            await clearOfflineStore().catch(() => {})
             router.push('/login')
         }
     }
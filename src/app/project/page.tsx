@@ -1,8 +1,18 @@
 'use client'
 
-import { useEffect, useState, useMemo, Suspense } from 'react'
+import { useEffect, useState, useMemo, useRef, useReducer, Suspense, Profiler } from 'react'
 import { useRouter, useSearchParams } from 'next/navigation'
 import { supabase } from '../../lib/supabase'
+import { fetchRollup, rollupMonths, summarizeRollup } from '../../lib/rollup'
+import { Expense, ExpenseChanges, ExpenseCursor, PAGE_SIZE, cursorAfter, fetchExpenseChanges, fetchExpensePage, fetchMonthExpenses } from '../../lib/expenses'
+import { fetchProjectBootstrap, ProjectBootstrap, SavingGoal, UserProfile } from '../../lib/bootstrap'
+import { expenseReducer, initialExpenseState, isPending, nextTempId, serverTotals } from '../../lib/expenseStore'
+import {
+    clearOfflineStore, clearProjectCache, dequeueExpenses, diffExpenses, isOfflineError, loadOutbox, loadProjectCache,
+    outboxBatches, outboxRows, queueExpenses, saveExpenses, saveProjectSnapshot, setOfflineUser
+} from '../../lib/offlineStore'
+import { EXPORT_URL, downloadLocalExport, downloadServerExport } from '../../lib/export'
+import { onRenderProfile, timed } from '../../lib/perf'
 import { Dashboard } from '../../components/Dashboard'
 import { ExpenseForm } from '../../components/ExpenseForm'
 import { ExpenseList } from '../../components/ExpenseList'
@@ -13,49 +23,19 @@ import { PlusCircle, Wallet, Filter, Download, LogOut, User, UserPlus, ArrowLeft
 import { toast } from 'sonner'
 import Link from 'next/link'
 
-type Expense = {
-    id: string
-    amount: number
-    category: 'Living' | 'Playing' | 'Saving' | 'Income'
-    sub_category?: string
-    description: string
-    date: string
-    source?: 'Balance' | 'Saving' | 'Credit Card'
-    project_id?: string
-    user_id?: string
-    profiles?: {
-        full_name: string | null
-        username: string | null
-    }
-}
-
-export type SavingGoal = {
-    id: string
-    project_id: string
-    name: string
-    sub_category: string
-    target_amount: number
-    current_amount: number
-}
-
 type Project = {
     id: string
     name: string
     role: 'owner' | 'member'
 }
 
-type UserProfile = {
-    full_name: string | null
-    username: string | null
-}
-
 function ProjectContent() {
     const searchParams = useSearchParams()
     const id = searchParams.get('id')
     const router = useRouter()
 
-    const [expenses, setExpenses] = useState<Expense[]>([])
-    const [savingGoals, setSavingGoals] = useState<SavingGoal[]>([])
+    const [state, dispatch] = useReducer(expenseReducer, initialExpenseState)
+    const { expenses, members, rollup, savingGoals, rollupStale } = state
     const [loading, setLoading] = useState(true)
     const [isSubmitting, setIsSubmitting] = useState(false)
     const [showForm, setShowForm] = useState(false)
@@ -66,6 +46,18 @@ function ProjectContent() {
     const [selectedMonth, setSelectedMonth] = useState<string>(new Date().toISOString().substring(0, 7))
     const [currentProject, setCurrentProject] = useState<Project | null>(null)
     const [userProfile, setUserProfile] = useState<UserProfile | null>(null)
+    const [budgetTarget, setBudgetTarget] = useState<number | null>(null)
+    const [historyCursor, setHistoryCursor] = useState<ExpenseCursor | null>(null)
+    const [hasMoreHistory, setHasMoreHistory] = useState(true)
+    const [loadingMore, setLoadingMore] = useState(false)
+    // Months whose rows are fully loaded, so switching back to them costs nothing
+    const loadedMonths = useRef<Set<string>>(new Set())
+    // Months still being fetched; they are not written to the offline cache as loaded yet
+    const monthsInFlight = useRef<Set<string>>(new Set())
+    // Offline cache bookkeeping: the server time cached rows are current to, and the rows last written
+    const watermark = useRef<string | null>(null)
+    const persistedExpenses = useRef<Expense[]>([])
+    const flushing = useRef(false)
 
     useEffect(() => {
         const init = async () => {
@@ -81,65 +73,282 @@ function ProjectContent() {
                 router.push('/login')
                 return
             }
+            setOfflineUser(session.user.id)
 
-            // Fetch User Profile
-            const { data: profile } = await supabase
-                .from('profiles')
-                .select('full_name, username')
-                .eq('id', session.user.id)
-                .single()
+            const month = selectedMonth === 'all' ? new Date().toISOString().substring(0, 7) : selectedMonth
 
-            setUserProfile(profile)
+            // Render whatever this device already has, then catch up with the server
+            const cache = await loadProjectCache(id).catch(() => null)
+            const monthCached = !!cache?.snapshot.loadedMonths.includes(month)
+            if (!monthCached) {
+                // The bootstrap call below brings this month's first page; keep the month effect from fetching it too
+                loadedMonths.current.add(month)
+                monthsInFlight.current.add(month)
+            }
 
-            // Check if user is a member of this specific project
-            const { data: member, error: memberError } = await supabase
-                .from('project_members')
-                .select('project_id, role, projects(name)')
-                .eq('user_id', session.user.id)
-                .eq('project_id', id)
-                .single()
+            if (cache) {
+                const { snapshot } = cache
+                snapshot.loadedMonths.forEach(m => loadedMonths.current.add(m))
+                watermark.current = snapshot.watermark
+                persistedExpenses.current = cache.expenses
+
+                setUserProfile(snapshot.profile)
+                setBudgetTarget(snapshot.budgetTarget)
+                dispatch({ type: 'merge', rows: [...cache.expenses, ...outboxRows(cache.outbox, snapshot.profile)], members: snapshot.members })
+                dispatch({ type: 'setSavingGoals', savingGoals: snapshot.savingGoals })
+                dispatch({ type: 'setRollup', rollup: snapshot.rollup })
+                setCurrentProject(snapshot.project)
+                setLoading(false)
+            }
 
-            if (member && member.projects) {
-                // Known issue: Typescript might complain about nested data, but Supabase returns it.
-                // Casting for simplicity in this context.
-                const projectData = member.projects as unknown as { name: string }
+            // Profile, membership, saving goals, totals and the first page of the month in one call,
+            // plus whatever changed in the cached rows since the last visit
+            let boot: ProjectBootstrap | undefined
+            let changes: ExpenseChanges | undefined
+            try {
+                [boot, changes] = await Promise.all([
+                    fetchProjectBootstrap(id, month, monthCached ? 0 : PAGE_SIZE),
+                    fetchExpenseChanges(id, watermark.current)
+                ])
+            } catch (error) {
+                console.error('Project load error:', error)
+                if (cache) {
+                    loadedMonths.current.delete(month)
+                    monthsInFlight.current.delete(month)
+                    toast('You are offline, showing saved data')
+                    return
+                }
+            }
 
-                setCurrentProject({
-                    id: member.project_id,
-                    name: projectData.name,
-                    role: member.role as 'owner' | 'member'
-                })
-                fetchExpenses(member.project_id)
-                fetchSavingGoals(member.project_id)
-            } else {
-                console.error('Project load error:', memberError)
+            if (!boot?.project || !changes) {
                 // Redirect to home if not found or no access
+                if (boot) clearProjectCache(id)
                 toast.error('Project not found or access denied')
                 router.push('/home')
+                return
+            }
+
+            if (changes.reset && cache) {
+                // Offline for too long to catch up: start over, keeping only unsent rows
+                loadedMonths.current.clear()
+                if (!monthCached) loadedMonths.current.add(month)
+                persistedExpenses.current = []
+                await clearProjectCache(id, true)
+                dispatch({ type: 'reset' })
+                dispatch({ type: 'merge', rows: outboxRows(cache.outbox, boot.profile) })
+            } else {
+                dispatch({ type: 'sync', rows: changes.rows, members: changes.members, deleted: changes.deleted })
+            }
+            watermark.current = changes.watermark
+
+            const rest = monthCached ? null : cursorAfter(boot.expenses)
+            if (!monthCached) {
+                dispatch({ type: 'merge', rows: boot.expenses, members: boot.members })
+                if (!rest) monthsInFlight.current.delete(month)
+            }
+
+            setUserProfile(boot.profile)
+            setBudgetTarget(boot.budget_target)
+            dispatch({ type: 'setSavingGoals', savingGoals: boot.saving_goals })
+            dispatch({ type: 'setRollup', rollup: boot.rollup })
+            setCurrentProject(boot.project)
+            setLoading(false)
+            flushOutbox(boot.project.id)
+
+            if (rest) {
+                // Very busy month: the remaining pages load behind the first one
+                try {
+                    const remaining = await fetchMonthExpenses(boot.project.id, month, rest)
+                    dispatch({ type: 'merge', ...remaining })
+                } catch (error) {
+                    loadedMonths.current.delete(month)
+                    console.error('Error fetching expenses:', error)
+                    toast.error('Failed to load expenses')
+                }
+                monthsInFlight.current.delete(month)
             }
         }
         init()
     }, [id, router])
 
-    const fetchExpenses = async (projectId: string) => {
-        setLoading(true)
-        const { data, error } = await supabase
-            .from('expenses')
-            .select('*, profiles(full_name, username)')
-            .eq('project_id', projectId)
-            .order('date', { ascending: false })
-            .order('created_at', { ascending: false })
+    const loadMonth = async (projectId: string, month: string) => {
+        if (loadedMonths.current.has(month)) return
+        // Only the very first month blocks the page, later ones load behind the current view
+        const isFirstLoad = loadedMonths.current.size === 0
+        loadedMonths.current.add(month)
 
-        if (error) {
+        monthsInFlight.current.add(month)
+
+        if (isFirstLoad) setLoading(true)
+        else setLoadingMore(true)
+        try {
+            const { rows, members } = await fetchMonthExpenses(projectId, month)
+            dispatch({ type: 'merge', rows, members })
+        } catch (error) {
+            loadedMonths.current.delete(month)
             console.error('Error fetching expenses:', error)
             toast.error('Failed to load expenses')
-        } else {
-            setExpenses(data as Expense[] || [])
-            if (!selectedMonth) {
-                setSelectedMonth(new Date().toISOString().substring(0, 7))
-            }
+        }
+        monthsInFlight.current.delete(month)
+        setLoading(false)
+        setLoadingMore(false)
+    }
+
+    // Stream the next older page of the full history (All Time view, on scroll)
+    const loadMoreHistory = async (projectId: string, cursor: ExpenseCursor | null) => {
+        setLoadingMore(true)
+        try {
+            const page = await fetchExpensePage(projectId, { cursor })
+            dispatch({ type: 'merge', rows: page.rows, members: page.members })
+            setHistoryCursor(page.nextCursor)
+            setHasMoreHistory(page.nextCursor !== null)
+        } catch (error) {
+            console.error('Error fetching expenses:', error)
+            toast.error('Failed to load older expenses')
         }
         setLoading(false)
+        setLoadingMore(false)
+    }
+
+    useEffect(() => {
+        if (!currentProject || selectedMonth === 'all') return
+        loadMonth(currentProject.id, selectedMonth)
+    }, [currentProject, selectedMonth])
+
+    useEffect(() => {
+        // The first page of the full history is loaded as soon as All Time is picked
+        if (!currentProject || selectedMonth !== 'all' || historyCursor || !hasMoreHistory || loadingMore) return
+        loadMoreHistory(currentProject.id, null)
+    }, [currentProject, selectedMonth])
+
+    // Apply other members' changes as they happen instead of refetching the project
+    useEffect(() => {
+        if (!currentProject) return
+
+        const channel = supabase
+            .channel(`expenses:${currentProject.id}`)
+            .on('postgres_changes', { event: 'INSERT', schema: 'public', table: 'expenses', filter: `project_id=eq.${currentProject.id}` },
+                payload => dispatch({ type: 'upsert', row: payload.new as Expense, event: 'INSERT' }))
+            .on('postgres_changes', { event: 'UPDATE', schema: 'public', table: 'expenses', filter: `project_id=eq.${currentProject.id}` },
+                payload => dispatch({ type: 'upsert', row: payload.new as Expense, event: 'UPDATE' }))
+            // Delete events on expenses cannot be filtered by project, the tombstones they leave can
+            .on('postgres_changes', { event: 'INSERT', schema: 'public', table: 'expense_tombstones', filter: `project_id=eq.${currentProject.id}` },
+                payload => dispatch({ type: 'tombstone', id: payload.new.id as string }))
+            .on('postgres_changes', { event: 'UPDATE', schema: 'public', table: 'expense_tombstones', filter: `project_id=eq.${currentProject.id}` },
+                payload => dispatch({ type: 'tombstone', id: payload.new.id as string }))
+            .subscribe()
+
+        return () => {
+            supabase.removeChannel(channel)
+        }
+    }, [currentProject])
+
+    useEffect(() => {
+        if (!currentProject) return
+        const onOnline = () => syncChanges(currentProject.id)
+        window.addEventListener('online', onOnline)
+        return () => window.removeEventListener('online', onOnline)
+    }, [currentProject])
+
+    // Keep the offline cache in step with what is on screen
+    useEffect(() => {
+        if (!currentProject) return
+        const timer = setTimeout(() => {
+            const saved = expenses.filter(e => !isPending(e))
+            const { changed, removedIds } = diffExpenses(persistedExpenses.current, saved)
+            persistedExpenses.current = saved
+            const totals = serverTotals(state)
+
+            Promise.all([
+                saveExpenses(currentProject.id, changed, removedIds),
+                saveProjectSnapshot({
+                    project: currentProject,
+                    profile: userProfile,
+                    savingGoals: totals.savingGoals,
+                    rollup: totals.rollup,
+                    members,
+                    budgetTarget,
+                    loadedMonths: Array.from(loadedMonths.current).filter(m => !monthsInFlight.current.has(m)),
+                    watermark: watermark.current
+                })
+            ]).catch(error => console.error('Error saving offline cache:', error))
+        }, 500)
+        return () => clearTimeout(timer)
+    }, [currentProject, state, userProfile, budgetTarget])
+
+    // An event touched a row that was never loaded; only the small rollup and the goals need refreshing
+    useEffect(() => {
+        if (!currentProject || !rollupStale) return
+        const timer = setTimeout(() => {
+            fetchSavingGoals(currentProject.id)
+            fetchProjectRollup(currentProject.id)
+        }, 1000)
+        return () => clearTimeout(timer)
+    }, [currentProject, rollupStale])
+
+    const fetchProjectRollup = async (projectId: string) => {
+        try {
+            dispatch({ type: 'setRollup', rollup: await fetchRollup(projectId) })
+        } catch (error) {
+            console.error('Error fetching monthly rollup:', error)
+            toast.error('Failed to load totals')
+        }
+    }
+
+    // Send expenses added while offline, a few submissions per request
+    const flushOutbox = async (projectId: string) => {
+        if (flushing.current) return
+        flushing.current = true
+        let sent = 0
+        try {
+            for (const batch of outboxBatches(await loadOutbox(projectId))) {
+                const ids = batch.map(entry => entry.id)
+                const { error: upsertError } = await supabase
+                    .from('expenses')
+                    .upsert(batch.map(entry => entry.row), { onConflict: 'id', ignoreDuplicates: true })
+
+                // Read the rows back by id: ignoreDuplicates returns nothing for rows an earlier
+                // flush already saved (its response was lost), and those still replace their temp rows
+                const { data: inserted, error } = upsertError
+                    ? { data: null, error: upsertError }
+                    : await supabase
+                        .from('expenses')
+                        .select('*, profiles(full_name, username)')
+                        .in('id', ids)
+
+                if (error) {
+                    // Rejected rows stay queued rather than being lost; they are retried on the next flush
+                    if (!isOfflineError(error)) {
+                        console.error('Error syncing offline expenses:', error)
+                        toast.error('Some offline transactions could not be synced')
+                    }
+                    break
+                }
+
+                await dequeueExpenses(ids)
+                dispatch({ type: 'ackInsert', tempIds: batch.map(entry => entry.tempId), rows: (inserted || []) as Expense[] })
+                sent += batch.length
+            }
+        } catch (error) {
+            console.error('Error syncing offline expenses:', error)
+        }
+        flushing.current = false
+        if (sent > 0) toast.success(`${sent} offline transaction${sent > 1 ? 's' : ''} synced`)
+    }
+
+    // Catch up after a connection drop: realtime events sent meanwhile were missed
+    const syncChanges = async (projectId: string) => {
+        try {
+            const changes = await fetchExpenseChanges(projectId, watermark.current)
+            if (!changes.reset) {
+                dispatch({ type: 'sync', rows: changes.rows, members: changes.members, deleted: changes.deleted })
+                watermark.current = changes.watermark
+            }
+            await Promise.all([fetchSavingGoals(projectId), fetchProjectRollup(projectId)])
+        } catch (error) {
+            console.error('Error syncing changes:', error)
+        }
+        await flushOutbox(projectId)
     }
 
     const fetchSavingGoals = async (projectId: string) => {
@@ -151,7 +360,7 @@ function ProjectContent() {
                 .order('name')
 
             if (!error && data) {
-                setSavingGoals(data as SavingGoal[])
+                dispatch({ type: 'setSavingGoals', savingGoals: data as SavingGoal[] })
             }
         } catch (e) {
             console.log('Saving goals table might not exist yet', e)
@@ -160,59 +369,22 @@ function ProjectContent() {
 
     // Derived state for available months
     const availableMonths = useMemo(() => {
-        const months = new Set(expenses.map(e => e.date.substring(0, 7)))
+        const months = new Set(rollupMonths(rollup))
         months.add(new Date().toISOString().substring(0, 7))
         return Array.from(months).sort().reverse()
-    }, [expenses])
+    }, [rollup])
 
     // Filter expenses for the list
     const filteredExpenses = useMemo(() => {
         if (selectedMonth === 'all') return expenses
-        return expenses.filter(e => e.date.startsWith(selectedMonth))
+        return timed('filterMonth', 'compute', () => expenses.filter(e => e.date.startsWith(selectedMonth)), rows => ({ rows: rows.length }))
     }, [expenses, selectedMonth])
 
-    // derived state for totals
-    const { totalIncome, totalExpenses, balance, totalSavings, allTimeExpenses, creditCardDebt } = useMemo(() => {
-        let income = 0
-        let expense = 0
-        let allTimeIncome = 0
-        let allTimeWalletExpense = 0 // Expenses that actually cut balance
-        let allTimeSavings = 0
-        let ccDebt = 0
-
-        expenses.forEach(e => {
-            const amount = Number(e.amount) || 0
-            const isIncome = e.category === 'Income'
-            const isSaving = e.category === 'Saving'
-            const isCC = e.source === 'Credit Card'
-
-            if (isIncome) {
-                allTimeIncome += amount
-            } else {
-                if (!isCC) {
-                    allTimeWalletExpense += amount
-                } else {
-                    ccDebt += amount
-                }
-            }
-
-            if (isSaving) allTimeSavings += amount
-
-            if (selectedMonth === 'all' || e.date.startsWith(selectedMonth)) {
-                if (isIncome) income += amount
-                else if (!isSaving) expense += amount // UI total expense still includes CC
-            }
-        })
-
-        return {
-            totalIncome: income,
-            totalExpenses: expense,
-            balance: allTimeIncome - allTimeWalletExpense,
-            totalSavings: allTimeSavings,
-            allTimeExpenses: allTimeWalletExpense + ccDebt,
-            creditCardDebt: ccDebt
-        }
-    }, [expenses, selectedMonth])
+    // derived state for totals, read from the monthly rollup instead of the full history
+    const { totalIncome, totalExpenses, balance, totalSavings, creditCardDebt } = useMemo(
+        () => timed('summarizeRollup', 'compute', () => summarizeRollup(rollup, selectedMonth), () => ({ rows: rollup.length })),
+        [rollup, selectedMonth]
+    )
 
     const handleAddExpense = async (data: Omit<Expense, 'id' | 'project_id' | 'user_id' | 'profiles'> & { source?: 'Balance' | 'Saving' | 'Credit Card' }) => {
         if (!currentProject) {
@@ -221,11 +393,14 @@ function ProjectContent() {
         }
 
         setIsSubmitting(true)
-        const { data: { user } } = await supabase.auth.getUser()
+        const { data: { session } } = await supabase.auth.getSession()
+        const user = session?.user
         if (!user) { setIsSubmitting(false); return }
 
+        // Ids are made here so a retried send (see flushOutbox) cannot insert a row twice
         const expensesToInsert = [
             {
+                id: crypto.randomUUID(),
                 amount: data.amount,
                 category: data.category,
                 sub_category: data.sub_category,
@@ -239,6 +414,7 @@ function ProjectContent() {
 
         if (data.source === 'Saving') {
             expensesToInsert.push({
+                id: crypto.randomUUID(),
                 amount: -data.amount,
                 category: 'Saving',
                 sub_category: 'Lainnya',
@@ -250,15 +426,50 @@ function ProjectContent() {
             })
         }
 
-        const { error } = await supabase.from('expenses').insert(expensesToInsert)
+        // Show the rows (and their effect on the totals) right away, then swap in the server rows
+        const optimisticRows = expensesToInsert.map(row => ({
+            ...row,
+            id: nextTempId(),
+            profiles: userProfile || undefined
+        })) as Expense[]
+        const tempIds = optimisticRows.map(row => row.id)
+        dispatch({ type: 'optimisticInsert', rows: optimisticRows })
+
+        const { data: inserted, error } = navigator.onLine
+            ? await supabase
+                .from('expenses')
+                .insert(expensesToInsert)
+                .select('*, profiles(full_name, username)')
+            : { data: null, error: null }
         setIsSubmitting(false)
 
-        if (error) {
+        if (!inserted && (!error || isOfflineError(error))) {
+            // No connection: keep the rows on screen and send them once the app is back online
+            try {
+                const queuedAt = Date.now()
+                await queueExpenses(expensesToInsert.map((row, i) => ({
+                    id: row.id,
+                    tempId: tempIds[i],
+                    group: tempIds[0],
+                    queued_at: queuedAt + i,
+                    project_id: currentProject.id,
+                    row
+                })))
+                toast.success('Saved offline, will sync when back online')
+                setShowForm(false)
+                setEditingExpense(null)
+            } catch (queueError) {
+                dispatch({ type: 'rollback', tempIds })
+                console.error('Error queueing expense:', queueError)
+                toast.error('Failed to add expense')
+            }
+        } else if (error) {
+            dispatch({ type: 'rollback', tempIds })
             console.error('Error adding expense:', error)
             toast.error('Failed to add expense')
         } else {
+            dispatch({ type: 'ackInsert', tempIds, rows: (inserted || []) as Expense[] })
             toast.success('Transaction added successfully')
-            fetchExpenses(currentProject.id)
             setShowForm(false)
             setEditingExpense(null)
         }
@@ -267,7 +478,11 @@ function ProjectContent() {
     const handleUpdateExpense = async (data: Omit<Expense, 'id' | 'profiles'>) => {
         if (!editingExpense || !currentProject) return
         setIsSubmitting(true)
-        const { error } = await supabase
+
+        const original = editingExpense
+        dispatch({ type: 'upsert', row: { ...original, ...data, id: original.id } })
+
+        const { data: updated, error } = await supabase
             .from('expenses')
             .update({
                 amount: data.amount,
@@ -277,16 +492,19 @@ function ProjectContent() {
                 date: data.date,
                 source: data.source,
             })
-            .eq('id', editingExpense.id)
+            .eq('id', original.id)
             .eq('project_id', currentProject.id)
+            .select('*, profiles(full_name, username)')
+            .single()
 
         setIsSubmitting(false)
         if (error) {
+            dispatch({ type: 'upsert', row: original })
             console.error('Error updating expense:', error)
             toast.error('Failed to update expense')
         } else {
+            dispatch({ type: 'upsert', row: updated as Expense })
             toast.success('Transaction updated successfully')
-            fetchExpenses(currentProject.id)
             setShowForm(false)
             setEditingExpense(null)
         }
@@ -363,28 +581,22 @@ function ProjectContent() {
         }
     }
 
-    const handleExport = () => {
-        if (filteredExpenses.length === 0) return toast.error('No expenses to export')
+    const handleExport = async () => {
+        if (EXPORT_URL && currentProject) {
+            const { data: { session } } = await supabase.auth.getSession()
+            if (session) {
+                try {
+                    await downloadServerExport(currentProject.id, selectedMonth, session.access_token)
+                    return
+                } catch (err) {
+                    console.error(err)
+                    toast.error('Export server unavailable, exporting loaded expenses')
+                }
+            }
+        }
 
-        const headers = ['Date', 'Category', 'Description', 'Amount', 'Type', 'Added By']
-        const csvContent = [
-            headers.join(','),
-            ...filteredExpenses.map(exp => {
-                const type = exp.category === 'Saving' ? 'Income' : 'Expense'
-                const desc = `"${(exp.description || '').replace(/"/g, '""')}"`
-                const addedBy = exp.profiles ? (exp.profiles.full_name || exp.profiles.username || 'Unknown') : 'Unknown'
-                return `${exp.date},${exp.category},${desc},${exp.amount},${type},${addedBy}`
-            })
-        ].join('\n')
-
-        const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' })
-        const url = URL.createObjectURL(blob)
-        const link = document.createElement('a')
-        link.href = url
-        link.setAttribute('download', `expenses-${selectedMonth}.csv`)
-        document.body.appendChild(link)
-        link.click()
-        document.body.removeChild(link)
+        if (filteredExpenses.length === 0) return toast.error('No expenses to export')
+        downloadLocalExport(filteredExpenses, selectedMonth)
     }
 
     const handleLogout = async () => {
@@ -392,6 +604,7 @@ function ProjectContent() {
         if (error) {
             toast.error('Error logging out')
         } else {
+            await clearOfflineStore().catch(() => {})
             router.push('/login')
         }
     }
@@ -491,19 +704,22 @@ function ProjectContent() {
                     </div>
                 ) : (
                     <div className="space-y-6">
-                        <Dashboard
-                            allExpenses={expenses}
-                            savingGoals={savingGoals}
-                            onAddSavingGoal={() => setShowSavingGoalForm(true)}
-                            expenses={selectedMonth === 'all' ? expenses : expenses.filter(e => e.date.startsWith(selectedMonth))}
-                            onAddExpense={handleAddExpense}
-                            totalIncome={totalIncome}
-                            totalExpenses={totalExpenses}
-                            balance={balance}
-                            totalSavings={totalSavings}
-                            creditCardDebt={creditCardDebt}
-                            isSingleMonthView={selectedMonth !== 'all'}
-                        />
+                        <Profiler id="Dashboard" onRender={onRenderProfile}>
+                            <Dashboard
+                                rollup={rollup}
+                                selectedMonth={selectedMonth}
+                                savingGoals={savingGoals}
+                                onAddSavingGoal={() => setShowSavingGoalForm(true)}
+                                onAddExpense={handleAddExpense}
+                                totalIncome={totalIncome}
+                                totalExpenses={totalExpenses}
+                                balance={balance}
+                                totalSavings={totalSavings}
+                                creditCardDebt={creditCardDebt}
+                                isSingleMonthView={selectedMonth !== 'all'}
+                                budgetTarget={budgetTarget}
+                            />
+                        </Profiler>
 
                         <Modal
                             isOpen={showForm}
@@ -587,15 +803,25 @@ function ProjectContent() {
                             </form>
                         </Modal>
 
-                        <ExpenseList
-                            expenses={filteredExpenses}
-                            onDelete={() => currentProject && fetchExpenses(currentProject.id)}
-                            onEdit={(expense) => {
-                                setEditingExpense(expense)
-                                setShowForm(true)
-                                window.scrollTo({ top: 0, behavior: 'smooth' })
-                            }}
-                        />
+                        <Profiler id="ExpenseList" onRender={onRenderProfile}>
+                            <ExpenseList
+                                projectId={currentProject?.id}
+                                expenses={filteredExpenses}
+                                members={members}
+                                hasMore={selectedMonth === 'all' && hasMoreHistory}
+                                loadingMore={loadingMore}
+                                onLoadMore={() => {
+                                    if (!currentProject || loadingMore) return
+                                    loadMoreHistory(currentProject.id, historyCursor)
+                                }}
+                                onDelete={(expenseId) => dispatch({ type: 'remove', id: expenseId })}
+                                onEdit={(expense) => {
+                                    setEditingExpense(expense)
+                                    setShowForm(true)
+                                    window.scrollTo({ top: 0, behavior: 'smooth' })
+                                }}
+                            />
+                        </Profiler>
                     </div>
                 )}
             </div>
@@ -4,6 +4,8 @@ import { useState, useMemo } from 'react'
 import { PieChart, Pie, Cell, ResponsiveContainer, BarChart, Bar, XAxis, YAxis, Tooltip as RechartsTooltip, CartesianGrid, Legend } from 'recharts'
 import { Wallet, TrendingUp, TrendingDown, Activity, ArrowUpRight, ArrowDownRight, DollarSign, PiggyBank, PlusCircle, Eye, EyeOff } from 'lucide-react'
 import { cn } from '../lib/utils'
+import { RollupRow, categoryTotalsFromRollup, monthlyHistoryFromRollup, budgetLimitFromRollup } from '../lib/rollup'
+import { timed } from '../lib/perf'
 import { Modal } from './Modal'
 import { ExpenseForm } from './ExpenseForm'
 
@@ -26,7 +28,7 @@ export type SavingGoal = {
     current_amount: number
 }
 
-export function Dashboard({ expenses, allExpenses = [], savingGoals = [], onAddExpense, onAddSavingGoal, totalIncome, totalExpenses, balance, totalSavings, creditCardDebt = 0, isSingleMonthView = false }: { expenses: Expense[], allExpenses?: Expense[], savingGoals?: SavingGoal[], onAddExpense: (expense: Omit<Expense, 'id'>) => void, onAddSavingGoal?: () => void, totalIncome: number, totalExpenses: number, balance: number, totalSavings: number, creditCardDebt?: number, isSingleMonthView?: boolean }) {
+export function Dashboard({ rollup = [], selectedMonth = 'all', savingGoals = [], onAddExpense, onAddSavingGoal, totalIncome, totalExpenses, balance, totalSavings, creditCardDebt = 0, isSingleMonthView = false, budgetTarget = null }: { rollup?: RollupRow[], selectedMonth?: string, savingGoals?: SavingGoal[], onAddExpense: (expense: Omit<Expense, 'id'>) => void, onAddSavingGoal?: () => void, totalIncome: number, totalExpenses: number, balance: number, totalSavings: number, creditCardDebt?: number, isSingleMonthView?: boolean, budgetTarget?: number | null }) {
     const [selectedHistoryCategory, setSelectedHistoryCategory] = useState<'All' | 'Living' | 'Playing' | 'Saving'>('All')
     const [isAddModalOpen, setIsAddModalOpen] = useState(false)
     const [isBalanceHidden, setIsBalanceHidden] = useState(true)
@@ -34,52 +36,19 @@ export function Dashboard({ expenses, allExpenses = [], savingGoals = [], onAddE
 
     // Calculate totals per category for Pie Chart
     const categoryTotals = useMemo(() => {
-        const totals = {
-            Living: 0,
-            Playing: 0,
-            Saving: 0
-        }
-        expenses.forEach(exp => {
-            if (exp.category !== 'Income') {
-                totals[exp.category] += exp.amount
-            }
-        })
+        const totals = timed('categoryTotals', 'compute', () => categoryTotalsFromRollup(rollup, selectedMonth))
         return [
             { name: 'Living', value: totals.Living, color: '#3b82f6' }, // Blue-500
             { name: 'Playing', value: totals.Playing, color: '#ef4444' }, // Red-500
             { name: 'Saving', value: totals.Saving, color: '#10b981' }, // Emerald-500
         ].filter(item => item.value > 0)
-    }, [expenses])
+    }, [rollup, selectedMonth])
 
-    // Prepare data for Monthly Spending History Bar Chart
-    const monthlyHistory = useMemo(() => {
-        const history: Record<string, { name: string, Living: number, Playing: number, Saving: number, total: number }> = {}
-
-        // Sort expenses by date ascending to build history correctly
-        const sortedExpenses = [...expenses].sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime())
-
-        sortedExpenses.forEach(exp => {
-            if (exp.category === 'Income') return
-
-            const date = new Date(exp.date)
-            const monthKey = `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}` // YYYY-MM
-            const monthName = date.toLocaleDateString('id-ID', { month: 'short', year: '2-digit' })
-
-            if (!history[monthKey]) {
-                history[monthKey] = { name: monthName, Living: 0, Playing: 0, Saving: 0, total: 0 }
-            }
-
-            history[monthKey][exp.category] += exp.amount
-            history[monthKey].total += exp.amount
-        })
-
-        // Fill in missing months if needed, or just return existing
-        // For now, let's just return the last 6 months present in data or empty
-        const keys = Object.keys(history).sort()
-        const recentKeys = keys.slice(-6) // Last 6 months
-
-        return recentKeys.map(key => history[key])
-    }, [expenses])
+    // Prepare data for Monthly Spending History Bar Chart (last 6 months in the rollup)
+    const monthlyHistory = useMemo(
+        () => timed('monthlyHistory', 'compute', () => monthlyHistoryFromRollup(rollup, selectedMonth), () => ({ rows: rollup.length })),
+        [rollup, selectedMonth]
+    )
 
     const formatCurrency = (amount: number) => {
         return new Intl.NumberFormat('id-ID', {
@@ -90,38 +59,11 @@ export function Dashboard({ expenses, allExpenses = [], savingGoals = [], onAddE
         }).format(amount)
     }
 
-    // AI Dynamic Budget Target Logic
-    const budgetLimit = useMemo(() => {
-        if (!allExpenses || allExpenses.length === 0) return 0 // Default boundary
-
-        const currentDate = new Date()
-        const currentMonthKey = `${currentDate.getFullYear()}-${String(currentDate.getMonth() + 1).padStart(2, '0')}`
-
-        const historicalSpendingByMonth: Record<string, number> = {}
-
-        allExpenses.forEach(exp => {
-            // Target is based on Necessities and Wants (Living & Playing)
-            if (exp.category === 'Living' || exp.category === 'Playing') {
-                const d = new Date(exp.date)
-                const monthKey = `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}`
-
-                // Exclude current month so the target is based on completed past habits
-                if (monthKey !== currentMonthKey) {
-                    if (!historicalSpendingByMonth[monthKey]) historicalSpendingByMonth[monthKey] = 0
-                    historicalSpendingByMonth[monthKey] += exp.amount
-                }
-            }
-        })
-
-        const pastMonths = Object.values(historicalSpendingByMonth)
-
-        // If no prior history, use current month's expenses or 5M as baseline to start
-        if (pastMonths.length === 0) return 5000000
-
-        // Calculate average of historical monthly expenditures
-        const totalPastSpending = pastMonths.reduce((sum, val) => sum + val, 0)
-        return Math.round(totalPastSpending / pastMonths.length)
-    }, [allExpenses])
+    // AI Dynamic Budget Target Logic: the batch-computed target, or the same average over closed months in the rollup
+    const budgetLimit = useMemo(
+        () => budgetTarget ?? timed('budgetLimit', 'compute', () => budgetLimitFromRollup(rollup), () => ({ rows: rollup.length })),
+        [budgetTarget, rollup]
+    )
 
     const isOverBudget = totalExpenses > budgetLimit
     const budgetHealthColor = isOverBudget ? 'text-red-500' : 'text-emerald-500'
@@ -265,10 +207,8 @@ export function Dashboard({ expenses, allExpenses = [], savingGoals = [], onAddE
                     ) : (
                         <div className="space-y-5">
                             {savingGoals.map(goal => {
-                                // Dynamically calculate current_amount based on all historical expenses
-                                const currentSaved = allExpenses
-                                    .filter(e => e.category === 'Saving' && e.sub_category === goal.sub_category)
-                                    .reduce((sum, e) => sum + e.amount, 0)
+                                // Maintained by the expenses triggers, see add_saving_goal_progress.sql
+                                const currentSaved = Number(goal.current_amount) || 0
 
                                 const percent = Math.min(100, Math.round((currentSaved / goal.target_amount) * 100))
                                 return (
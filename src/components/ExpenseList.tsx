@@ -3,8 +3,13 @@
 import { format } from 'date-fns' // You might need to install date-fns or just use native Date
 import { Home, Gamepad2, PiggyBank, Trash2, Pencil, Banknote, ChevronDown, ChevronUp, Search } from 'lucide-react'
 import { supabase } from '../lib/supabase' // Use global Client for deletion
-import { useState, useMemo } from 'react'
+import { useState, useMemo, useEffect, useRef } from 'react'
 import { cn } from '../lib/utils'
+import { Member, memberName } from '../lib/columnar'
+import { buildExpenseIndex, expenseFlow, queryExpenseIndex, sumFlows } from '../lib/expenseIndex'
+import { searchExpenses, SearchCursor, SearchFilters } from '../lib/expenses'
+import { timed } from '../lib/perf'
+import { fetchRangeFlow } from '../lib/rollup'
 
 type Expense = {
     id: string
@@ -19,7 +24,15 @@ type Expense = {
     profiles?: any
 }
 
-export function ExpenseList({ expenses, onDelete, onEdit }: { expenses: Expense[], onDelete: () => void, onEdit: (expense: Expense) => void }) {
+// Rows have a fixed height so only the visible window needs to be rendered
+const ROW_HEIGHT = 72
+const LIST_HEIGHT = 576
+const OVERSCAN = 6
+const SEARCH_DEBOUNCE_MS = 250
+
+const currencyFormatter = new Intl.NumberFormat('id-ID', { style: 'currency', currency: 'IDR' })
+
+export function ExpenseList({ projectId, expenses, members = [], onDelete, onEdit, hasMore = false, loadingMore = false, onLoadMore }: { projectId?: string, expenses: Expense[], members?: Member[], onDelete: (id: string) => void, onEdit: (expense: Expense) => void, hasMore?: boolean, loadingMore?: boolean, onLoadMore?: () => void }) {
     const [deletingId, setDeletingId] = useState<string | null>(null)
     const [filterCategory, setFilterCategory] = useState<'All' | 'Living' | 'Playing' | 'Saving' | 'Income'>('All')
     const [filterSubCategory, setFilterSubCategory] = useState<string>('All')
@@ -27,8 +40,16 @@ export function ExpenseList({ expenses, onDelete, onEdit }: { expenses: Expense[
     const [filterStartDate, setFilterStartDate] = useState<string>('')
     const [filterEndDate, setFilterEndDate] = useState<string>('')
     const [searchQuery, setSearchQuery] = useState<string>('')
+    const [debouncedQuery, setDebouncedQuery] = useState<string>('')
     const [showDatePicker, setShowDatePicker] = useState<boolean>(false)
     const [sortOrder, setSortOrder] = useState<'newest' | 'oldest' | 'highest' | 'lowest'>('newest')
+    const [scrollTop, setScrollTop] = useState(0)
+    const listRef = useRef<HTMLDivElement>(null)
+
+    useEffect(() => {
+        const timer = setTimeout(() => setDebouncedQuery(searchQuery), SEARCH_DEBOUNCE_MS)
+        return () => clearTimeout(timer)
+    }, [searchQuery])
 
     const SUB_CATEGORIES: Record<string, string[]> = {
         Living: ['Makan', 'Groceries', 'Laundry', 'Wifi', 'Listrik', 'Uang Kos', 'Transport', 'Lainnya'],
@@ -37,75 +58,133 @@ export function ExpenseList({ expenses, onDelete, onEdit }: { expenses: Expense[
         Income: ['Gaji', 'Bonus', 'Hadiah', 'Lainnya']
     }
 
-    const uniqueUsers = useMemo(() => {
-        const usersMap = new Map<string, string>()
-        expenses.forEach(exp => {
-            if (exp.user_id && exp.profiles) {
-                const name = exp.profiles.full_name || exp.profiles.username || 'Unknown'
-                usersMap.set(exp.user_id, name)
-            }
-        })
-        return Array.from(usersMap.entries()).map(([id, name]) => ({ id, name }))
-    }, [expenses])
-
-    const filteredExpenses = useMemo(() => {
-        let result = [...expenses]
-
-        // Filter Category
-        if (filterCategory !== 'All') {
-            result = result.filter(exp => exp.category === filterCategory)
-
-            // Filter Sub Category
-            if (filterSubCategory !== 'All') {
-                result = result.filter(exp => exp.sub_category === filterSubCategory)
-            }
-        }
+    // The member table comes with each page, so there is no need to scan the rows for authors
+    const uniqueUsers = useMemo(() => members.map(m => ({ id: m.id, name: memberName(m) })), [members])
 
-        // Filter User
-        if (filterUser !== 'All') {
-            result = result.filter(exp => exp.user_id === filterUser)
+    // Rebuilt only when the rows change, not on every filter change or keystroke
+    const index = useMemo(() => timed('buildExpenseIndex', 'compute', () => buildExpenseIndex(expenses), () => ({ rows: expenses.length })), [expenses])
+
+    // Without the full history loaded, a search goes to the server instead of the cached rows
+    const serverSearch = Boolean(projectId) && hasMore && debouncedQuery.trim().length > 0
+    const [searchResults, setSearchResults] = useState<{ rows: Expense[], cursor: SearchCursor | null }>({ rows: [], cursor: null })
+    const [searching, setSearching] = useState(false)
+    const searchRequest = useRef(0)
+
+    const searchFilters = useMemo((): SearchFilters => ({
+        category: filterCategory !== 'All' ? filterCategory : undefined,
+        sub_category: filterCategory !== 'All' && filterSubCategory !== 'All' ? filterSubCategory : undefined,
+        user_id: filterUser !== 'All' ? filterUser : undefined,
+        start_date: filterStartDate || undefined,
+        end_date: filterEndDate || undefined
+    }), [filterCategory, filterSubCategory, filterUser, filterStartDate, filterEndDate])
+
+    const runSearch = async (cursor: SearchCursor | null) => {
+        if (!projectId) return
+        // Only the latest request may write results, older ones are answers to stale queries
+        const request = ++searchRequest.current
+        setSearching(true)
+        try {
+            const result = await searchExpenses(projectId, debouncedQuery.trim(), searchFilters, cursor)
+            if (request !== searchRequest.current) return
+            setSearchResults(prev => ({
+                rows: cursor ? [...prev.rows, ...result.rows] : result.rows,
+                cursor: result.nextCursor
+            }))
+        } catch (error) {
+            console.error('Error searching expenses:', error)
+        } finally {
+            if (request === searchRequest.current) setSearching(false)
         }
+    }
 
-        // Filter Date Range
-        if (filterStartDate) {
-            result = result.filter(exp => exp.date >= filterStartDate)
+    useEffect(() => {
+        if (!serverSearch) {
+            searchRequest.current++
+            setSearchResults({ rows: [], cursor: null })
+            setSearching(false)
+            return
         }
-        if (filterEndDate) {
-            result = result.filter(exp => exp.date <= filterEndDate + 'T23:59:59')
+        runSearch(null)
+    }, [serverSearch, debouncedQuery, searchFilters])
+
+    // Server results are already filtered and ranked by relevance, so there are no local matches
+    const matches = useMemo(() => {
+        if (serverSearch) return null
+        return timed('queryExpenseIndex', 'compute', () => queryExpenseIndex(index, {
+            category: filterCategory,
+            subCategory: filterSubCategory,
+            user: filterUser,
+            startDate: filterStartDate,
+            endDate: filterEndDate,
+            search: debouncedQuery
+        }, sortOrder), m => ({ rows: m.length }))
+    }, [serverSearch, index, filterCategory, filterSubCategory, filterUser, filterStartDate, filterEndDate, sortOrder, debouncedQuery])
+
+    const filteredExpenses = useMemo(
+        () => matches ? matches.map(i => expenses[i]) : searchResults.rows,
+        [matches, expenses, searchResults]
+    )
+
+    // A date range reaching into history that is not loaded yet is totalled on the server.
+    // get_expense_totals groups by category only, so this covers the date and category filters.
+    const serverRangeTotal = Boolean(projectId) && hasMore && Boolean(filterStartDate || filterEndDate) &&
+        filterUser === 'All' && (filterCategory === 'All' || filterSubCategory === 'All') && !debouncedQuery.trim()
+    const [rangeFlow, setRangeFlow] = useState<number | null>(null)
+
+    useEffect(() => {
+        setRangeFlow(null)
+        if (!serverRangeTotal || !projectId) return
+        let current = true
+        fetchRangeFlow(projectId, filterStartDate, filterEndDate, filterCategory !== 'All' ? filterCategory : undefined)
+            .then(flow => { if (current) setRangeFlow(flow) })
+            .catch(error => console.error('Error fetching totals:', error))
+        return () => { current = false }
+    }, [serverRangeTotal, projectId, filterStartDate, filterEndDate, filterCategory, expenses])
+
+    const filteredTotal = useMemo(
+        () => rangeFlow ?? (matches ? sumFlows(index, matches) : searchResults.rows.reduce((total, exp) => total + expenseFlow(exp), 0)),
+        [rangeFlow, matches, index, searchResults]
+    )
+
+    // Dates repeat a lot, so each distinct day is formatted once
+    const dateLabels = useRef(new Map<string, string>())
+    const formatDay = (date: string) => {
+        let label = dateLabels.current.get(date)
+        if (!label) {
+            label = format(new Date(date), 'MMM d, yyyy')
+            dateLabels.current.set(date, label)
         }
+        return label
+    }
+
+    // Visible window of the virtualized list
+    const firstVisible = Math.max(0, Math.floor(scrollTop / ROW_HEIGHT) - OVERSCAN)
+    const lastVisible = Math.min(filteredExpenses.length, Math.ceil((scrollTop + LIST_HEIGHT) / ROW_HEIGHT) + OVERSCAN)
+    const visibleExpenses = filteredExpenses.slice(firstVisible, lastVisible)
+
+    // Jump back to the top when the result set changes
+    useEffect(() => {
+        if (listRef.current) listRef.current.scrollTop = 0
+        setScrollTop(0)
+    }, [filterCategory, filterSubCategory, filterUser, filterStartDate, filterEndDate, sortOrder, debouncedQuery])
+
+    // A filter that matches few (or no) rows would keep the list short however much history
+    // is loaded, so older pages are then only loaded on request
+    const filtering = filterCategory !== 'All' || filterUser !== 'All' || Boolean(filterStartDate || filterEndDate || debouncedQuery.trim())
+
+    // Ask for the next page (of search results, or of older history) once the window nears
+    // the end of what is loaded, or straight away if the rows do not even fill the list
+    useEffect(() => {
+        const nearEnd = lastVisible >= filteredExpenses.length - OVERSCAN
+        if (!nearEnd) return
 
-        // Filter Search Query
-        if (searchQuery.trim()) {
-            const query = searchQuery.toLowerCase()
-            result = result.filter(exp => exp.description.toLowerCase().includes(query))
+        if (serverSearch) {
+            if (searchResults.cursor && !searching) runSearch(searchResults.cursor)
+            return
         }
 
-        // Sort
-        result.sort((a, b) => {
-            switch (sortOrder) {
-                case 'newest':
-                    return new Date(b.date).getTime() - new Date(a.date).getTime()
-                case 'oldest':
-                    return new Date(a.date).getTime() - new Date(b.date).getTime()
-                case 'highest':
-                    return b.amount - a.amount
-                case 'lowest':
-                    return a.amount - b.amount
-                default:
-                    return 0
-            }
-        })
-
-        return result
-    }, [expenses, filterCategory, filterSubCategory, filterUser, filterStartDate, filterEndDate, sortOrder, searchQuery])
-
-    const filteredTotal = useMemo(() => {
-        return filteredExpenses.reduce((total, exp) => {
-            const isPositiveFlow = exp.category === 'Income' || (exp.category === 'Saving' && exp.amount < 0);
-            const amount = isPositiveFlow ? Math.abs(exp.amount) : -Math.abs(exp.amount);
-            return total + amount;
-        }, 0);
-    }, [filteredExpenses])
+        if (!filtering && hasMore && onLoadMore && !loadingMore) onLoadMore()
+    }, [serverSearch, searching, searchResults.cursor, filtering, hasMore, loadingMore, lastVisible, filteredExpenses.length])
 
     const handleDelete = async (id: string) => {
         if (!confirm('Are you sure you want to delete this expense?')) return
@@ -116,7 +195,8 @@ export function ExpenseList({ expenses, onDelete, onEdit }: { expenses: Expense[
 
             const { error } = await supabase.from('expenses').delete().eq('id', id)
             if (error) throw error
-            onDelete()
+            onDelete(id)
+            setSearchResults(prev => ({ ...prev, rows: prev.rows.filter(exp => exp.id !== id) }))
         } catch (error) {
             console.error('Error deleting:', error)
             alert('Failed to delete expense')
@@ -271,20 +351,30 @@ export function ExpenseList({ expenses, onDelete, onEdit }: { expenses: Expense[
                 </div>
             )}
 
-            <div className="divide-y divide-gray-100 dark:divide-gray-700">
+            <div
+                ref={listRef}
+                onScroll={(e) => setScrollTop(e.currentTarget.scrollTop)}
+                className="overflow-y-auto"
+                style={{ maxHeight: LIST_HEIGHT }}
+            >
                 {filteredExpenses.length === 0 ? (
                     <div className="p-8 text-center text-gray-500 dark:text-gray-400">
                         No expenses recorded yet. Start by adding one!
                     </div>
                 ) : (
-                    filteredExpenses.map((expense) => {
+                    <div style={{ height: filteredExpenses.length * ROW_HEIGHT, position: 'relative' }}>
+                    {visibleExpenses.map((expense, offset) => {
                         const isIncome = expense.category === 'Income';
                         const isLiving = expense.category === 'Living';
                         const isPlaying = expense.category === 'Playing';
                         const isSaving = expense.category === 'Saving';
 
                         return (
-                            <div key={expense.id} className="px-3 sm:px-4 py-3 flex items-center justify-between hover:bg-gray-50 dark:hover:bg-gray-700/50 transition-colors group gap-2">
+                            <div
+                                key={expense.id}
+                                className="absolute inset-x-0 px-3 sm:px-4 py-3 flex items-center justify-between border-b border-gray-100 dark:border-gray-700 hover:bg-gray-50 dark:hover:bg-gray-700/50 transition-colors group gap-2"
+                                style={{ top: (firstVisible + offset) * ROW_HEIGHT, height: ROW_HEIGHT }}
+                            >
                                 <div className="flex items-center gap-3 min-w-0 flex-1">
                                     <div className={cn(
                                         "p-2 rounded-lg shrink-0",
@@ -300,8 +390,8 @@ export function ExpenseList({ expenses, onDelete, onEdit }: { expenses: Expense[
                                     </div>
                                     <div className="min-w-0">
                                         <h4 className="font-medium text-sm sm:text-base text-gray-900 dark:text-white truncate">{expense.description}</h4>
-                                        <div className="flex flex-wrap items-center gap-1 mt-0.5 text-xs text-gray-500 dark:text-gray-400">
-                                            <span>{format(new Date(expense.date), 'MMM d, yyyy')}</span>
+                                        <div className="flex items-center gap-1 mt-0.5 text-xs text-gray-500 dark:text-gray-400 overflow-hidden whitespace-nowrap">
+                                            <span>{formatDay(expense.date)}</span>
                                             <span>•</span>
                                             <span>{expense.category}</span>
                                             {expense.sub_category && (
@@ -328,7 +418,7 @@ export function ExpenseList({ expenses, onDelete, onEdit }: { expenses: Expense[
                                         "font-semibold text-sm sm:text-base",
                                         (isIncome || (isSaving && expense.amount < 0)) ? "text-green-600 dark:text-green-400" : "text-gray-900 dark:text-white"
                                     )}>
-                                        {(isIncome || (isSaving && expense.amount < 0)) ? '+' : '-'}{new Intl.NumberFormat('id-ID', { style: 'currency', currency: 'IDR' }).format(Math.abs(expense.amount))}
+                                        {(isIncome || (isSaving && expense.amount < 0)) ? '+' : '-'}{currencyFormatter.format(Math.abs(expense.amount))}
                                     </span>
                                     <div className="flex items-center gap-1 opacity-100 sm:opacity-0 group-hover:opacity-100 transition-opacity">
                                         <button
@@ -350,9 +440,27 @@ export function ExpenseList({ expenses, onDelete, onEdit }: { expenses: Expense[
                                 </div>
                             </div>
                         );
-                    })
+                    })}
+                    </div>
                 )}
             </div>
+
+            {serverSearch ? (
+                <div className="p-4 text-center text-xs text-gray-400 dark:text-gray-500 border-t border-gray-100 dark:border-gray-700">
+                    {searching ? 'Searching all transactions...' : 'Showing matches from all transactions'}
+                </div>
+            ) : hasMore && (
+                <div className="p-4 text-center text-xs text-gray-400 dark:text-gray-500 border-t border-gray-100 dark:border-gray-700">
+                    {loadingMore ? 'Loading older transactions...' : filtering ? (
+                        <button
+                            onClick={onLoadMore}
+                            className="font-medium text-indigo-600 hover:text-indigo-500 dark:text-indigo-400 dark:hover:text-indigo-300"
+                        >
+                            Load older transactions
+                        </button>
+                    ) : 'Scroll to load older transactions'}
+                </div>
+            )}
         </div>
     )
 }
@@ -0,0 +1,72 @@
+import { supabase } from './supabase'
+import { Expense, PAGE_SIZE } from './expenses'
+import { RollupRow } from './rollup'
+import { ColumnarExpenses, Member, decodeExpenses } from './columnar'
+import { timed, timedAsync } from './perf'
+
+export type UserProfile = {
+    full_name: string | null
+    username: string | null
+}
+
+export type SavingGoal = {
+    id: string
+    project_id: string
+    name: string
+    sub_category: string
+    target_amount: number
+    current_amount: number // kept up to date by add_saving_goal_progress.sql
+}
+
+export type ProjectBootstrap = {
+    profile: UserProfile | null
+    project: { id: string, name: string, role: 'owner' | 'member' } | null
+    saving_goals: SavingGoal[]
+    expenses: Expense[] // first page of the requested month
+    members: Member[] // authors of those expenses
+    rollup: RollupRow[]
+    budget_target: number | null // from budget_targets.py, null until it has run this month
+}
+
+export type HomeProject = {
+    id: string
+    name: string
+    role: 'owner' | 'member'
+    created_at: string
+    owner_name: string | null
+    owner_username: string | null
+    last_expense_date: string | null
+}
+
+export type HomeBootstrap = {
+    profile: UserProfile | null
+    projects: HomeProject[]
+}
+
+// Everything the project page needs for first paint in one round trip (see add_bootstrap_functions.sql).
+// Pass pageSize 0 when the month's rows are already cached on the device.
+export async function fetchProjectBootstrap(projectId: string, month: string, pageSize: number = PAGE_SIZE): Promise<ProjectBootstrap> {
+    const { data, error } = await timedAsync('get_project_bootstrap', 'call', () => supabase.rpc('get_project_bootstrap', {
+        target_project_id: projectId,
+        target_month: `${month}-01`,
+        page_size: pageSize
+    }))
+
+    if (error) throw error
+
+    const boot = data as Omit<ProjectBootstrap, 'expenses' | 'members'> & { expenses: ColumnarExpenses }
+    const { rows, members } = timed('get_project_bootstrap', 'decode', () => decodeExpenses(boot.expenses), r => ({ rows: r.rows.length }))
+    return {
+        ...boot,
+        expenses: rows,
+        members,
+        rollup: (boot.rollup || []).map(row => ({ ...row, total: Number(row.total) || 0 })),
+        budget_target: boot.budget_target == null ? null : Number(boot.budget_target)
+    }
+}
+
+export async function fetchHomeBootstrap(): Promise<HomeBootstrap> {
+    const { data, error } = await timedAsync('get_home_bootstrap', 'call', () => supabase.rpc('get_home_bootstrap'))
+    if (error) throw error
+    return data as HomeBootstrap
+}
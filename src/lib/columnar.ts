@@ -0,0 +1,65 @@
+import { Expense } from './expenses'
+
+// A project member as sent once per page instead of once per expense row
+export type Member = {
+    id: string
+    full_name: string | null
+    username: string | null
+}
+
+// Shape returned by get_expense_page (see add_columnar_expenses.sql).
+// Every per-row array has the same length; codes index into the dictionaries below.
+export type ColumnarExpenses = {
+    id: string[]
+    date: string[]
+    created_at: string[]
+    amount: (number | string)[]
+    description: (string | null)[]
+    category: number[]
+    sub_category: (number | null)[]
+    source: (number | null)[]
+    user: (number | null)[]
+    categories: string[]
+    sub_categories: string[]
+    sources: string[]
+    members: Member[]
+}
+
+export const memberName = (member: Member) => member.full_name || member.username || 'Unknown'
+
+// Turn a columnar page back into rows. Rows by the same author share one profile object.
+export function decodeExpenses(page: ColumnarExpenses): { rows: Expense[], members: Member[] } {
+    const members = page.members || []
+    const profiles = members.map(m => ({ full_name: m.full_name, username: m.username }))
+    const rows: Expense[] = new Array(page.id.length)
+
+    for (let i = 0; i < page.id.length; i++) {
+        const sub = page.sub_category[i]
+        const source = page.source[i]
+        const user = page.user[i]
+
+        rows[i] = {
+            id: page.id[i],
+            date: page.date[i],
+            created_at: page.created_at[i],
+            amount: Number(page.amount[i]) || 0,
+            description: page.description[i] || '',
+            category: page.categories[page.category[i]] as Expense['category'],
+            sub_category: sub === null ? undefined : page.sub_categories[sub],
+            source: source === null ? undefined : page.sources[source] as Expense['source'],
+            user_id: user === null ? undefined : members[user].id,
+            profiles: user === null ? undefined : profiles[user]
+        }
+    }
+
+    return { rows, members }
+}
+
+// Union of member tables from several pages
+export function mergeMembers(existing: Member[], incoming: Member[]): Member[] {
+    if (incoming.every(m => existing.some(e => e.id === m.id))) return existing
+
+    const byId = new Map(existing.map(m => [m.id, m]))
+    incoming.forEach(m => byId.set(m.id, m))
+    return Array.from(byId.values())
+}
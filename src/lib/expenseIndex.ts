@@ -0,0 +1,163 @@
+import { Expense } from './expenses'
+
+// Precomputed lookup structures over one expense list, rebuilt only when the list changes.
+// Filters intersect bitsets instead of rescanning the rows, and every sort order is
+// a precomputed permutation, so a keystroke or filter change is a single pass.
+export type ExpenseIndex = {
+    size: number
+    searchKeys: string[] // lowercased descriptions
+    amounts: Float64Array // whole rupiah, exact as doubles
+    flows: Float64Array // each row's effect on the list total, see expenseFlow
+    sortedDates: string[] // dates in ascending order, for binary search
+    order: Record<SortOrder, Int32Array> // row indices in each sort order
+    byCategory: Map<string, Uint32Array>
+    bySubCategory: Map<string, Uint32Array> // keyed by `${category}|${sub_category}`
+    byUser: Map<string, Uint32Array>
+}
+
+export type SortOrder = 'newest' | 'oldest' | 'highest' | 'lowest'
+
+export type ExpenseFilters = {
+    category: string // 'All' to disable
+    subCategory: string // 'All' to disable, only used with a category
+    user: string // 'All' to disable
+    startDate: string // YYYY-MM-DD inclusive, '' to disable
+    endDate: string // YYYY-MM-DD inclusive, '' to disable
+    search: string
+}
+
+const wordsFor = (size: number) => Math.ceil(size / 32)
+
+// Income and Saving withdrawals ("Cover for:" rows) count up, everything else down
+export function expenseFlow(exp: Pick<Expense, 'category' | 'amount'>): number {
+    const isPositiveFlow = exp.category === 'Income' || (exp.category === 'Saving' && exp.amount < 0)
+    return isPositiveFlow ? Math.abs(exp.amount) : -Math.abs(exp.amount)
+}
+
+function setBit(bits: Uint32Array, i: number) {
+    bits[i >>> 5] |= 1 << (i & 31)
+}
+
+const hasBit = (bits: Uint32Array, i: number) => (bits[i >>> 5] & (1 << (i & 31))) !== 0
+
+function addToGroup(groups: Map<string, Uint32Array>, key: string, i: number, size: number) {
+    let bits = groups.get(key)
+    if (!bits) {
+        bits = new Uint32Array(wordsFor(size))
+        groups.set(key, bits)
+    }
+    setBit(bits, i)
+}
+
+// Stable sort of row indices
+function sortedIndices(size: number, compare: (a: number, b: number) => number): Int32Array {
+    const indices = Array.from({ length: size }, (_, i) => i)
+    indices.sort((a, b) => compare(a, b) || a - b)
+    return Int32Array.from(indices)
+}
+
+export function buildExpenseIndex(expenses: Expense[]): ExpenseIndex {
+    const size = expenses.length
+    const byCategory = new Map<string, Uint32Array>()
+    const bySubCategory = new Map<string, Uint32Array>()
+    const byUser = new Map<string, Uint32Array>()
+    const searchKeys: string[] = new Array(size)
+    const amounts = new Float64Array(size)
+    const flows = new Float64Array(size)
+
+    expenses.forEach((exp, i) => {
+        searchKeys[i] = (exp.description || '').toLowerCase()
+        amounts[i] = exp.amount
+        flows[i] = expenseFlow(exp)
+        addToGroup(byCategory, exp.category, i, size)
+        if (exp.sub_category) addToGroup(bySubCategory, `${exp.category}|${exp.sub_category}`, i, size)
+        if (exp.user_id) addToGroup(byUser, exp.user_id, i, size)
+    })
+
+    const byDate = (a: number, b: number) => expenses[a].date < expenses[b].date ? -1 : expenses[a].date > expenses[b].date ? 1 : 0
+    const byAmount = (a: number, b: number) => amounts[a] - amounts[b]
+    const oldest = sortedIndices(size, byDate)
+
+    return {
+        size,
+        searchKeys,
+        amounts,
+        flows,
+        sortedDates: Array.from(oldest, i => expenses[i].date),
+        order: {
+            newest: sortedIndices(size, (a, b) => byDate(b, a)),
+            oldest,
+            highest: sortedIndices(size, (a, b) => byAmount(b, a)),
+            lowest: sortedIndices(size, byAmount)
+        },
+        byCategory,
+        bySubCategory,
+        byUser
+    }
+}
+
+// First position in `sorted` whose value is >= value (or > value when `after` is set)
+function bound(sorted: string[], value: string, after: boolean): number {
+    let lo = 0
+    let hi = sorted.length
+    while (lo < hi) {
+        const mid = (lo + hi) >>> 1
+        if (sorted[mid] < value || (after && sorted[mid] === value)) lo = mid + 1
+        else hi = mid
+    }
+    return lo
+}
+
+function intersect(target: Uint32Array, bits: Uint32Array | undefined) {
+    if (!bits) {
+        target.fill(0)
+        return
+    }
+    for (let w = 0; w < target.length; w++) target[w] &= bits[w]
+}
+
+// Row indices matching every active filter, in the requested sort order
+export function queryExpenseIndex(index: ExpenseIndex, filters: ExpenseFilters, sortOrder: SortOrder): number[] {
+    const matches = new Uint32Array(wordsFor(index.size)).fill(0xffffffff)
+
+    if (filters.category !== 'All') {
+        intersect(matches, index.byCategory.get(filters.category))
+        if (filters.subCategory !== 'All') {
+            intersect(matches, index.bySubCategory.get(`${filters.category}|${filters.subCategory}`))
+        }
+    }
+
+    if (filters.user !== 'All') {
+        intersect(matches, index.byUser.get(filters.user))
+    }
+
+    if (filters.startDate || filters.endDate) {
+        const from = filters.startDate ? bound(index.sortedDates, filters.startDate, false) : 0
+        const to = filters.endDate ? bound(index.sortedDates, filters.endDate, true) : index.size
+        const inRange = new Uint32Array(matches.length)
+        const oldest = index.order.oldest
+        for (let p = from; p < to; p++) setBit(inRange, oldest[p])
+        intersect(matches, inRange)
+    }
+
+    const query = filters.search.trim().toLowerCase()
+    const result: number[] = []
+    const order = index.order[sortOrder]
+
+    for (let p = 0; p < order.length; p++) {
+        const i = order[p]
+        if (!hasBit(matches, i)) continue
+        if (query && !index.searchKeys[i].includes(query)) continue
+        result.push(i)
+    }
+
+    return result
+}
+
+// Net of the given rows, as shown above the list
+export function sumFlows(index: ExpenseIndex, rows: number[]): number {
+    const flows = index.flows
+    let total = 0
+    for (let p = 0; p < rows.length; p++) total += flows[rows[p]]
+    return total
+}
@@ -0,0 +1,195 @@
+import { Expense, mergeExpenses } from './expenses'
+import { RollupRow } from './rollup'
+import { Member, mergeMembers } from './columnar'
+import { SavingGoal } from './bootstrap'
+
+// In-memory expense list plus the monthly rollup and saving goals it is summarized by.
+// Mutations and realtime events are applied here as deltas, so a single-row
+// change never needs the project to be downloaded again.
+export type ExpenseState = {
+    expenses: Expense[]
+    // Authors of the loaded expenses, one entry per user
+    members: Member[]
+    rollup: RollupRow[]
+    savingGoals: SavingGoal[]
+    // Set when an event touched a row we never loaded, so its old values are unknown
+    rollupStale: boolean
+    // Ids we deleted ourselves, so their tombstone echo is not mistaken for an unknown row
+    recentlyRemoved: string[]
+}
+
+export type ExpenseAction =
+    | { type: 'merge', rows: Expense[], members?: Member[] }
+    | { type: 'sync', rows: Expense[], members: Member[], deleted: string[] }
+    | { type: 'reset' }
+    | { type: 'setRollup', rollup: RollupRow[] }
+    | { type: 'setSavingGoals', savingGoals: SavingGoal[] }
+    | { type: 'optimisticInsert', rows: Expense[] }
+    | { type: 'ackInsert', tempIds: string[], rows: Expense[] }
+    | { type: 'rollback', tempIds: string[] }
+    | { type: 'upsert', row: Expense, event?: 'INSERT' | 'UPDATE' }
+    | { type: 'remove', id: string }
+    | { type: 'tombstone', id: string }
+
+export const initialExpenseState: ExpenseState = { expenses: [], members: [], rollup: [], savingGoals: [], rollupStale: false, recentlyRemoved: [] }
+
+export const TEMP_ID_PREFIX = 'temp-'
+
+export const isPending = (expense: Expense) => expense.id.startsWith(TEMP_ID_PREFIX)
+
+let tempCounter = 0
+export const nextTempId = () => `${TEMP_ID_PREFIX}${Date.now()}-${tempCounter++}`
+
+// Rows the server has not acknowledged yet are matched to realtime echoes by content
+const fingerprint = (e: Expense) =>
+    [e.user_id, e.date, e.category, e.sub_category || '', Number(e.amount), e.description].join('|')
+
+// Add (sign = 1) or remove (sign = -1) one expense from its rollup bucket, mirroring add_monthly_rollup.sql
+export function applyRollupDelta(rollup: RollupRow[], expense: Expense, sign: 1 | -1): RollupRow[] {
+    const month = `${expense.date.substring(0, 7)}-01`
+    const subCategory = expense.sub_category || ''
+    const source = expense.source || 'Balance'
+    const amount = (Number(expense.amount) || 0) * sign
+
+    const index = rollup.findIndex(r =>
+        r.month === month && r.category === expense.category && r.sub_category === subCategory && r.source === source
+    )
+
+    if (index === -1) {
+        if (sign < 0) return rollup
+        const bucket: RollupRow = { month, category: expense.category, sub_category: subCategory, source, total: amount, row_count: 1 }
+        return [...rollup, bucket].sort((a, b) => a.month.localeCompare(b.month))
+    }
+
+    const bucket = rollup[index]
+    const updated = { ...bucket, total: bucket.total + amount, row_count: bucket.row_count + sign }
+    const next = [...rollup]
+    if (updated.row_count <= 0) next.splice(index, 1)
+    else next[index] = updated
+    return next
+}
+
+// Move the current_amount of every goal on the expense's sub-category, mirroring add_saving_goal_progress.sql
+export function applyGoalDelta(goals: SavingGoal[], expense: Expense, sign: 1 | -1): SavingGoal[] {
+    if (expense.category !== 'Saving' || !goals.some(g => g.sub_category === expense.sub_category)) return goals
+    const amount = (Number(expense.amount) || 0) * sign
+    return goals.map(g => g.sub_category === expense.sub_category
+        ? { ...g, current_amount: (Number(g.current_amount) || 0) + amount }
+        : g)
+}
+
+function applyDelta(state: ExpenseState, expense: Expense, sign: 1 | -1): ExpenseState {
+    return {
+        ...state,
+        rollup: applyRollupDelta(state.rollup, expense, sign),
+        savingGoals: applyGoalDelta(state.savingGoals, expense, sign)
+    }
+}
+
+// Rollup and goals as the server has them, i.e. without rows still waiting to be saved
+export function serverTotals(state: ExpenseState): { rollup: RollupRow[], savingGoals: SavingGoal[] } {
+    return state.expenses.filter(isPending).reduce(
+        (totals, e) => ({
+            rollup: applyRollupDelta(totals.rollup, e, -1),
+            savingGoals: applyGoalDelta(totals.savingGoals, e, -1)
+        }),
+        { rollup: state.rollup, savingGoals: state.savingGoals }
+    )
+}
+
+// Realtime payloads carry no embedded profile, look it up in the member table
+function withProfile(row: Expense, members: Member[]): Expense {
+    if (row.profiles || !row.user_id) return row
+    const member = members.find(m => m.id === row.user_id)
+    return member ? { ...row, profiles: { full_name: member.full_name, username: member.username } } : row
+}
+
+function removeRows(state: ExpenseState, ids: Set<string>): ExpenseState {
+    const removed = state.expenses.filter(e => ids.has(e.id))
+    const next = removed.reduce((s, e) => applyDelta(s, e, -1), state)
+    return { ...next, expenses: state.expenses.filter(e => !ids.has(e.id)) }
+}
+
+function upsertRow(state: ExpenseState, incoming: Expense, event: 'INSERT' | 'UPDATE'): ExpenseState {
+    const row = withProfile(incoming, state.members)
+    const existing = state.expenses.find(e => e.id === row.id)
+
+    if (existing) {
+        const next = applyDelta(applyDelta(state, existing, -1), row, 1)
+        return { ...next, expenses: mergeExpenses(state.expenses, [row]) }
+    }
+
+    // A realtime echo of our own insert can arrive before the insert response does
+    const pending = state.expenses.find(e => isPending(e) && fingerprint(e) === fingerprint(row))
+    if (pending) {
+        const next = applyDelta(applyDelta(state, pending, -1), row, 1)
+        return { ...next, expenses: mergeExpenses(state.expenses.filter(e => e.id !== pending.id), [row]) }
+    }
+
+    return {
+        ...applyDelta(state, row, 1),
+        expenses: mergeExpenses(state.expenses, [row]),
+        // An update to a row we never loaded: its old bucket is unknown
+        rollupStale: state.rollupStale || event === 'UPDATE'
+    }
+}
+
+export function expenseReducer(state: ExpenseState, action: ExpenseAction): ExpenseState {
+    switch (action.type) {
+        case 'merge':
+            // Loaded pages are already counted in the rollup and the goals
+            return {
+                ...state,
+                expenses: mergeExpenses(state.expenses, action.rows),
+                members: action.members ? mergeMembers(state.members, action.members) : state.members
+            }
+        case 'sync': {
+            // Delta from get_expense_changes; the rollup is replaced from the server right after
+            const deleted = new Set(action.deleted)
+            const kept = deleted.size ? state.expenses.filter(e => !deleted.has(e.id)) : state.expenses
+            return {
+                ...state,
+                expenses: mergeExpenses(kept, action.rows),
+                members: mergeMembers(state.members, action.members)
+            }
+        }
+        case 'reset':
+            return initialExpenseState
+        case 'setRollup': {
+            // Server totals do not include rows still waiting to be saved (in flight or in the offline outbox)
+            const pending = state.expenses.filter(isPending)
+            const rollup = pending.reduce((r, e) => applyRollupDelta(r, e, 1), action.rollup)
+            return { ...state, rollup, rollupStale: false }
+        }
+        case 'setSavingGoals': {
+            const pending = state.expenses.filter(isPending)
+            const savingGoals = pending.reduce((g, e) => applyGoalDelta(g, e, 1), action.savingGoals)
+            return { ...state, savingGoals }
+        }
+        case 'optimisticInsert':
+            return action.rows.reduce((s, row) => ({
+                ...applyDelta(s, row, 1),
+                expenses: mergeExpenses(s.expenses, [row])
+            }), state)
+        case 'ackInsert': {
+            const withoutTemp = removeRows(state, new Set(action.tempIds))
+            return action.rows.reduce((s, row) => upsertRow(s, row, 'INSERT'), withoutTemp)
+        }
+        case 'rollback':
+            return removeRows(state, new Set(action.tempIds))
+        case 'upsert':
+            return upsertRow(state, action.row, action.event || 'UPDATE')
+        case 'remove': {
+            if (!state.expenses.some(e => e.id === action.id)) return state
+            const removed = removeRows(state, new Set([action.id]))
+            return { ...removed, recentlyRemoved: [...state.recentlyRemoved.slice(-49), action.id] }
+        }
+        case 'tombstone':
+            // A delete in this project (expense_tombstones); one we never loaded still changed the totals
+            if (state.recentlyRemoved.includes(action.id)) return state
+            if (!state.expenses.some(e => e.id === action.id)) return { ...state, rollupStale: true }
+            return removeRows(state, new Set([action.id]))
+        default:
+            return state
+    }
+}
@@ -0,0 +1,175 @@
+import { supabase } from './supabase'
+import { ColumnarExpenses, Member, decodeExpenses, mergeMembers } from './columnar'
+import { timed, timedAsync } from './perf'
+
+export type Expense = {
+    id: string
+    amount: number
+    category: 'Living' | 'Playing' | 'Saving' | 'Income'
+    sub_category?: string
+    description: string
+    date: string
+    created_at?: string
+    source?: 'Balance' | 'Saving' | 'Credit Card'
+    project_id?: string
+    user_id?: string
+    profiles?: {
+        full_name: string | null
+        username: string | null
+    }
+}
+
+// Position of the last row of a page in (date desc, created_at desc, id desc) order
+export type ExpenseCursor = {
+    date: string
+    created_at: string
+    id: string
+}
+
+export type ExpensePage = {
+    rows: Expense[]
+    members: Member[]
+    nextCursor: ExpenseCursor | null
+}
+
+export const PAGE_SIZE = 500
+
+// [first day of month, first day of next month) for a YYYY-MM key
+export function monthRange(month: string): { from: string, to: string } {
+    const [year, m] = month.split('-').map(Number)
+    const nextYear = m === 12 ? year + 1 : year
+    const nextMonth = m === 12 ? 1 : m + 1
+    return {
+        from: `${month}-01`,
+        to: `${nextYear}-${String(nextMonth).padStart(2, '0')}-01`
+    }
+}
+
+// Fetch one page of a project's expenses, newest first, in the columnar shape of get_expense_page.
+// `from` is inclusive and `to` exclusive; pass the previous page's `nextCursor` to continue.
+export async function fetchExpensePage(
+    projectId: string,
+    { from, to, cursor, limit = PAGE_SIZE }: { from?: string, to?: string, cursor?: ExpenseCursor | null, limit?: number } = {}
+): Promise<ExpensePage> {
+    const { data, error } = await timedAsync('get_expense_page', 'call', () => supabase.rpc('get_expense_page', {
+        target_project_id: projectId,
+        from_date: from ?? null,
+        to_date: to ?? null,
+        cursor_date: cursor?.date ?? null,
+        cursor_created_at: cursor?.created_at ?? null,
+        cursor_id: cursor?.id ?? null,
+        page_size: limit
+    }))
+
+    if (error) throw error
+
+    const { rows, members } = timed('get_expense_page', 'decode', () => decodeExpenses(data as ColumnarExpenses), countRows)
+    return { rows, members, nextCursor: cursorAfter(rows, limit) }
+}
+
+const countRows = ({ rows }: { rows: Expense[] }) => ({ rows: rows.length })
+
+// A full page means there may be more rows after its last one
+export function cursorAfter(rows: Expense[], limit: number = PAGE_SIZE): ExpenseCursor | null {
+    const last = rows[rows.length - 1]
+    if (rows.length < limit || !last) return null
+    return { date: last.date, created_at: last.created_at || '', id: last.id }
+}
+
+// Load every row of one month, page by page, optionally continuing after `start`
+export async function fetchMonthExpenses(projectId: string, month: string, start: ExpenseCursor | null = null): Promise<{ rows: Expense[], members: Member[] }> {
+    const { from, to } = monthRange(month)
+    const rows: Expense[] = []
+    let members: Member[] = []
+    let cursor: ExpenseCursor | null = start
+
+    do {
+        const page: ExpensePage = await fetchExpensePage(projectId, { from, to, cursor })
+        rows.push(...page.rows)
+        members = mergeMembers(members, page.members)
+        cursor = page.nextCursor
+    } while (cursor)
+
+    return { rows, members }
+}
+
+const compareExpenses = (a: Expense, b: Expense) => {
+    if (a.date !== b.date) return a.date < b.date ? 1 : -1
+    const aCreated = a.created_at || ''
+    const bCreated = b.created_at || ''
+    if (aCreated !== bCreated) return aCreated < bCreated ? 1 : -1
+    if (a.id !== b.id) return a.id < b.id ? 1 : -1
+    return 0
+}
+
+// Merge freshly loaded rows into the list, replacing rows with the same id, newest first
+export function mergeExpenses(existing: Expense[], incoming: Expense[]): Expense[] {
+    if (incoming.length === 0) return existing
+
+    const byId = new Map(existing.map(e => [e.id, e]))
+    incoming.forEach(e => byId.set(e.id, e))
+    return Array.from(byId.values()).sort(compareExpenses)
+}
+
+// Position of the last row of a search page in (rank desc, date desc, created_at desc, id desc) order
+export type SearchCursor = ExpenseCursor & { rank: number }
+
+export type SearchFilters = {
+    category?: string
+    sub_category?: string
+    user_id?: string
+    start_date?: string // inclusive
+    end_date?: string // inclusive
+}
+
+export const SEARCH_PAGE_SIZE = 100
+
+// Ranked description search over the whole project history (see add_expense_search.sql)
+export async function searchExpenses(
+    projectId: string,
+    query: string,
+    filters: SearchFilters = {},
+    cursor: SearchCursor | null = null,
+    limit: number = SEARCH_PAGE_SIZE
+): Promise<{ rows: Expense[], members: Member[], nextCursor: SearchCursor | null }> {
+    const { data, error } = await timedAsync('search_expenses', 'call', () => supabase.rpc('search_expenses', {
+        target_project_id: projectId,
+        query,
+        filters,
+        search_cursor: cursor,
+        page_size: limit
+    }))
+
+    if (error) throw error
+
+    const { page, ranks } = data as { page: ColumnarExpenses, ranks: number[] }
+    const { rows, members } = timed('search_expenses', 'decode', () => decodeExpenses(page), countRows)
+    const last = cursorAfter(rows, limit)
+    return {
+        rows,
+        members,
+        nextCursor: last ? { ...last, rank: ranks[ranks.length - 1] } : null
+    }
+}
+
+export type ExpenseChanges = {
+    rows: Expense[]
+    members: Member[]
+    deleted: string[]
+    watermark: string
+    reset: boolean // the watermark was missing or too old; start over from a fresh load
+}
+
+// Rows changed and ids deleted in a project since a previous watermark (see add_expense_sync.sql)
+export async function fetchExpenseChanges(projectId: string, since: string | null): Promise<ExpenseChanges> {
+    const { data, error } = await timedAsync('get_expense_changes', 'call', () => supabase.rpc('get_expense_changes', {
+        target_project_id: projectId,
+        since
+    }))
+
+    if (error) throw error
+
+    const changes = data as { expenses: ColumnarExpenses, deleted: string[], watermark: string, reset: boolean }
+    const { rows, members } = timed('get_expense_changes', 'decode', () => decodeExpenses(changes.expenses), countRows)
+    return { rows, members, deleted: changes.deleted || [], watermark: changes.watermark, reset: changes.reset }
+}
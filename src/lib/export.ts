@@ -0,0 +1,74 @@
+import { Expense, monthRange } from './expenses'
+
+// Streaming export endpoint (export_expenses.py --serve). Without it the app builds the CSV itself.
+export const EXPORT_URL = process.env.NEXT_PUBLIC_EXPORT_URL
+
+const CSV_HEADERS = ['Date', 'Category', 'Sub Category', 'Source', 'Description', 'Amount', 'Type', 'Added By']
+
+const csvField = (value: string) => /[",\n\r]/.test(value) ? `"${value.replace(/"/g, '""')}"` : value
+
+// Inclusive date bounds for a YYYY-MM key, none for 'all'
+function exportRange(month: string): { from?: string, to?: string } {
+    if (month === 'all') return {}
+    const { from, to } = monthRange(month)
+    const last = new Date(`${to}T00:00:00Z`)
+    last.setUTCDate(last.getUTCDate() - 1)
+    return { from, to: last.toISOString().substring(0, 10) }
+}
+
+function clickLink(href: string, filename?: string) {
+    const link = document.createElement('a')
+    link.href = href
+    if (filename) link.setAttribute('download', filename)
+    document.body.appendChild(link)
+    link.click()
+    document.body.removeChild(link)
+}
+
+export function download(blob: Blob, filename: string) {
+    const url = URL.createObjectURL(blob)
+    clickLink(url, filename)
+    // Safari and the Android WebView read the blob after click() returns; revoking right away cancels the download
+    setTimeout(() => URL.revokeObjectURL(url), 60_000)
+}
+
+// Ask the streaming endpoint for a short-lived signed link and let the browser download it,
+// so the file goes straight to disk instead of through page memory. The server applies RLS
+// for the signed-in user.
+export async function downloadServerExport(projectId: string, month: string, accessToken: string) {
+    const { from, to } = exportRange(month)
+    const params = new URLSearchParams({ project_id: projectId, format: 'csv' })
+    if (from) params.set('from', from)
+    if (to) params.set('to', to)
+
+    const response = await fetch(`${EXPORT_URL}/export-link?${params}`, {
+        method: 'POST',
+        headers: { Authorization: `Bearer ${accessToken}` }
+    })
+    if (!response.ok) throw new Error(`Export failed (${response.status})`)
+
+    const { url } = await response.json() as { url: string }
+    clickLink(`${EXPORT_URL}${url}`, `expenses-${month}.csv`)
+}
+
+// Build the CSV from rows already in memory, one Blob part per line instead of one big string
+export function downloadLocalExport(expenses: Expense[], month: string) {
+    const parts: string[] = [CSV_HEADERS.join(',') + '\n']
+
+    for (const exp of expenses) {
+        const type = exp.category === 'Saving' ? 'Income' : 'Expense'
+        const addedBy = exp.profiles ? (exp.profiles.full_name || exp.profiles.username || 'Unknown') : 'Unknown'
+        parts.push([
+            exp.date,
+            exp.category,
+            csvField(exp.sub_category || ''),
+            exp.source || 'Balance',
+            csvField(exp.description || ''),
+            exp.amount,
+            type,
+            csvField(addedBy)
+        ].join(',') + '\n')
+    }
+
+    download(new Blob(parts, { type: 'text/csv;charset=utf-8;' }), `expenses-${month}.csv`)
+}
@@ -0,0 +1,229 @@
+import { Expense } from './expenses'
+import { Member } from './columnar'
+import { RollupRow } from './rollup'
+import { HomeBootstrap, SavingGoal, UserProfile } from './bootstrap'
+
+// On-device copy of what the app has loaded, so a cold start (or no connection at all)
+// renders from IndexedDB first and then only asks the server for what changed since
+// `watermark` (see add_expense_sync.sql). Expenses created offline wait in the outbox.
+// Each account has its own database, selected with setOfflineUser() once the session is known.
+
+const DB_NAME = 'lsp-tracker'
+const DB_VERSION = 1
+
+// Everything of one project except its expenses, which are stored row by row
+export type ProjectSnapshot = {
+    project: { id: string, name: string, role: 'owner' | 'member' }
+    profile: UserProfile | null
+    savingGoals: SavingGoal[]
+    rollup: RollupRow[]
+    members: Member[]
+    budgetTarget: number | null
+    loadedMonths: string[] // months whose rows are all in the cache
+    watermark: string | null // server time the cached rows are current to
+}
+
+// An expense insert waiting for a connection. `id` is generated on the device so a
+// retried flush cannot insert the same row twice.
+export type OutboxEntry = {
+    id: string
+    tempId: string // the optimistic row shown meanwhile
+    group: string // rows added by one submission (an expense and its "Cover for:" row) are flushed together
+    queued_at: number
+    project_id: string
+    row: Omit<Expense, 'id' | 'profiles'> & { id: string }
+}
+
+export type ProjectCache = {
+    snapshot: ProjectSnapshot
+    expenses: Expense[]
+    outbox: OutboxEntry[]
+}
+
+let dbUser: string | null = null
+let dbPromise: Promise<IDBDatabase | null> | null = null
+
+// Someone else signing in on this device must not see the previous account's projects,
+// not even for the moment before the server answers. Their outbox stays for when they return.
+export function setOfflineUser(userId: string) {
+    if (userId === dbUser) return
+    dbPromise?.then(db => db?.close())
+    dbPromise = null
+    dbUser = userId
+}
+
+function openDb(): Promise<IDBDatabase | null> {
+    if (!dbUser) return Promise.resolve(null)
+    if (dbPromise) return dbPromise
+
+    const name = `${DB_NAME}:${dbUser}`
+    dbPromise = new Promise(resolve => {
+        if (typeof indexedDB === 'undefined') return resolve(null)
+
+        const request = indexedDB.open(name, DB_VERSION)
+        request.onupgradeneeded = () => {
+            const db = request.result
+            db.createObjectStore('snapshots')
+            db.createObjectStore('expenses', { keyPath: 'id' }).createIndex('project_id', 'project_id')
+            db.createObjectStore('outbox', { keyPath: 'id' }).createIndex('project_id', 'project_id')
+            db.createObjectStore('home')
+        }
+        request.onsuccess = () => resolve(request.result)
+        // Private browsing or a full disk: the app works as before, just without a cache
+        request.onerror = () => resolve(null)
+    })
+    return dbPromise
+}
+
+function done(tx: IDBTransaction): Promise<void> {
+    return new Promise((resolve, reject) => {
+        tx.oncomplete = () => resolve()
+        tx.onerror = () => reject(tx.error)
+        tx.onabort = () => reject(tx.error)
+    })
+}
+
+function result<T>(request: IDBRequest<T>): Promise<T> {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result)
+        request.onerror = () => reject(request.error)
+    })
+}
+
+export async function loadProjectCache(projectId: string): Promise<ProjectCache | null> {
+    const db = await openDb()
+    if (!db) return null
+
+    const tx = db.transaction(['snapshots', 'expenses', 'outbox'], 'readonly')
+    const [snapshot, expenses, outbox] = await Promise.all([
+        result(tx.objectStore('snapshots').get(projectId)) as Promise<ProjectSnapshot | undefined>,
+        result(tx.objectStore('expenses').index('project_id').getAll(projectId)) as Promise<Expense[]>,
+        result(tx.objectStore('outbox').index('project_id').getAll(projectId)) as Promise<OutboxEntry[]>
+    ])
+
+    return snapshot ? { snapshot, expenses, outbox: outbox.sort((a, b) => a.queued_at - b.queued_at) } : null
+}
+
+export async function saveProjectSnapshot(snapshot: ProjectSnapshot) {
+    const db = await openDb()
+    if (!db) return
+    const tx = db.transaction('snapshots', 'readwrite')
+    tx.objectStore('snapshots').put(snapshot, snapshot.project.id)
+    await done(tx)
+}
+
+// Write changed rows and drop removed ones in one transaction
+export async function saveExpenses(projectId: string, changed: Expense[], removedIds: string[]) {
+    if (changed.length === 0 && removedIds.length === 0) return
+    const db = await openDb()
+    if (!db) return
+
+    const tx = db.transaction('expenses', 'readwrite')
+    const store = tx.objectStore('expenses')
+    changed.forEach(row => store.put({ ...row, project_id: row.project_id || projectId }))
+    removedIds.forEach(id => store.delete(id))
+    await done(tx)
+}
+
+// Forget a project entirely (access revoked, or the server asked for a fresh start)
+export async function clearProjectCache(projectId: string, keepSnapshot: boolean = false) {
+    const db = await openDb()
+    if (!db) return
+
+    const tx = db.transaction(['snapshots', 'expenses'], 'readwrite')
+    if (!keepSnapshot) tx.objectStore('snapshots').delete(projectId)
+    const index = tx.objectStore('expenses').index('project_id')
+    const keys = await result(index.getAllKeys(projectId))
+    keys.forEach(key => tx.objectStore('expenses').delete(key))
+    await done(tx)
+}
+
+export async function queueExpenses(entries: OutboxEntry[]) {
+    const db = await openDb()
+    if (!db) throw new Error('Offline storage is not available')
+    const tx = db.transaction('outbox', 'readwrite')
+    entries.forEach(entry => tx.objectStore('outbox').put(entry))
+    await done(tx)
+}
+
+export async function dequeueExpenses(ids: string[]) {
+    const db = await openDb()
+    if (!db || ids.length === 0) return
+    const tx = db.transaction('outbox', 'readwrite')
+    ids.forEach(id => tx.objectStore('outbox').delete(id))
+    await done(tx)
+}
+
+export async function loadOutbox(projectId: string): Promise<OutboxEntry[]> {
+    const db = await openDb()
+    if (!db) return []
+    const tx = db.transaction('outbox', 'readonly')
+    const entries = await result(tx.objectStore('outbox').index('project_id').getAll(projectId)) as OutboxEntry[]
+    return entries.sort((a, b) => a.queued_at - b.queued_at)
+}
+
+// Everything cached on this device for the signed-in account, for sign-out
+export async function clearOfflineStore() {
+    const db = await openDb()
+    if (!db) return
+    const stores = ['snapshots', 'expenses', 'outbox', 'home']
+    const tx = db.transaction(stores, 'readwrite')
+    stores.forEach(name => tx.objectStore(name).clear())
+    await done(tx)
+}
+
+// No response at all (as opposed to the server rejecting the request)
+export const isOfflineError = (error: { code?: string } | null) =>
+    (typeof navigator !== 'undefined' && !navigator.onLine) || (!!error && !error.code)
+
+export async function loadHomeCache(): Promise<HomeBootstrap | null> {
+    const db = await openDb()
+    if (!db) return null
+    const tx = db.transaction('home', 'readonly')
+    return (await result(tx.objectStore('home').get('home')) as HomeBootstrap | undefined) || null
+}
+
+export async function saveHomeCache(home: HomeBootstrap) {
+    const db = await openDb()
+    if (!db) return
+    const tx = db.transaction('home', 'readwrite')
+    tx.objectStore('home').put(home, 'home')
+    await done(tx)
+}
+
+// Optimistic rows for queued entries, shown until they are sent
+export function outboxRows(entries: OutboxEntry[], profile: UserProfile | null): Expense[] {
+    return entries.map(entry => ({ ...entry.row, id: entry.tempId, profiles: profile || undefined }))
+}
+
+// Whole submissions per batch, about `size` rows each
+export function outboxBatches(entries: OutboxEntry[], size: number = 100): OutboxEntry[][] {
+    const batches: OutboxEntry[][] = []
+    let batch: OutboxEntry[] = []
+
+    entries.forEach((entry, i) => {
+        batch.push(entry)
+        const groupEnds = entries[i + 1]?.group !== entry.group
+        if (groupEnds && batch.length >= size) {
+            batches.push(batch)
+            batch = []
+        }
+    })
+    if (batch.length > 0) batches.push(batch)
+
+    return batches
+}
+
+// Rows that differ (by identity) between two versions of the expense list.
+// The reducer keeps untouched rows as the same objects, so this is one pass.
+export function diffExpenses(previous: Expense[], next: Expense[]): { changed: Expense[], removedIds: string[] } {
+    const before = new Map(previous.map(e => [e.id, e]))
+    const changed: Expense[] = []
+
+    next.forEach(e => {
+        if (before.get(e.id) !== e) changed.push(e)
+        before.delete(e.id)
+    })
+
+    return { changed, removedIds: Array.from(before.keys()) }
+}
@@ -0,0 +1,301 @@
+import type { ProfilerOnRenderCallback } from 'react'
+
+// Opt-in timings of the app's hot paths: every Supabase request (time, payload size,
+// rows), decoding the columnar pages, the totals/chart memos and list renders.
+// Off by default and close to free when off. Turn it on from /debug, or by opening
+// any page with ?perf=local (keep spans on this device) or ?perf=remote (also send
+// them in batches to client_perf_events, see add_client_perf_events.sql and perf_report.py).
+// Every span is also a performance.measure entry, so it shows up in the browser's profiler.
+
+export type PerfMode = 'off' | 'local' | 'remote'
+
+// network: request until the last byte, call: the supabase-js call including JSON parsing,
+// decode: columnar pages to rows, compute: memoized aggregates, render: React commits
+export type PerfStage = 'network' | 'call' | 'decode' | 'compute' | 'render'
+
+export type PerfSpan = {
+    name: string
+    stage: PerfStage
+    started_at: string
+    duration_ms: number
+    rows?: number
+    bytes?: number
+    detail?: Record<string, string | number | boolean | null>
+}
+
+type SpanSize = Pick<PerfSpan, 'rows' | 'bytes'>
+
+const MODE_KEY = 'lsp-perf'
+const SPANS_KEY = 'lsp-perf-spans'
+const MAX_SPANS = 1000 // ring buffer size
+const FLUSH_INTERVAL = 5000
+const FLUSH_SIZE = 100
+
+let mode: PerfMode | null = null
+const ring: PerfSpan[] = []
+let written = 0
+let pending: PerfSpan[] = []
+let flushTimer: ReturnType<typeof setInterval> | null = null
+let flushOnHide = false
+// Kept current by the Supabase client, so a batch sent from pagehide needs no async lookup
+let accessToken: string | null = null
+let watchingSession = false
+const sessionId = typeof crypto !== 'undefined' && 'randomUUID' in crypto ? crypto.randomUUID() : String(Date.now())
+
+const isMode = (value: string | null): value is PerfMode => value === 'off' || value === 'local' || value === 'remote'
+
+export function getPerfMode(): PerfMode {
+    if (mode) return mode
+    if (typeof window === 'undefined') return 'off'
+
+    const fromUrl = new URLSearchParams(window.location.search).get('perf')
+    if (isMode(fromUrl)) localStorage.setItem(MODE_KEY, fromUrl)
+    const stored = localStorage.getItem(MODE_KEY)
+    mode = isMode(stored) ? stored : 'off'
+
+    if (mode !== 'off') restoreSpans()
+    return mode
+}
+
+export function setPerfMode(next: PerfMode) {
+    localStorage.setItem(MODE_KEY, next)
+    mode = next
+    if (next === 'off') {
+        pending = []
+        if (flushTimer) clearInterval(flushTimer)
+        flushTimer = null
+    }
+}
+
+export const perfEnabled = () => getPerfMode() !== 'off'
+
+function push(span: PerfSpan) {
+    ring[written % MAX_SPANS] = span
+    written++
+}
+
+// Oldest first
+export function readSpans(): PerfSpan[] {
+    if (written <= MAX_SPANS) return ring.slice(0, written)
+    const start = written % MAX_SPANS
+    return ring.slice(start).concat(ring.slice(0, start))
+}
+
+export function clearSpans() {
+    ring.length = 0
+    written = 0
+    pending = []
+    localStorage.removeItem(SPANS_KEY)
+}
+
+function restoreSpans() {
+    try {
+        const saved = JSON.parse(localStorage.getItem(SPANS_KEY) || '[]') as PerfSpan[]
+        saved.forEach(push)
+    } catch {
+        localStorage.removeItem(SPANS_KEY)
+    }
+}
+
+function watchSession() {
+    if (watchingSession) return
+    watchingSession = true
+    import('./supabase').then(({ supabase }) => {
+        supabase.auth.onAuthStateChange((_event, session) => { accessToken = session?.access_token ?? null })
+    })
+}
+
+function record(name: string, stage: PerfStage, start: number, duration: number, extra?: SpanSize & { detail?: PerfSpan['detail'] }) {
+    const span: PerfSpan = {
+        name,
+        stage,
+        started_at: new Date(performance.timeOrigin + start).toISOString(),
+        duration_ms: Math.round(duration * 1000) / 1000,
+        ...extra
+    }
+    try {
+        performance.measure(`${stage}:${name}`, { start, duration, detail: extra })
+    } catch {
+        // older WebViews only take mark names
+    }
+
+    push(span)
+    // The measures are only for the browser's profiler, which has seen them by now
+    if (written % MAX_SPANS === 0) performance.clearMeasures()
+
+    if (mode === 'remote') {
+        pending.push(span)
+        watchSession()
+        if (!flushTimer) flushTimer = setInterval(sendPending, FLUSH_INTERVAL)
+        if (pending.length >= FLUSH_SIZE) sendPending()
+    }
+    // Writing the ring to localStorage is a synchronous write of a few hundred kB, so it
+    // only happens when the page is hidden or closed, not while it is being measured
+    if (!flushOnHide) {
+        window.addEventListener('pagehide', flushSpans)
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'hidden') flushSpans()
+        })
+        flushOnHide = true
+    }
+}
+
+// Time a synchronous step, e.g. a useMemo body: timed('summarizeRollup', 'compute', () => ...)
+export function timed<T>(name: string, stage: PerfStage, fn: () => T, size?: (result: T) => SpanSize): T {
+    if (!perfEnabled()) return fn()
+    const start = performance.now()
+    const result = fn()
+    record(name, stage, start, performance.now() - start, size?.(result))
+    return result
+}
+
+// Same for anything awaitable, including supabase-js builders
+export async function timedAsync<T>(name: string, stage: PerfStage, fn: () => PromiseLike<T>, size?: (result: T) => SpanSize): Promise<T> {
+    if (!perfEnabled()) return fn()
+    const start = performance.now()
+    try {
+        const result = await fn()
+        record(name, stage, start, performance.now() - start, size?.(result))
+        return result
+    } catch (error) {
+        record(name, stage, start, performance.now() - start, { detail: { error: true } })
+        throw error
+    }
+}
+
+// "rpc:get_expense_page", "table:expenses", "auth:token", ...
+function requestName(url: string): string {
+    const path = new URL(url, 'http://localhost').pathname
+    const rpc = path.match(/\/rest\/v1\/rpc\/([^/]+)/)
+    if (rpc) return `rpc:${rpc[1]}`
+    const table = path.match(/\/rest\/v1\/([^/]+)/)
+    if (table) return `table:${table[1]}`
+    const other = path.match(/\/(auth|storage|functions)\/v1\/(.*)/)
+    return other ? `${other[1]}:${other[2]}` : path
+}
+
+// fetch for the Supabase client (see supabase.ts). Reads the body here so the span
+// covers the whole download and knows its size; supabase-js then parses it as usual.
+export const perfFetch: typeof fetch = async (input, init) => {
+    if (!perfEnabled()) return fetch(input, init)
+
+    const url = typeof input === 'string' ? input : input instanceof URL ? input.href : input.url
+    const name = requestName(url)
+    // The flush itself is not worth measuring
+    if (name === 'table:client_perf_events') return fetch(input, init)
+
+    const start = performance.now()
+    const response = await fetch(input, init)
+    const firstByte = performance.now() - start
+    const body = [101, 204, 205, 304].includes(response.status) ? null : await response.arrayBuffer()
+
+    // PostgREST reports the returned range for table reads, e.g. "0-24/*"
+    const range = response.headers.get('content-range')?.match(/^(\d+)-(\d+)/)
+    record(name, 'network', start, performance.now() - start, {
+        bytes: body?.byteLength ?? 0,
+        rows: range ? Number(range[2]) - Number(range[1]) + 1 : undefined,
+        detail: {
+            method: (init?.method || (input instanceof Request ? input.method : 'GET')).toUpperCase(),
+            status: response.status,
+            ttfb_ms: Math.round(firstByte * 1000) / 1000
+        }
+    })
+
+    return new Response(body, { status: response.status, statusText: response.statusText, headers: response.headers })
+}
+
+// <Profiler id="ExpenseList" onRender={onRenderProfile}>. React only calls it in
+// development builds (or production builds using the react-dom/profiling bundle).
+export const onRenderProfile: ProfilerOnRenderCallback = (id, phase, actualDuration, baseDuration, startTime) => {
+    if (!perfEnabled()) return
+    record(id, 'render', startTime, actualDuration, {
+        detail: { phase, base_ms: Math.round(baseDuration * 1000) / 1000 }
+    })
+}
+
+// In remote mode, send what accumulated since the last batch. A plain keepalive fetch
+// rather than supabase-js, so a batch sent from pagehide still arrives after the page is
+// gone. A failed batch (or one sent before sign-in) is dropped, not retried.
+function sendPending() {
+    if (mode !== 'remote' || pending.length === 0) return
+    const batch = pending
+    pending = []
+
+    const url = process.env.NEXT_PUBLIC_SUPABASE_URL
+    const key = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY
+    if (!url || !key || !accessToken) return
+
+    fetch(`${url}/rest/v1/client_perf_events`, {
+        method: 'POST',
+        keepalive: true,
+        headers: {
+            apikey: key,
+            Authorization: `Bearer ${accessToken}`,
+            'Content-Type': 'application/json',
+            Prefer: 'return=minimal'
+        },
+        body: JSON.stringify(batch.map(span => ({
+            session_id: sessionId,
+            user_agent: navigator.userAgent,
+            ...span
+        })))
+    })
+        .then(response => { if (!response.ok) console.warn('Could not send perf events:', response.status) })
+        .catch(error => console.warn('Could not send perf events:', error))
+}
+
+// Keep the ring on the device (so /debug survives a reload) and send the pending batch
+export function flushSpans() {
+    if (typeof window === 'undefined' || written === 0) return
+
+    try {
+        localStorage.setItem(SPANS_KEY, JSON.stringify(readSpans()))
+    } catch {
+        // storage full; the in-memory ring is still there
+    }
+    sendPending()
+}
+
+export type SpanSummary = {
+    name: string
+    stage: PerfStage
+    count: number
+    p50: number
+    p95: number
+    max: number
+    rows: number | null // average per span, when known
+    bytes: number | null
+}
+
+const percentile = (sorted: number[], p: number) =>
+    sorted[Math.min(sorted.length - 1, Math.ceil(p * sorted.length) - 1)]
+
+// One line per stage and name, slowest p95 first
+export function summarizeSpans(spans: PerfSpan[]): SpanSummary[] {
+    const groups = new Map<string, PerfSpan[]>()
+    spans.forEach(span => {
+        const key = `${span.stage}\u0000${span.name}`
+        const group = groups.get(key)
+        if (group) group.push(span)
+        else groups.set(key, [span])
+    })
+
+    const average = (values: (number | undefined)[]) => {
+        const known = values.filter((v): v is number => v != null)
+        return known.length ? known.reduce((a, b) => a + b, 0) / known.length : null
+    }
+
+    return Array.from(groups.values()).map(group => {
+        const durations = group.map(s => s.duration_ms).sort((a, b) => a - b)
+        return {
+            name: group[0].name,
+            stage: group[0].stage,
+            count: group.length,
+            p50: percentile(durations, 0.5),
+            p95: percentile(durations, 0.95),
+            max: durations[durations.length - 1],
+            rows: average(group.map(s => s.rows)),
+            bytes: average(group.map(s => s.bytes))
+        }
+    }).sort((a, b) => b.p95 - a.p95)
+}
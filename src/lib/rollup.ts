@@ -0,0 +1,237 @@
+import { supabase } from './supabase'
+import { timedAsync } from './perf'
+
+// One bucket of the trigger-maintained expense_monthly_rollup table (see add_monthly_rollup.sql)
+export type RollupRow = {
+    month: string // YYYY-MM-DD, first day of the month
+    category: 'Living' | 'Playing' | 'Saving' | 'Income'
+    sub_category: string
+    source: string
+    total: number
+    row_count: number
+}
+
+export type MonthlyHistoryEntry = {
+    name: string
+    Living: number
+    Playing: number
+    Saving: number
+    total: number
+}
+
+// Fallback AI target when there are no closed months yet (see AI_BUDGETING_LOGIC.md)
+export const COLD_START_BUDGET = 5000000
+
+export const monthKey = (date: Date) => `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}`
+
+export async function fetchRollup(projectId: string): Promise<RollupRow[]> {
+    const { data, error } = await timedAsync('expense_monthly_rollup', 'call', () => supabase
+        .from('expense_monthly_rollup')
+        .select('month, category, sub_category, source, total, row_count')
+        .eq('project_id', projectId)
+        .order('month', { ascending: true }))
+
+    if (error) throw error
+
+    return (data || []).map(row => ({ ...row, total: Number(row.total) || 0 })) as RollupRow[]
+}
+
+// Net flow of a date range (inclusive dates, either may be ''), with the sign expenseFlow gives
+// each row: Income counts up, Saving up for withdrawals (negative amounts) and down for deposits,
+// everything else down. Summed by get_expense_totals (add_expense_amount_aggregates.sql) for
+// ranges whose rows are not all loaded yet.
+export async function fetchRangeFlow(projectId: string, startDate: string, endDate: string, category?: string): Promise<number> {
+    let toDate: string | null = null
+    if (endDate) {
+        const next = new Date(`${endDate}T00:00:00Z`)
+        next.setUTCDate(next.getUTCDate() + 1)
+        toDate = next.toISOString().substring(0, 10)
+    }
+
+    const { data, error } = await timedAsync('get_expense_totals', 'call', () => supabase.rpc('get_expense_totals', {
+        target_project_id: projectId,
+        from_date: startDate || null,
+        to_date: toDate
+    }))
+
+    if (error) throw error
+
+    return ((data || []) as { category: string, total: number | string }[])
+        .filter(row => !category || row.category === category)
+        .reduce((flow, row) => flow + (row.category === 'Income' ? 1 : -1) * (Number(row.total) || 0), 0)
+}
+
+// Months (YYYY-MM) that have at least one entry, newest first
+export function rollupMonths(rows: RollupRow[]): string[] {
+    const months = new Set(rows.map(r => r.month.substring(0, 7)))
+    return Array.from(months).sort().reverse()
+}
+
+const CATEGORIES: RollupRow['category'][] = ['Living', 'Playing', 'Saving', 'Income']
+const LIVING = 0
+const PLAYING = 1
+const SAVING = 2
+const INCOME = 3
+
+// The rollup as parallel typed arrays, so the aggregations below are plain numeric loops.
+// Totals are whole rupiah (see add_expense_amount_idr.sql), exact in a double up to 2^53.
+type RollupColumns = {
+    months: string[] // distinct YYYY-MM keys, ascending
+    month: Uint16Array // index into months
+    category: Uint8Array // index into CATEGORIES
+    creditCard: Uint8Array
+    total: Float64Array
+}
+
+// The store replaces the rollup array on every change and never mutates one,
+// so the columns can be cached per array and shared by every aggregation
+const columnCache = new WeakMap<RollupRow[], RollupColumns>()
+
+function rollupColumns(rows: RollupRow[]): RollupColumns {
+    const cached = columnCache.get(rows)
+    if (cached) return cached
+
+    const months = Array.from(new Set(rows.map(r => r.month.substring(0, 7)))).sort()
+    const monthIndex = new Map(months.map((m, i) => [m, i]))
+    const columns: RollupColumns = {
+        months,
+        month: new Uint16Array(rows.length),
+        category: new Uint8Array(rows.length),
+        creditCard: new Uint8Array(rows.length),
+        total: new Float64Array(rows.length)
+    }
+
+    rows.forEach((r, i) => {
+        columns.month[i] = monthIndex.get(r.month.substring(0, 7))!
+        columns.category[i] = CATEGORIES.indexOf(r.category)
+        columns.creditCard[i] = r.source === 'Credit Card' ? 1 : 0
+        columns.total[i] = r.total
+    })
+
+    columnCache.set(rows, columns)
+    return columns
+}
+
+// Index of a YYYY-MM key in the columns, -1 for 'all', -2 for a month without rows
+function selectedIndex(columns: RollupColumns, selectedMonth: string): number {
+    if (selectedMonth === 'all') return -1
+    const i = columns.months.indexOf(selectedMonth)
+    return i === -1 ? -2 : i
+}
+
+// Same figures the project page used to derive from the full expense list
+export function summarizeRollup(rows: RollupRow[], selectedMonth: string) {
+    const columns = rollupColumns(rows)
+    const { month, category, creditCard, total } = columns
+    const selected = selectedIndex(columns, selectedMonth)
+    let income = 0
+    let expense = 0
+    let allTimeIncome = 0
+    let allTimeWalletExpense = 0 // Expenses that actually cut balance
+    let allTimeSavings = 0
+    let ccDebt = 0
+
+    for (let i = 0; i < total.length; i++) {
+        const c = category[i]
+        const t = total[i]
+
+        if (c === INCOME) {
+            allTimeIncome += t
+        } else if (!creditCard[i]) {
+            allTimeWalletExpense += t
+        } else {
+            ccDebt += t
+        }
+
+        if (c === SAVING) allTimeSavings += t
+
+        if (selected === -1 || month[i] === selected) {
+            if (c === INCOME) income += t
+            else if (c !== SAVING) expense += t // UI total expense still includes CC
+        }
+    }
+
+    return {
+        totalIncome: income,
+        totalExpenses: expense,
+        balance: allTimeIncome - allTimeWalletExpense,
+        totalSavings: allTimeSavings,
+        allTimeExpenses: allTimeWalletExpense + ccDebt,
+        creditCardDebt: ccDebt
+    }
+}
+
+// Living / Playing / Saving totals for the breakdown chart
+export function categoryTotalsFromRollup(rows: RollupRow[], selectedMonth: string) {
+    const columns = rollupColumns(rows)
+    const { month, category, total } = columns
+    const selected = selectedIndex(columns, selectedMonth)
+    const sums = new Float64Array(CATEGORIES.length)
+
+    for (let i = 0; i < total.length; i++) {
+        if (selected === -1 || month[i] === selected) sums[category[i]] += total[i]
+    }
+
+    return { Living: sums[LIVING], Playing: sums[PLAYING], Saving: sums[SAVING] }
+}
+
+// Last 6 months of non-income spending for the history bar chart
+export function monthlyHistoryFromRollup(rows: RollupRow[], selectedMonth: string): MonthlyHistoryEntry[] {
+    const columns = rollupColumns(rows)
+    const { months, month, category, total } = columns
+    const selected = selectedIndex(columns, selectedMonth)
+    // Living, Playing, Saving per month
+    const sums = new Float64Array(months.length * 3)
+    const hasSpending = new Uint8Array(months.length)
+
+    for (let i = 0; i < total.length; i++) {
+        const c = category[i]
+        if (c > SAVING) continue // Income
+        if (selected !== -1 && month[i] !== selected) continue
+        sums[month[i] * 3 + c] += total[i]
+        hasSpending[month[i]] = 1
+    }
+
+    const history: MonthlyHistoryEntry[] = []
+    for (let m = 0; m < months.length; m++) {
+        if (!hasSpending[m]) continue
+        const name = new Date(`${months[m]}-01T00:00:00`).toLocaleDateString('id-ID', { month: 'short', year: '2-digit' })
+        const living = sums[m * 3 + LIVING]
+        const playing = sums[m * 3 + PLAYING]
+        const saving = sums[m * 3 + SAVING]
+        history.push({ name, Living: living, Playing: playing, Saving: saving, total: living + playing + saving })
+    }
+
+    return history.slice(-6)
+}
+
+// Historical Average Smoothing, see AI_BUDGETING_LOGIC.md
+export function budgetLimitFromRollup(rows: RollupRow[], now: Date = new Date()): number {
+    if (rows.length === 0) return 0 // Default boundary
+
+    const { months, month, category, total } = rollupColumns(rows)
+    // Exclude current month so the target is based on completed past habits
+    const current = months.indexOf(monthKey(now))
+    const spending = new Float64Array(months.length)
+    const counted = new Uint8Array(months.length)
+
+    for (let i = 0; i < total.length; i++) {
+        // Target is based on Necessities and Wants (Living & Playing)
+        const c = category[i]
+        if (c !== LIVING && c !== PLAYING) continue
+        if (month[i] === current) continue
+        spending[month[i]] += total[i]
+        counted[month[i]] = 1
+    }
+
+    let totalPastSpending = 0
+    let pastMonths = 0
+    for (let m = 0; m < months.length; m++) {
+        if (!counted[m]) continue
+        totalPastSpending += spending[m]
+        pastMonths++
+    }
+
+    if (pastMonths === 0) return COLD_START_BUDGET
+    return Math.round(totalPastSpending / pastMonths)
+}
@@ -1,5 +1,6 @@
 
 import { createClient } from '@supabase/supabase-js'
+import { perfFetch } from './perf'
 
 const envUrl = process.env.NEXT_PUBLIC_SUPABASE_URL
 const envKey = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY
@@ -26,4 +27,5 @@ if (typeof window !== 'undefined') {
     })
 }
 
-export const supabase = createClient(supabaseUrl, supabaseAnonKey)
+// perfFetch is a plain fetch unless profiling is turned on (see perf.ts)
+export const supabase = createClient(supabaseUrl, supabaseAnonKey, { global: { fetch: perfFetch } })